@@ -3,35 +3,113 @@ from heppy_fcc.particles.fcc.particle import Particle
 from heppy_fcc.particles.fcc.jet import Jet
 from heppy_fcc.particles.fcc.vertex import Vertex 
 from heppy_fcc.tools.genbrowser import GenBrowser
+from heppy_fcc.tools.collection import LazyCollection
 
 import math
 import pprint
+import numpy as np
+
+neutrino_pdgids = [12, 14, 16]
+
+def gen_arrays(fccptcs):
+    '''Returns the arrays pdgid, status, px, py, pz, e, pt of the raw
+    fcc particles, without building any Particle.
+    e is computed as in TLorentzVector.SetXYZM.'''
+    cores = [ptc.Core() for ptc in fccptcs]
+    pdgid = np.array([core.Type for core in cores], dtype=int)
+    status = np.array([core.Status for core in cores], dtype=int)
+    p4s = np.array([(core.P4.Px, core.P4.Py, core.P4.Pz, core.P4.Mass)
+                    for core in cores], dtype=float).reshape(len(cores), 4)
+    px, py, pz, mass = p4s.T
+    p2 = px*px + py*py + pz*pz
+    with np.errstate(invalid='ignore'):
+        e = np.where(mass >= 0,
+                     np.sqrt(p2 + mass*mass),
+                     np.sqrt(np.maximum(p2 - mass*mass, 0.)))
+    pt = np.sqrt(px*px + py*py)
+    return pdgid, status, px, py, pz, e, pt
+
+def stable_mask(pdgid, status, e, pt):
+    '''Selection of the stable visible particles, for arrays.'''
+    with np.errstate(invalid='ignore'):
+        return (status==1) & ~np.isnan(e) & (e>1e-5) & (pt>1e-5) & \
+               ~np.in1d(np.abs(pdgid), neutrino_pdgids)
+
+
+class GenParticles(object):
+    '''Converts the raw fcc gen particles of an event on demand.
+
+    Each fcc particle is converted at most once, so that the collections
+    built from a GenParticles share the same Particle objects.
+    '''
+
+    def __init__(self, fccptcs, sort_by_pt):
+        self.fccptcs = list(fccptcs)
+        pdgid, status, px, py, pz, e, pt = gen_arrays(self.fccptcs)
+        key = pt if sort_by_pt else e
+        # same order as sorted(..., reverse=True)
+        self.order = np.argsort(-key, kind='mergesort')
+        self.stable = stable_mask(pdgid, status, e, pt)
+        self.particles = [None] * len(self.fccptcs)
+
+    def particle(self, index):
+        ptc = self.particles[index]
+        if ptc is None:
+            ptc = Particle(self.fccptcs[index])
+            self.particles[index] = ptc
+        return ptc
+
+    def all(self):
+        '''all particles, sorted by decreasing energy or pt'''
+        return [self.particle(i) for i in self.order]
+
+    def stable_particles(self):
+        '''stable visible particles, sorted by decreasing energy or pt'''
+        return [self.particle(i) for i in self.order if self.stable[i]]
+
 
 class FCCReader(Analyzer):
+    '''Reads the FCC EDM collections.
+
+    The collections are converted only when an analyzer accesses them,
+    and once per event: event.gen_particles, event.gen_particles_stable,
+    event.gen_vertices and event.gen_jets are LazyCollections.
+    The stable particles are selected on the raw fcc particles,
+    and only the selected particles are converted
+    if event.gen_particles is not used.
+    '''
 
     def beginLoop(self, setup):
         super(FCCReader, self).beginLoop(setup)
         self.sort_key = lambda ptc: ptc.e()
+        self.sort_by_pt = False
         if self.cfg_ana.mode=='pp' or self.cfg_ana.mode=='ep':
             self.sort_key = lambda ptc: ptc.pt()
-    
+            self.sort_by_pt = True
+
     def process(self, event):
         store = event.input
         if hasattr(self.cfg_ana, 'gen_particles'):
             name_genptc = self.cfg_ana.gen_particles
-            gen_particles = map(Particle, store.get("GenParticle"))
-            event.gen_particles = sorted( gen_particles,
-                                          key = self.sort_key,
-                                          reverse=True )  
-            event.gen_particles_stable = [ptc for ptc in event.gen_particles
-                                          if ptc.status()==1 and 
-                                          not math.isnan(ptc.e()) and
-                                          ptc.e()>1e-5 and 
-                                          ptc.pt()>1e-5 and
-                                          not abs(ptc.pdgid()) in [12, 14, 16]]
-            gen_vertices = store.get("GenVertex")
-            event.gen_vertices = map(Vertex, gen_vertices)
+            converter = []
+            def gen_particles():
+                if not converter:
+                    converter.append( GenParticles(store.get("GenParticle"),
+                                                   self.sort_by_pt) )
+                return converter[0]
+            event.gen_particles = LazyCollection(
+                lambda: gen_particles().all()
+            )
+            event.gen_particles_stable = LazyCollection(
+                lambda: gen_particles().stable_particles()
+            )
+            event.gen_vertices = LazyCollection(
+                lambda: map(Vertex, store.get("GenVertex"))
+            )
         if hasattr(self.cfg_ana, 'gen_jets'):
-            event.gen_jets = map(Jet, store.get(self.cfg_ana.gen_jets))
-            event.gen_jets.sort(key = self.sort_key, reverse=True)
+            def gen_jets():
+                jets = map(Jet, store.get(self.cfg_ana.gen_jets))
+                jets.sort(key = self.sort_key, reverse=True)
+                return jets
+            event.gen_jets = LazyCollection(gen_jets)
         # event.genbrowser = GenBrowser(event.gen_particles, event.gen_vertices)
@@ -1,5 +1,6 @@
 from heppy.framework.analyzer import Analyzer
-from heppy.utils.deltar import matchObjectCollection, deltaR
+from heppy.utils.deltar import deltaR
+from heppy_fcc.tools.matching import match_collection
 
 import collections
 
@@ -13,13 +14,16 @@ class FastsimCleaner(Analyzer):
         nhs = [ptc for ptc in particles if abs(ptc.pdgid())==130]
         chs = [ptc for ptc in particles if abs(ptc.pdgid())==211]
 
-        pairs = matchObjectCollection(chs, nhs, 1e-5**2)
+        pairs = match_collection(chs, nhs, 1e-5**2)
 
         # import pdb; pdb.set_trace()
+        duplicates = set()
         for ptc in chs: 
             match = pairs[ptc]
             if match: 
                 # print 'found one!'
                 # import pdb; pdb.set_trace()
-                particles.remove(match)
+                duplicates.add(id(match))
+        if duplicates:
+            particles[:] = [ptc for ptc in particles if id(ptc) not in duplicates]
 
@@ -1,9 +1,38 @@
 from heppy.framework.analyzer import Analyzer
+from heppy_fcc.tools.collection import CollectionView
 
 class Filter(Analyzer):
+    '''Selects the objects of a collection.
+
+    Example configuration:
+
+    from heppy_fcc.analyzers.Filter import Filter
+    leptons = cfg.Analyzer(
+        Filter,
+        'sel_leptons',
+        output = 'leptons',
+        input_objects = 'gen_particles_stable',
+        filter_func = lambda ptc: ptc.pt()>30 and abs(ptc.pdgid()) in [11, 13],
+        view = True
+    )
+
+    input_objects: name of the input collection
+    output       : name of the output collection
+    filter_func  : function returning True for the selected objects
+    view         : (optional) if True, the output collection is a lazy 
+                   CollectionView on the input collection instead of a new 
+                   list. filter_func is then evaluated the first time the 
+                   output collection is used, and filters applied to a view 
+                   do not copy the collection. Default False.
+                   The input collection must not be modified afterwards.
+    '''
     
     def process(self, event):
         input_collection = getattr(event, self.cfg_ana.input_objects)
-        output_collection = [obj for obj in input_collection \
-                             if self.cfg_ana.filter_func(obj)]
+        if getattr(self.cfg_ana, 'view', False):
+            output_collection = CollectionView(input_collection,
+                                               func=self.cfg_ana.filter_func)
+        else:
+            output_collection = [obj for obj in input_collection \
+                                 if self.cfg_ana.filter_func(obj)]
         setattr(event, self.cfg_ana.output, output_collection)
@@ -4,6 +4,7 @@ from heppy_fcc.particles.tlv.particle import Particle
 
 import math
 import random
+import numpy as np
 
 from ROOT import TLorentzVector
 
@@ -25,14 +26,120 @@ def particle(pdgid, theta, phi, energy, flat_pt=False):
                          momentum*costheta,
                          energy)
     return Particle(pdgid, charge, tlv) 
-    
+
+
+def random_theta(thetamin=None, thetamax=None,
+                 etamin=None, etamax=None, size=None):
+    '''Returns size angles w/r to the transverse plane, as in particle,
+    or a single angle if size is None.
+
+    The angles are flat in theta or, if etamin and etamax are set,
+    flat in eta.
+    '''
+    if etamin is not None and etamax is not None:
+        eta = np.random.uniform(etamin, etamax, size)
+        return np.arctan(np.sinh(eta))
+    return np.random.uniform(thetamin, thetamax, size)
+
+
+def particles_block(pdgid, size, ptmin, ptmax,
+                    thetamin=None, thetamax=None,
+                    etamin=None, etamax=None,
+                    flat_pt=False):
+    '''Returns an (size, 4) array of px, py, pz, E for size particles.
+
+    The direction is flat in theta (angle w/r to the transverse plane,
+    as in particle) or, if etamin and etamax are set, flat in eta.
+    ptmin and ptmax are the pt range if flat_pt is True,
+    and the energy range otherwise.
+    '''
+    mass, charge = particle_data[pdgid]
+    theta = random_theta(thetamin, thetamax, etamin, etamax, size)
+    sintheta = np.cos(theta)
+    costheta = np.sin(theta)
+    phi = np.random.uniform(-math.pi, math.pi, size)
+    energy = np.random.uniform(ptmin, ptmax, size)
+    if flat_pt:
+        momentum = energy / sintheta
+        energy = np.sqrt(momentum**2 + mass**2)
+    else:
+        momentum = np.sqrt(energy**2 - mass**2)
+    block = np.empty((size, 4))
+    block[:, 0] = momentum*sintheta*np.cos(phi)
+    block[:, 1] = momentum*sintheta*np.sin(phi)
+    block[:, 2] = momentum*costheta
+    block[:, 3] = energy
+    return block
+
 
 class Gun(Analyzer):
-    
+    '''Particle gun, producing one particle per event.
+
+    Example configuration:
+
+    from heppy_fcc.analyzers.Gun import Gun
+    source = cfg.Analyzer(
+        Gun,
+        pdgid = 211,
+        ptmin = 0,
+        ptmax = 20.,
+        thetamin = -1.5,
+        thetamax = 1.5,
+        flat_pt = True,
+        block_size = 10000
+    )
+
+    pdgid:      particle type
+    ptmin:      minimum pt if flat_pt is True, minimum energy otherwise
+    ptmax:      maximum pt if flat_pt is True, maximum energy otherwise
+    thetamin:   minimum angle w/r to the transverse plane
+    thetamax:   maximum angle w/r to the transverse plane
+    etamin:     (optional) minimum pseudo-rapidity, replaces thetamin
+    etamax:     (optional) maximum pseudo-rapidity, replaces thetamax
+    flat_pt:    (optional) flat in pt instead of energy. default False
+    block_size: (optional) if set, the particles are pre-generated with
+                numpy by blocks of block_size particles, and served to the
+                event loop from this buffer. The current block is available
+                as the block attribute of the analyzer.
+    '''
+
+    def beginLoop(self, setup):
+        super(Gun, self).beginLoop(setup)
+        self.block_size = getattr(self.cfg_ana, 'block_size', None)
+        self.block = None
+        self.block_index = 0
+        self.angles = dict(
+            thetamin=getattr(self.cfg_ana, 'thetamin', None),
+            thetamax=getattr(self.cfg_ana, 'thetamax', None),
+            etamin=getattr(self.cfg_ana, 'etamin', None),
+            etamax=getattr(self.cfg_ana, 'etamax', None)
+        )
+
+    def generate_block(self):
+        self.block = particles_block(
+            self.cfg_ana.pdgid, self.block_size,
+            self.cfg_ana.ptmin, self.cfg_ana.ptmax,
+            flat_pt=getattr(self.cfg_ana, 'flat_pt', False),
+            **self.angles
+        )
+        self.block_index = 0
+
+    def next_particle(self):
+        if self.block is None or self.block_index == len(self.block):
+            self.generate_block()
+        px, py, pz, e = self.block[self.block_index]
+        self.block_index += 1
+        mass, charge = particle_data[self.cfg_ana.pdgid]
+        return Particle(self.cfg_ana.pdgid, charge,
+                        TLorentzVector(px, py, pz, e))
+
     def process(self, event):
-        theta = random.uniform(self.cfg_ana.thetamin, self.cfg_ana.thetamax)
-        phi = random.uniform(-math.pi, math.pi)
-        energy = random.uniform( self.cfg_ana.ptmin, self.cfg_ana.ptmax)
-        event.gen_particles = [particle(self.cfg_ana.pdgid, theta, phi, energy,
-                                        flat_pt=self.cfg_ana.flat_pt)]
+        if self.block_size:
+            event.gen_particles = [self.next_particle()]
+        else:
+            theta = random_theta(**self.angles)
+            phi = random.uniform(-math.pi, math.pi)
+            energy = random.uniform( self.cfg_ana.ptmin, self.cfg_ana.ptmax)
+            event.gen_particles = [particle(self.cfg_ana.pdgid, theta, phi, energy,
+                                            flat_pt=self.cfg_ana.flat_pt)]
         event.gen_particles_stable = event.gen_particles
@@ -13,16 +13,16 @@ class HiggsTreeProducer(Analyzer):
                               'recreate')
         self.tree = Tree( self.cfg_ana.tree_name,
                           self.cfg_ana.tree_title )
-        bookZed(self.tree, 'ztomumu')
-        bookZed(self.tree, 'higgstojj')
+        self.ztomumu_block = bookBlock(self.tree, 'ztomumu', zed_schema)
+        self.higgstojj_block = bookBlock(self.tree, 'higgstojj', zed_schema)
  
 
     def process(self, event):
         self.tree.reset()
         if len(event.ztomumu):
-            fillZed(self.tree, 'ztomumu', event.ztomumu[0])
+            self.ztomumu_block.fill(event.ztomumu[0])
         if len(event.higgstojj):
-            fillZed(self.tree, 'higgstojj', event.higgstojj[0])
+            self.higgstojj_block.fill(event.higgstojj[0])
         self.tree.tree.Fill()
         
         
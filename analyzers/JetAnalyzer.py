@@ -1,5 +1,6 @@
 from heppy.framework.analyzer import Analyzer
-from heppy.utils.deltar import matchObjectCollection, deltaR
+from heppy.utils.deltar import deltaR
+from heppy_fcc.tools.matching import match_collection
 
 class JetAnalyzer(Analyzer):
 
@@ -7,7 +8,7 @@ class JetAnalyzer(Analyzer):
     def process(self, event):
         jets = getattr(event, self.cfg_ana.jets)
         genjets = getattr(event, self.cfg_ana.genjets)
-        pairs = matchObjectCollection(jets, genjets, 0.3**2)
+        pairs = match_collection(jets, genjets, 0.3**2)
         for jet in jets:
             jet.gen = pairs[jet]
             if jet.gen:
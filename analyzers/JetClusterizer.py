@@ -1,11 +1,13 @@
 from heppy.framework.analyzer import Analyzer
 from heppy.framework.event import Event
 from heppy_fcc.particles.tlv.jet import Jet
-from heppy_fcc.particles.jet import JetConstituents
+from heppy_fcc.particles.jet import JetConstituents, jet_constituents
+from heppy_fcc.tools.jetclusterizer import JetClusterizer as PyJetClusterizer
 
 import os 
+import numpy as np
 
-from ROOT import gSystem
+from ROOT import gSystem, TLorentzVector
 CCJetClusterizer = None
 if os.environ.get('ANALYSISCPP'):
     gSystem.Load("libanalysiscpp-tools")
@@ -20,7 +22,9 @@ import math
 class JetClusterizer(Analyzer):
     '''Jet clusterizer. 
     
-    Makes use of the JetClusterizer class compiled in the analysis-cpp package. 
+    Makes use of the JetClusterizer class compiled in the analysis-cpp package,
+    if available. Otherwise, or if backend is set to 'python', 
+    the numpy clusterizer of heppy_fcc.tools.jetclusterizer is used.
 
     Example configuration: 
 
@@ -33,46 +37,87 @@ class JetClusterizer(Analyzer):
     particles: Name of the input particle collection.
     The output jet collection name is built from the instance_label, 
     in this case "papas_jets".
+
+    Optional parameters, for the python backend only:
+    backend  : 'python' to use the python backend even if the compiled one
+               is available. 
+    algorithm: 'antikt' (default), 'kt', 'cambridge', 'ee_genkt', 'ee_kt'
+    R        : jet radius, default 0.4
+    p        : exponent of the ee_genkt algorithm
+    njets    : number of exclusive jets. Inclusive jets if None (default).
+
+    validate : (optional) check the consistency of the jet constituents, 
+               raising an AssertionError in case of problem. default False.
     '''
 
     def __init__(self, *args, **kwargs):
         super(JetClusterizer, self).__init__(*args, **kwargs)
         min_e = 0.
-        self.clusterizer = CCJetClusterizer(min_e)
+        self.do_validate = getattr(self.cfg_ana, 'validate', False)
+        self.use_python = CCJetClusterizer is None or \
+                          getattr(self.cfg_ana, 'backend', None) == 'python'
+        if self.use_python:
+            self.clusterizer = PyJetClusterizer(
+                min_e,
+                algorithm = getattr(self.cfg_ana, 'algorithm', 'antikt'),
+                R = getattr(self.cfg_ana, 'R', 0.4),
+                p = getattr(self.cfg_ana, 'p', None),
+                njets = getattr(self.cfg_ana, 'njets', None)
+            )
+        else:
+            self.clusterizer = CCJetClusterizer(min_e)
 
     def validate(self, jet):
-        constits = jet.constituents
+        '''Raises an AssertionError if the jet constituents are not 
+        consistent with the jet.'''
         keys = set(jet.constituents.keys())
-        all_possible = set([211, 22, 130, 11, 13, 1, 2])
-        if not keys.issubset(all_possible):
-            print constits
-            assert(False)
+        all_possible = set(JetConstituents.all_pdgids)
+        assert keys.issubset(all_possible), \
+            'unexpected constituent types: {keys}'.format(keys=keys)
         sume = 0. 
         for component in jet.constituents.values():
-            if component.e() - jet.e() > 1e-5:
-                import pdb; pdb.set_trace()
+            assert component.e() - jet.e() <= 1e-5, \
+                'component energy larger than jet energy:\n{jet}\n{constits}'.format(
+                    jet=jet, constits=jet.constituents)
             sume += component.e()
-        if jet.e() - sume > 1e-5:
-            import pdb; pdb.set_trace()
-                
+        assert jet.e() - sume <= 1e-5, \
+            'constituent energy smaller than jet energy:\n{jet}\n{constits}'.format(
+                jet=jet, constits=jet.constituents)
+
+    def clusterize_compiled(self, tlvs):
+        '''Runs the compiled clusterizer, and returns the jet p4s and the
+        jet index of each particle, as the python backend.'''
+        self.clusterizer.clear();
+        for tlv in tlvs:
+            self.clusterizer.add_p4( tlv )
+        self.clusterizer.clusterize()
+        njets = self.clusterizer.n_jets()
+        jet_p4s = np.zeros((njets, 4))
+        jet_index = np.full(len(tlvs), -1, dtype=int)
+        for jeti in range(njets):
+            jet = self.clusterizer.jet(jeti)
+            jet_p4s[jeti] = jet.Px(), jet.Py(), jet.Pz(), jet.E()
+            for consti in range(self.clusterizer.n_constituents(jeti)):
+                jet_index[self.clusterizer.constituent_index(jeti, consti)] = jeti
+        return jet_p4s, jet_index
                 
     def process(self, event):
         particles = getattr(event, self.cfg_ana.particles)
         # removing neutrinos
         particles = [ptc for ptc in particles if abs(ptc.pdgid()) not in [12,14,16]]
-        self.clusterizer.clear();
-        for ptc in particles:
-            self.clusterizer.add_p4( ptc.p4() )
-        self.clusterizer.clusterize()
+        tlvs = [ptc.p4() for ptc in particles]
+        if self.use_python:
+            p4s = np.array([(tlv.Px(), tlv.Py(), tlv.Pz(), tlv.E()) for tlv in tlvs])
+            p4s = p4s.reshape(len(particles), 4)
+            jet_p4s, jet_index = self.clusterizer.clusterize(*p4s.T)
+        else:
+            jet_p4s, jet_index = self.clusterize_compiled(tlvs)
+        constituents = jet_constituents(particles, jet_index, len(jet_p4s))
         jets = []
-        for jeti in range(self.clusterizer.n_jets()):
-            jet = Jet( self.clusterizer.jet(jeti) )
-            jet.constituents = JetConstituents()
+        for (px, py, pz, e), constits in zip(jet_p4s, constituents):
+            jet = Jet( TLorentzVector(px, py, pz, e) )
+            jet.constituents = constits
+            if self.do_validate:
+                self.validate(jet)
             jets.append( jet )
-            for consti in range(self.clusterizer.n_constituents(jeti)):
-                constituent_index = self.clusterizer.constituent_index(jeti, consti)
-                constituent = particles[constituent_index]
-                jet.constituents.append(constituent)
-            jet.constituents.sort()
-            self.validate(jet)
         setattr(event, self.instance_label, jets)
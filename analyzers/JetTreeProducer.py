@@ -7,7 +7,11 @@ from heppy_fcc.analyzers.ntuple import *
 from ROOT import TFile
 
 class JetTreeProducer(Analyzer):
-    '''Some class doc'''
+    '''Tree with the two leading jets and their matched jets.
+
+    If the optional parameter max_jets is set, the jet collection is also
+    stored in the vector branches jets_*, up to max_jets jets.
+    '''
 
     def beginLoop(self, setup):
         super(JetTreeProducer, self).beginLoop(setup)
@@ -16,10 +20,16 @@ class JetTreeProducer(Analyzer):
                               'recreate')
         self.tree = Tree( self.cfg_ana.tree_name,
                           self.cfg_ana.tree_title )
-        bookJet(self.tree, 'jet1')
-        bookJet(self.tree, 'jet1_gen')
-        bookJet(self.tree, 'jet2')
-        bookJet(self.tree, 'jet2_gen')
+        self.jet_blocks = [
+            (bookBlock(self.tree, 'jet{ijet}'.format(ijet=ijet+1), jet_schema),
+             bookBlock(self.tree, 'jet{ijet}_gen'.format(ijet=ijet+1), jet_schema))
+            for ijet in range(2)
+            ]
+        self.jets_vector = None
+        max_jets = getattr(self.cfg_ana, 'max_jets', None)
+        if max_jets:
+            self.jets_vector = bookVector(self.tree, 'jets',
+                                          particle_schema, max_jets)
         var(self.tree, 'event')
         var(self.tree, 'lumi')
         var(self.tree, 'run')
@@ -32,22 +42,12 @@ class JetTreeProducer(Analyzer):
             fill(self.tree, 'lumi', event.lumi)
             fill(self.tree, 'run', event.run)
         jets = getattr(event, self.cfg_ana.jets)
-        if( len(jets)>0 ):
-            jet = jets[0]
-            comp211 = jet.constituents.get(211, None)
-            if comp211: 
-                if comp211.num==2:
-                    import pdb; pdb.set_trace()
-            fillJet(self.tree, 'jet1', jet)
-            if jet.match:
-                fillJet(self.tree, 'jet1_gen', jet.match)
-                # if jet.e()/jet.match.e() > 2.:
-                #     import pdb; pdb.set_trace()
-        if( len(jets)>1 ):
-            jet = jets[1]
-            fillJet(self.tree, 'jet2', jet)
+        for (jet_block, gen_block), jet in zip(self.jet_blocks, jets):
+            jet_block.fill(jet)
             if jet.match:
-                fillJet(self.tree, 'jet2_gen', jet.match)
+                gen_block.fill(jet.match)
+        if self.jets_vector:
+            self.jets_vector.fill(jets)
         self.tree.tree.Fill()
         
         
@@ -1,6 +1,6 @@
 from heppy.framework.analyzer import Analyzer
 from heppy.utils.deltar import matchObjectCollection, deltaR
-from heppy_fcc.particles.isolation import IsolationComputer, IsolationInfo
+from heppy_fcc.particles.isolation import IsolationComputer, IsolationInfo, IsolationIndex
 
 
 pdgids = [211, 22, 130]
@@ -20,11 +20,15 @@ class LeptonAnalyzer(Analyzer):
     def process(self, event):
         particles = getattr(event, self.cfg_ana.particles)
         leptons = getattr(event, self.cfg_ana.leptons)
+        # built once per event and shared by all leptons and pdgids
+        index = IsolationIndex(particles)
+        radius = self.iso_computers[pdgids[0]].radius()
         for lepton in leptons:
             isosum = IsolationInfo('all', lepton)
+            candidates = index.candidates(lepton, radius)
             for pdgid in pdgids:
-                sel_ptcs = [ptc for ptc in particles if ptc.pdgid()==pdgid]
-                iso = self.iso_computers[pdgid].compute(lepton, sel_ptcs)
+                iso = self.iso_computers[pdgid].compute_index(lepton, index,
+                                                              candidates, pdgid)
                 isosum += iso 
                 setattr(lepton, 'iso_{pdgid}'.format(pdgid=pdgid), iso)
             setattr(lepton, 'iso'.format(pdgid=pdgid), isosum)
@@ -1,17 +1,15 @@
 from heppy.framework.analyzer import Analyzer
 
 from heppy_fcc.particles.tlv.met import MET
+from heppy_fcc.particles.p4arrays import p4_arrays
 from ROOT import TLorentzVector 
 
 class METBuilder(Analyzer):
     
     def process(self, event):
-        particles = getattr(event, self.cfg_ana.particles)
-        missingp4 = TLorentzVector()
-        sumpt = 0 
-        for ptc in particles:
-            missingp4 += ptc.p4()
-            sumpt += ptc.pt()
-        missingp4 *= -1
+        arrays = p4_arrays(event, self.cfg_ana.particles)
+        px, py, pz, e = arrays.sum_p4()
+        missingp4 = TLorentzVector(-px, -py, -pz, -e)
+        sumpt = arrays.sum_pt()
         met = MET(missingp4, sumpt)
         setattr(event, self.instance_label, met)
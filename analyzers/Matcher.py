@@ -1,5 +1,6 @@
 from heppy.framework.analyzer import Analyzer
-from heppy.utils.deltar import matchObjectCollection, deltaR
+from heppy.utils.deltar import deltaR
+from heppy_fcc.tools.matching import match_collection
 
 import collections
 
@@ -83,6 +84,10 @@ class Matcher(Analyzer):
 
     note: one cannot attach the distance to the matched particle as 
     the match particle can be matched to another object... 
+
+    one_to_one: (optional) if True, each match particle is matched to at most 
+    one particle, solving the assignment problem. Default False: each 
+    particle is matched to the closest match particle. 
     '''
     def beginLoop(self, setup):
         super(Matcher, self).beginLoop(setup)
@@ -91,8 +96,8 @@ class Matcher(Analyzer):
     def process(self, event):
         particles = getattr(event, self.cfg_ana.particles)
         match_particles = getattr(event, self.cfg_ana.match_particles)
-        pairs = matchObjectCollection(particles, match_particles,
-                                      self.dr2)
+        pairs = match_collection(particles, match_particles, self.dr2,
+                                 getattr(self.cfg_ana, 'one_to_one', False))
         for ptc in particles:
             match = pairs[ptc]
             if match:
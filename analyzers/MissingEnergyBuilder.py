@@ -1,21 +1,17 @@
 from heppy.framework.analyzer import Analyzer
 
 from heppy_fcc.particles.tlv.particle import Particle
+from heppy_fcc.particles.p4arrays import p4_arrays
 from ROOT import TLorentzVector 
 
 class MissingEnergyBuilder(Analyzer):
     
     def process(self, event):
-        add = getattr(event, self.cfg_ana.particles_add)
-        sub = getattr(event, self.cfg_ana.particles_sub)
-        missingp4 = TLorentzVector()
-        charge = 0
-        sumpt = 0 
-        for ptc in add:
-            missingp4 += ptc
-            charge += ptc.q()
-        for ptc in sub: 
-            missingp4 -= ptc
-            charge -= ptc.q() 
+        add = p4_arrays(event, self.cfg_ana.particles_add)
+        sub = p4_arrays(event, self.cfg_ana.particles_sub)
+        px, py, pz, e = [add_sum - sub_sum for add_sum, sub_sum
+                         in zip(add.sum_p4(), sub.sum_p4())]
+        missingp4 = TLorentzVector(px, py, pz, e)
+        charge = int(add.sum_q() - sub.sum_q())
         missing = Particle(0, charge, missingp4)
         setattr(event, self.instance_label, missing)
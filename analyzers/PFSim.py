@@ -9,6 +9,7 @@ from heppy_fcc.fastsim.toyevents import particles
 from heppy_fcc.display.core import Display
 from heppy_fcc.display.geometry import GDetector
 from heppy_fcc.display.pfobjects import GTrajectories
+from heppy_fcc.display.batch import BatchDisplay
 
 from ROOT import TLorentzVector, TVector3
 
@@ -39,25 +40,42 @@ class PFSim(Analyzer):
                    sim particle collection is "papas_sim_particles".
     rec_particles: Name extension for the output reconstructed particle collection.
                    Same comments as for the sim_particles parameter above. 
-    display      : Enable the event display
+    display      : Enable the event display. If set to 'batch', the display
+                   of each event is written to the event_display directory
+                   of the analyzer, without opening any window.
+    display_pdf  : (optional) in batch mode, name of a multi-page pdf file
+                   receiving all events, instead of one png file per event.
     verbose      : Enable the detailed printout.
+    trace_blocks : (optional) if True, the reconstruction of each block
+                   is recorded for debugging in the block_trace collection,
+                   e.g. papas_block_trace. default False
     '''
 
     def __init__(self, *args, **kwargs):
         super(PFSim, self).__init__(*args, **kwargs)
         self.detector = self.cfg_ana.detector
+        self.trace_blocks = getattr(self.cfg_ana, 'trace_blocks', False)
         self.simulator = Simulator(self.detector,
-                                   self.mainLogger)
+                                   self.mainLogger,
+                                   self.trace_blocks)
         self.simname = '_'.join([self.instance_label,  self.cfg_ana.sim_particles])
         self.recname = '_'.join([self.instance_label,  self.cfg_ana.rec_particles])
+        self.tracename = '_'.join([self.instance_label, 'block_trace'])
         self.is_display = self.cfg_ana.display
         if self.is_display:
             self.init_display()        
         
     def init_display(self):
-        self.display = Display(['xy','yz'])
-        self.gdetector = GDetector(self.detector)
-        self.display.register(self.gdetector, layer=0, clearable=False)
+        if self.cfg_ana.display == 'batch':
+            self.display = BatchDisplay(
+                self.detector, ['xy','yz'],
+                outdir='/'.join([self.dirName, 'event_display']),
+                pdf=getattr(self.cfg_ana, 'display_pdf', None)
+            )
+        else:
+            self.display = Display(['xy','yz'])
+            self.gdetector = GDetector(self.detector)
+            self.display.register(self.gdetector, layer=0, clearable=False)
         self.is_display = True
         
     def process(self, event):
@@ -69,11 +87,24 @@ class PFSim(Analyzer):
         self.simulator.simulate( gen_particles )
         pfsim_particles = self.simulator.ptcs
         if self.is_display:
-            self.display.register( GTrajectories(pfsim_particles),
-                                   layer=1)
+            if isinstance(self.display, BatchDisplay):
+                self.display.display_event(
+                    'event_{iev}'.format(iev=event.iEv), pfsim_particles
+                )
+            else:
+                self.display.register( GTrajectories(pfsim_particles),
+                                       layer=1)
         simparticles = sorted( pfsim_particles,
                                key = lambda ptc: ptc.e(), reverse=True)
         particles = sorted( self.simulator.particles,
                             key = lambda ptc: ptc.e(), reverse=True)
         setattr(event, self.simname, simparticles)
         setattr(event, self.recname, particles)
+        if self.trace_blocks:
+            setattr(event, self.tracename,
+                    self.simulator.pfsequence.pfreco.block_trace)
+
+    def endLoop(self, setup):
+        super(PFSim, self).endLoop(setup)
+        if self.is_display and isinstance(self.display, BatchDisplay):
+            self.display.close()
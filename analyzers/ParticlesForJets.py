@@ -19,18 +19,16 @@ class ParticlesForJets(Analyzer):
     
     def process(self, event):
         particles = getattr(event, self.cfg_ana.particles)
-        output = []
-        for ptc in particles: 
-            # print ptc
-            accept = True
-            for colname in self.cfg_ana.resonances:
-                resonances = getattr(event, colname)
-                for resonance in resonances: 
-                    if ptc is resonance.leg1 or ptc is resonance.leg2:
-                        # print 'remove', ptc
-                        accept = False
-            if accept: 
-                output.append(ptc)
+        # ids of all resonance legs, to remove them by identity
+        leg_ids = set()
+        for colname in self.cfg_ana.resonances:
+            resonances = getattr(event, colname)
+            for resonance in resonances: 
+                legs = getattr(resonance, 'legs', None)
+                if legs is None:
+                    legs = [resonance.leg1, resonance.leg2]
+                leg_ids.update(id(leg) for leg in legs)
+        output = [ptc for ptc in particles if id(ptc) not in leg_ids]
         setattr(event, self.instance_label, output)
 
 
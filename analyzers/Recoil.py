@@ -1,20 +1,19 @@
 from heppy.framework.analyzer import Analyzer
 from heppy_fcc.particles.tlv.particle import Particle
+from heppy_fcc.particles.p4arrays import p4_arrays
 from ROOT import TLorentzVector 
 
 
 class Recoil(Analyzer):
     
     def process(self, event):
-        initial = TLorentzVector()
-        initial.SetXYZM(0,0,0,self.cfg_ana.sqrts)
-        particles = getattr(event, self.cfg_ana.particles)
-        visible_p4 = TLorentzVector()
-        for ptc in particles: 
-            if ptc.status()>1: #PF cand status=0 in CMS
-                raise ValueError('are you sure? status='+str(ptc.status()) )
-            visible_p4 += ptc.p4()
-        recoil_p4 = initial - visible_p4
+        arrays = p4_arrays(event, self.cfg_ana.particles)
+        status = arrays.status()
+        if (status>1).any(): #PF cand status=0 in CMS
+            raise ValueError('are you sure? status='+str(status[status>1][0]) )
+        px, py, pz, e = arrays.sum_p4()
+        visible_p4 = TLorentzVector(px, py, pz, e)
+        recoil_p4 = TLorentzVector(-px, -py, -pz, self.cfg_ana.sqrts - e)
         recoil = Particle(0, 0, recoil_p4)
         visible = Particle(0, 0, visible_p4)
         setattr(event, '_'.join(['recoil', self.cfg_ana.instance_label]), recoil)
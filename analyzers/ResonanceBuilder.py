@@ -1,21 +1,89 @@
 from heppy.framework.analyzer import Analyzer
 from heppy_fcc.particles.tlv.resonance import Resonance2 as Resonance
+from heppy_fcc.particles.tlv.resonance import Resonance as ResonanceN
 
 import pprint 
-import itertools
+import numpy as np
+
+from heppy_fcc.tools.combinatorics import leg_combinations, \
+    combination_masses, select_combinations
 
 masses = {23: 91, 25: 125}
 
+
 class ResonanceBuilder(Analyzer):
-    
+    '''Builds resonances from all combinations of legs.
+
+    Example configuration:
+
+    from heppy_fcc.analyzers.ResonanceBuilder import ResonanceBuilder
+    zeds = cfg.Analyzer(
+        ResonanceBuilder,
+        instance_label = 'zeds',
+        leg_collection = 'leptons',
+        filter_func = lambda x : True,
+        pdgid = 23,
+        charge = 0,
+        mass_window = (60., 120.),
+        top_k = 1
+    )
+
+    leg_collection: input collection of legs
+    filter_func   : function selecting the legs
+    pdgid         : pdgid of the resonance
+    nominal_mass  : (optional) nominal mass. by default, taken from
+                    the masses dictionary for pdgid.
+    nlegs         : (optional) number of legs, default 2.
+    charge        : (optional) if set, required total charge of the legs.
+    mass_window   : (optional) (min, max) mass range of the resonances.
+    top_k         : (optional) number of resonances to keep. All by default.
+
+    The output collection contains the resonances passing the selection,
+    sorted by increasing distance to the nominal mass.
+    The invariant masses of all combinations are computed at once,
+    and resonance objects are created only for the resonances kept.
+    '''
+
+    def beginLoop(self, setup):
+        super(ResonanceBuilder, self).beginLoop(setup)
+        self.nominal_mass = getattr(self.cfg_ana, 'nominal_mass', None)
+        if self.nominal_mass is None:
+            if self.cfg_ana.pdgid not in masses:
+                raise ValueError(
+                    'no default mass for pdgid {pdgid}, please set nominal_mass '
+                    'in the configuration of {name}'.format(
+                        pdgid=self.cfg_ana.pdgid, name=self.cfg_ana.name)
+                )
+            self.nominal_mass = masses[self.cfg_ana.pdgid]
+        self.nlegs = getattr(self.cfg_ana, 'nlegs', 2)
+        self.charge = getattr(self.cfg_ana, 'charge', None)
+        self.mass_window = getattr(self.cfg_ana, 'mass_window', None)
+        self.top_k = getattr(self.cfg_ana, 'top_k', None)
+
     def process(self, event):
         # legs = event.gen_particles_stable
         legs = getattr(event, self.cfg_ana.leg_collection)
         legs = [leg for leg in legs if self.cfg_ana.filter_func(leg)]
         resonances = []
-        for leg1, leg2 in itertools.combinations(legs,2):
-            resonances.append( Resonance(leg1, leg2, self.cfg_ana.pdgid) )
-        # sorting according to distance to nominal mass
-        nominal_mass = mass[self.cfg_ana.pdgid]
-        resonances.sort(key=lambda x: abs(x.m()-nominal_mass))
+        if len(legs) >= self.nlegs:
+            tlvs = [leg.p4() for leg in legs]
+            p4s = np.array([(tlv.Px(), tlv.Py(), tlv.Pz(), tlv.E()) for tlv in tlvs])
+            combinations = leg_combinations(len(legs), self.nlegs)
+            mass = combination_masses(p4s, combinations)
+            charges = None
+            if self.charge is not None:
+                charges = np.array([leg.q() for leg in legs])
+            candidates = select_combinations(combinations, mass,
+                                             self.nominal_mass,
+                                             charges, self.charge,
+                                             self.mass_window, self.top_k)
+            for combination in combinations[candidates]:
+                if self.nlegs == 2:
+                    resonance = Resonance(legs[combination[0]],
+                                          legs[combination[1]],
+                                          self.cfg_ana.pdgid)
+                else:
+                    resonance = ResonanceN([legs[i] for i in combination],
+                                           self.cfg_ana.pdgid)
+                resonances.append(resonance)
         setattr(event, self.instance_label, resonances)
@@ -5,6 +5,11 @@ from heppy_fcc.analyzers.ntuple import *
 from ROOT import TFile
 
 class TTbarTreeProducer(Analyzer):
+    '''Tree with the leading lepton, the 3 leading jets, m3 and the met.
+
+    If the optional parameter max_jets is set, the jet collection is also
+    stored in the vector branches jets_*, up to max_jets jets.
+    '''
 
     def beginLoop(self, setup):
         super(TTbarTreeProducer, self).beginLoop(setup)
@@ -12,29 +17,34 @@ class TTbarTreeProducer(Analyzer):
                                         'tree.root']),
                               'recreate')
         self.tree = Tree( 'events', '')
-        bookParticle(self.tree, 'jet1')
-        bookParticle(self.tree, 'jet2')
-        bookParticle(self.tree, 'jet3')
-        bookParticle(self.tree, 'm3')
-        bookMet(self.tree, 'met')
-        bookLepton(self.tree, 'lepton')
+        self.jet_blocks = [bookBlock(self.tree, 'jet{ijet}'.format(ijet=ijet+1),
+                                     particle_schema)
+                           for ijet in range(3)]
+        self.m3_block = bookBlock(self.tree, 'm3', particle_schema)
+        self.met_block = bookBlock(self.tree, 'met', met_schema)
+        self.lepton_block = bookBlock(self.tree, 'lepton', lepton_schema)
+        self.jets_vector = None
+        max_jets = getattr(self.cfg_ana, 'max_jets', None)
+        if max_jets:
+            self.jets_vector = bookVector(self.tree, 'jets',
+                                          particle_schema, max_jets)
         
     def process(self, event):
         self.tree.reset()
         leptons = getattr(event, self.cfg_ana.leptons)
         if len(leptons)==0:
             return # NOT FILLING THE TREE IF NO LEPTON
-        fillLepton(self.tree, 'lepton', leptons[0])
+        self.lepton_block.fill(leptons[0])
         jets = getattr(event, self.cfg_ana.jets)
-        for ijet, jet in enumerate(jets):
-            if ijet==3:
-                break
-            fillParticle(self.tree, 'jet{ijet}'.format(ijet=ijet+1), jet)
+        for block, jet in zip(self.jet_blocks, jets):
+            block.fill(jet)
+        if self.jets_vector:
+            self.jets_vector.fill(jets)
         m3 = getattr(event, self.cfg_ana.m3)
         if m3: 
-            fillParticle(self.tree, 'm3', m3)
+            self.m3_block.fill(m3)
         met = getattr(event, self.cfg_ana.met)
-        fillMet(self.tree, 'met', met)
+        self.met_block.fill(met)
         self.tree.tree.Fill()
         
     def write(self, setup):
@@ -0,0 +1,57 @@
+from heppy.framework.analyzer import Analyzer
+import heppy.framework.config as cfg
+from heppy_fcc.samples.splitting import Throughput, sequence_key
+
+import time
+
+class ThroughputRecorder(Analyzer):
+    '''Records the event rate of the sequence, to calibrate the
+    SplittingPlanner of heppy_fcc.samples.splitting.
+
+    Must be the first analyzer of the sequence, to see all events.
+    Usually added with add_recorder:
+
+    from heppy_fcc.analyzers.ThroughputRecorder import add_recorder
+    add_recorder(sequence)
+
+    sequence_key   : key of the measured sequence, see
+                     heppy_fcc.samples.splitting.sequence_key
+    throughput_file: (optional) file of the measurements. default
+                     throughput.json in the heppy_fcc cache directory.
+
+    The time is measured from the first event to the end of the loop,
+    and added to the measurements of the sequence at the end of the loop.
+    '''
+
+    skip_in_sequence_key = True
+
+    def beginLoop(self, setup):
+        super(ThroughputRecorder, self).beginLoop(setup)
+        self.start = None
+        self.nevents = 0
+
+    def process(self, event):
+        if self.start is None:
+            self.start = time.time()
+        self.nevents += 1
+
+    def endLoop(self, setup):
+        super(ThroughputRecorder, self).endLoop(setup)
+        if not self.nevents:
+            return
+        throughput = Throughput(getattr(self.cfg_ana, 'throughput_file', None))
+        throughput.record(self.cfg_ana.sequence_key, self.nevents,
+                          time.time() - self.start)
+        throughput.save()
+
+
+def add_recorder(sequence, throughput_file=None):
+    '''Inserts a ThroughputRecorder at the beginning of sequence,
+    a list of cfg.Analyzer, and returns sequence.'''
+    recorder = cfg.Analyzer(
+        ThroughputRecorder,
+        sequence_key = sequence_key(sequence),
+        throughput_file = throughput_file
+    )
+    sequence.insert(0, recorder)
+    return sequence
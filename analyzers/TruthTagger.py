@@ -0,0 +1,37 @@
+from heppy.framework.analyzer import Analyzer
+from heppy_fcc.tools.genbrowser import GenBrowser
+from heppy_fcc.tools.truthtagging import tag
+
+class TruthTagger(Analyzer):
+    '''Tags each gen particle with the categories of its ancestors.
+
+    Example configuration:
+
+    from heppy_fcc.analyzers.TruthTagger import TruthTagger
+    truth_tagger = cfg.Analyzer(
+        TruthTagger,
+        particles = 'gen_particles',
+        vertices = 'gen_vertices'
+    )
+
+    particles : input collection of gen particles
+    vertices  : input collection of gen vertices
+
+    After this analyzer, each particle has the attributes
+    from_b, from_tau, from_ds and from_hard_process,
+    and the corresponding bits in truth_flags,
+    see heppy_fcc.tools.truthtagging.
+    Selections can then use truth_mask instead of browsing the history.
+
+    The GenBrowser is stored as event.genbrowser, or reused if it is
+    already there.
+    '''
+
+    def process(self, event):
+        browser = getattr(event, 'genbrowser', None)
+        if browser is None:
+            particles = getattr(event, self.cfg_ana.particles)
+            vertices = getattr(event, self.cfg_ana.vertices)
+            browser = GenBrowser(particles, vertices)
+            event.genbrowser = browser
+        tag(browser)
@@ -1,108 +1,205 @@
 #!/bin/env python
 
+from operator import methodcaller, attrgetter
+import itertools
+
 def var( tree, varName, type=float ):
     tree.var(varName, type)
 
 def fill( tree, varName, value ):
     tree.fill( varName, value )
 
+
+# compiled branch blocks
+#
+# a schema is a list of (field name, getter) pairs, where the getter
+# returns the value of the field for a given object, or None if the
+# field should not be filled.
+# the branch names are built and resolved to the branch buffers once,
+# when a block is compiled, so that filling does not format nor look up
+# any string.
+
+def slot_setter(tree, name):
+    '''Returns a function setting the value of the branch name of tree.
+    The value is written directly to the buffer of the branch
+    if the tree exposes it.'''
+    buffers = getattr(tree, 'vars', None)
+    if isinstance(buffers, dict) and \
+       hasattr(buffers.get(name), '__setitem__'):
+        buf = buffers[name]
+        def set_slot(value):
+            buf[0] = value
+        return set_slot
+    def set_value(value):
+        tree.fill(name, value)
+    return set_value
+
+
+class Block(object):
+    '''Branches prefix_field for the fields of one object.'''
+
+    def __init__(self, tree, prefix, schema, book=True):
+        self.tree = tree
+        self.names = ['_'.join([prefix, field]) for field, getter in schema]
+        if book:
+            for name in self.names:
+                var(tree, name)
+        self.setters = [(slot_setter(tree, name), getter)
+                        for name, (field, getter) in zip(self.names, schema)]
+
+    def fill(self, obj):
+        for setter, getter in self.setters:
+            value = getter(obj)
+            if value is not None:
+                setter(value)
+
+
+class VectorBlock(object):
+    '''Variable-length branches prefix_field for the fields of the objects
+    of a collection, with the number of objects in prefix_n.
+    At most maxlen objects are stored.'''
+
+    def __init__(self, tree, prefix, schema, maxlen):
+        self.tree = tree
+        self.maxlen = maxlen
+        self.lenvar = '_'.join([prefix, 'n'])
+        var(tree, self.lenvar, int)
+        self.branches = [('_'.join([prefix, field]), getter)
+                         for field, getter in schema]
+        for name, getter in self.branches:
+            tree.vector(name, self.lenvar, maxlen)
+        self.set_len = slot_setter(tree, self.lenvar)
+
+    def fill(self, objs):
+        objs = list(itertools.islice(objs, self.maxlen))
+        self.set_len(len(objs))
+        vfill = self.tree.vfill
+        for name, getter in self.branches:
+            vfill(name, [getter(obj) for obj in objs])
+
+
+def sub_schema(prefix, schema, accessor):
+    '''Schema of the object accessor(obj), with field names prefixed by prefix.
+    If accessor(obj) is None, the fields are not filled.'''
+    def sub_getter(getter):
+        def sub_get(obj):
+            sub_obj = accessor(obj)
+            if sub_obj is None:
+                return None
+            return getter(sub_obj)
+        return sub_get
+    return [('_'.join([prefix, field]), sub_getter(getter))
+            for field, getter in schema]
+
+
+# blocks used by the book/fill functions below, stored in the tree by prefix
+
+def _tree_blocks(tree):
+    blocks = getattr(tree, '_ntuple_blocks', None)
+    if blocks is None:
+        blocks = dict()
+        tree._ntuple_blocks = blocks
+    return blocks
+
+def _book_block(tree, prefix, schema):
+    block = Block(tree, prefix, schema)
+    _tree_blocks(tree)[prefix] = block
+    return block
+
+def _get_block(tree, prefix, schema):
+    blocks = _tree_blocks(tree)
+    block = blocks.get(prefix)
+    if block is None:
+        # branches booked without the book functions
+        block = Block(tree, prefix, schema, book=False)
+        blocks[prefix] = block
+    return block
+
+
 # simple particle
 
+particle_schema = [(name, methodcaller(name)) for name in
+                   ['pdgid', 'e', 'pt', 'theta', 'eta', 'phi', 'm']]
+
 def bookParticle( tree, pName ):
-    var(tree, '{pName}_pdgid'.format(pName=pName))
-    var(tree, '{pName}_e'.format(pName=pName))
-    var(tree, '{pName}_pt'.format(pName=pName))
-    var(tree, '{pName}_theta'.format(pName=pName))
-    var(tree, '{pName}_eta'.format(pName=pName))
-    var(tree, '{pName}_phi'.format(pName=pName))
-    var(tree, '{pName}_m'.format(pName=pName))
+    _book_block(tree, pName, particle_schema)
 
 def fillParticle( tree, pName, particle ):
-    fill(tree, '{pName}_pdgid'.format(pName=pName), particle.pdgid() )
-    fill(tree, '{pName}_e'.format(pName=pName), particle.e() )
-    fill(tree, '{pName}_pt'.format(pName=pName), particle.pt() )
-    fill(tree, '{pName}_theta'.format(pName=pName), particle.theta() )
-    fill(tree, '{pName}_eta'.format(pName=pName), particle.eta() )
-    fill(tree, '{pName}_phi'.format(pName=pName), particle.phi() )
-    fill(tree, '{pName}_m'.format(pName=pName), particle.m() )
+    _get_block(tree, pName, particle_schema).fill(particle)
 
 
-def bookCluster( tree, name ):
-    var(tree, '{name}_e'.format(name=name))
-    var(tree, '{name}_layer'.format(name=name))
-
 layers = dict(
     ecal_in = 0,
     hcal_in = 1
 )
-    
+
+cluster_schema = [('e', attrgetter('energy')),
+                  ('layer', lambda cluster: layers[cluster.layer])]
+
+def bookCluster( tree, name ):
+    _book_block(tree, name, cluster_schema)
+
 def fillCluster( tree, name, cluster ):
-    fill(tree, '{name}_e'.format(name=name), cluster.energy )
-    fill(tree, '{name}_layer'.format(name=name), layers[cluster.layer] )
-    
+    _get_block(tree, name, cluster_schema).fill(cluster)
+
 # jet
 
+component_schema = [(name, methodcaller(name)) for name in ['e', 'pt', 'num']]
+
 def bookComponent( tree, pName ):
-    var(tree, '{pName}_e'.format(pName=pName))
-    var(tree, '{pName}_pt'.format(pName=pName))
-    var(tree, '{pName}_num'.format(pName=pName))
+    _book_block(tree, pName, component_schema)
 
 def fillComponent(tree, pName, component):
-    fill(tree, '{pName}_e'.format(pName=pName), component.e() )
-    fill(tree, '{pName}_pt'.format(pName=pName), component.pt() )
-    fill(tree, '{pName}_num'.format(pName=pName), component.num() )
-    
-    
+    _get_block(tree, pName, component_schema).fill(component)
+
+
 pdgids = [211, 22, 130, 11, 13]
-    
+
+def _component(pdgid):
+    def get_component(jet):
+        return jet.constituents.get(pdgid, None)
+    return get_component
+
+jet_schema = list(particle_schema)
+for pdgid in pdgids:
+    jet_schema.extend( sub_schema(str(pdgid), component_schema, _component(pdgid)) )
+
 def bookJet( tree, pName ):
-    bookParticle(tree, pName )
-    for pdgid in pdgids:
-        bookComponent(tree, '{pName}_{pdgid:d}'.format(pName=pName, pdgid=pdgid))
+    _book_block(tree, pName, jet_schema)
     # var(tree, '{pName}_npart'.format(pName=pName))
 
 def fillJet( tree, pName, jet ):
-    fillParticle(tree, pName, jet )
-    for pdgid in pdgids:
-        component = jet.constituents.get(pdgid, None)
-        if component is not None:
-            fillComponent(tree,
-                          '{pName}_{pdgid:d}'.format(pName=pName, pdgid=pdgid),
-                          component )
-        else:
-            import pdb; pdb.set_trace()
-            print jet
+    _get_block(tree, pName, jet_schema).fill(jet)
 
 
 # isolation
 from LeptonAnalyzer import pdgids as iso_pdgids
 # iso_pdgids = [211, 22, 130]
 
+iso_schema = [('e', attrgetter('sume')),
+              ('pt', attrgetter('sumpt')),
+              ('num', attrgetter('num'))]
+
 def bookIso(tree, pName):
-    var(tree, '{pName}_e'.format(pName=pName))
-    var(tree, '{pName}_pt'.format(pName=pName))
-    var(tree, '{pName}_num'.format(pName=pName))    
-    
+    _book_block(tree, pName, iso_schema)
+
 def fillIso(tree, pName, iso):
-    fill(tree, '{pName}_e'.format(pName=pName), iso.sume )
-    fill(tree, '{pName}_pt'.format(pName=pName), iso.sumpt )
-    fill(tree, '{pName}_num'.format(pName=pName), iso.num )    
+    _get_block(tree, pName, iso_schema).fill(iso)
+
+lepton_schema = list(particle_schema)
+for pdgid in iso_pdgids:
+    lepton_schema.extend( sub_schema('iso{pdgid:d}'.format(pdgid=pdgid),
+                                     iso_schema,
+                                     attrgetter('iso_{pdgid:d}'.format(pdgid=pdgid))) )
+lepton_schema.extend( sub_schema('iso', iso_schema, attrgetter('iso')) )
 
 def bookLepton( tree, pName ):
-    bookParticle(tree, pName )
-    for pdgid in iso_pdgids:
-        bookIso(tree, '{pName}_iso{pdgid:d}'.format(pName=pName, pdgid=pdgid))
-    bookIso(tree, '{pName}_iso'.format(pName=pName))
-        
-        
+    _book_block(tree, pName, lepton_schema)
+
 def fillLepton( tree, pName, lepton ):
-    fillParticle(tree, pName, lepton )
-    for pdgid in iso_pdgids:
-        iso = getattr(lepton, 'iso_{pdgid:d}'.format(pdgid=pdgid))
-        fillIso(tree, '{pName}_iso{pdgid:d}'.format(pName=pName, pdgid=pdgid), iso)
-    fillIso(tree, '{pName}_iso'.format(pName=pName), lepton.iso)
-    
-        
+    _get_block(tree, pName, lepton_schema).fill(lepton)
+
+
 def bookIsoParticle(tree, pName):
     bookParticle(tree, pName )
     bookLepton(tree, '{pName}_lep'.format(pName=pName) )
@@ -110,25 +207,44 @@ def bookIsoParticle(tree, pName):
 def fillIsoParticle(tree, pName, ptc, lepton):
     fillParticle(tree, pName, ptc)
     fillLepton(tree, '{pName}_lep'.format(pName=pName), lepton)
-    
+
+
+def _leg(name):
+    def get_leg(zed):
+        leg = getattr(zed, name)
+        # Resonance2 has leg1() and leg2() methods
+        return leg() if callable(leg) else leg
+    return get_leg
+
+zed_schema = list(particle_schema)
+zed_schema.extend( sub_schema('leg1', particle_schema, _leg('leg1')) )
+zed_schema.extend( sub_schema('leg2', particle_schema, _leg('leg2')) )
+
 def bookZed(tree, pName):
-    bookParticle(tree, pName )
-    bookParticle(tree, '{pName}_leg1'.format(pName=pName)  )
-    bookParticle(tree, '{pName}_leg2'.format(pName=pName)  )
+    _book_block(tree, pName, zed_schema)
 
 def fillZed(tree, pName, zed):
-    fillParticle(tree, pName, zed)
-    fillParticle(tree, '{pName}_leg1'.format(pName=pName), zed.leg1 )
-    fillParticle(tree, '{pName}_leg2'.format(pName=pName), zed.leg2 )
+    _get_block(tree, pName, zed_schema).fill(zed)
+
+met_schema = [('pt', methodcaller('pt')),
+              ('sumet', methodcaller('sum_et')),
+              ('phi', methodcaller('phi'))]
 
 def bookMet(tree, pName):
-    var(tree, '{pName}_pt'.format(pName=pName)  )
-    var(tree, '{pName}_sumet'.format(pName=pName)  )    
-    var(tree, '{pName}_phi'.format(pName=pName)  )
+    _book_block(tree, pName, met_schema)
 
 def fillMet(tree, pName, met):
-    fill(tree, '{pName}_pt'.format(pName=pName), met.pt() )
-    fill(tree, '{pName}_sumet'.format(pName=pName), met.sum_et() )
-    fill(tree, '{pName}_phi'.format(pName=pName), met.phi() )
+    _get_block(tree, pName, met_schema).fill(met)
+
+
+# compiled blocks, to be booked in beginLoop and filled in process
 
+def bookBlock(tree, pName, schema):
+    '''Books the branches of schema and returns the Block filling them.'''
+    return _book_block(tree, pName, schema)
 
+def bookVector(tree, pName, schema, maxlen):
+    '''Books vector branches for a collection of at most maxlen
+    objects and returns the VectorBlock filling them.
+    The getters of the schema must not return None.'''
+    return VectorBlock(tree, pName, schema, maxlen)
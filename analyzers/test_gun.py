@@ -0,0 +1,82 @@
+import unittest
+import math
+import random
+import shutil
+import tempfile
+import heppy.framework.config as cfg
+from heppy_fcc.analyzers.Gun import Gun, particle
+
+class Event(object):
+    pass
+
+class TestGun(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def gun(self, **kwargs):
+        params = dict(pdgid=211, ptmin=5., ptmax=20.,
+                      thetamin=-1., thetamax=1., flat_pt=True)
+        params.update(kwargs)
+        cfg_ana = cfg.Analyzer(Gun, **params)
+        cfg_comp = cfg.Component('gun', files=[])
+        gun = Gun(cfg_ana, cfg_comp, self.tmpdir)
+        gun.beginLoop(None)
+        return gun
+
+    def check_ranges(self, ptcs, flat_pt):
+        for ptc in ptcs:
+            self.assertEqual( ptc.pdgid(), 211 )
+            self.assertEqual( ptc.q(), 1 )
+            value = ptc.pt() if flat_pt else ptc.e()
+            self.assertTrue( 5. - 1e-9 <= value <= 20. + 1e-9 )
+            self.assertTrue( -1. - 1e-9 <= ptc.theta() <= 1. + 1e-9 )
+
+    def test_refill(self):
+        gun = self.gun(block_size=7)
+        blocks = []
+        generate_block = gun.generate_block
+        def counting_generate_block():
+            generate_block()
+            blocks.append(gun.block)
+        gun.generate_block = counting_generate_block
+        ptcs = [gun.next_particle() for i in range(20)]
+        # 3 blocks of 7 particles, the last one partially used
+        self.assertEqual( len(blocks), 3 )
+        self.assertEqual( gun.block_index, 6 )
+        for iptc, ptc in enumerate(ptcs):
+            px, py, pz, e = blocks[iptc // 7][iptc % 7]
+            self.assertAlmostEqual( ptc.e(), e )
+            self.assertAlmostEqual( ptc.p4().Px(), px )
+        # successive blocks are different
+        self.assertNotAlmostEqual( blocks[0][0][3], blocks[1][0][3] )
+
+    def test_ranges(self):
+        for flat_pt in [True, False]:
+            gun = self.gun(block_size=50, flat_pt=flat_pt)
+            self.check_ranges([gun.next_particle() for i in range(120)],
+                              flat_pt)
+            # per-event path
+            ptcs = [particle(211, random.uniform(-1., 1.),
+                             random.uniform(-math.pi, math.pi),
+                             random.uniform(5., 20.), flat_pt=flat_pt)
+                    for i in range(120)]
+            self.check_ranges(ptcs, flat_pt)
+
+    def test_eta(self):
+        # the eta range is used with and without blocks
+        for block_size in [None, 10]:
+            gun = self.gun(block_size=block_size, thetamin=None, thetamax=None,
+                           etamin=-0.5, etamax=0.5)
+            for i in range(50):
+                event = Event()
+                gun.process(event)
+                ptc = event.gen_particles[0]
+                self.assertTrue( -0.5 - 1e-9 <= ptc.eta() <= 0.5 + 1e-9 )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from operator import attrgetter
+from heppy_fcc.analyzers.ntuple import Block, VectorBlock, slot_setter, \
+     sub_schema, bookVector, bookParticle, fillParticle
+
+class Tree(object):
+    '''Tree recording the filled values.
+    If buffers is True, the branch buffers are exposed in vars.'''
+
+    def __init__(self, buffers=True):
+        if buffers:
+            self.vars = dict()
+        self.filled = dict()
+        self.vectors = dict()
+
+    def var(self, name, type=float):
+        if hasattr(self, 'vars'):
+            self.vars[name] = [type(0)]
+
+    def fill(self, name, value):
+        self.filled[name] = value
+
+    def vector(self, name, lenvar, maxlen):
+        self.vectors[name] = None
+
+    def vfill(self, name, values):
+        self.vectors[name] = list(values)
+
+    def value(self, name):
+        if hasattr(self, 'vars'):
+            return self.vars[name][0]
+        return self.filled.get(name)
+
+
+class Obj(object):
+    def __init__(self, x, sub=None):
+        self.x = x
+        self.sub = sub
+
+class Particle(object):
+    def pdgid(self): return 211
+    def e(self): return 10.
+    def pt(self): return 5.
+    def theta(self): return 0.5
+    def eta(self): return 0.52
+    def phi(self): return 1.
+    def m(self): return 0.14
+
+schema = [('x', attrgetter('x')),
+          ('y', lambda obj: None if obj.x < 0 else 2 * obj.x)]
+
+class TestNtuple(unittest.TestCase):
+
+    def test_slot_setter(self):
+        tree = Tree()
+        tree.var('a')
+        slot_setter(tree, 'a')(3.)
+        self.assertEqual( tree.vars['a'][0], 3. )
+        self.assertEqual( tree.filled, {} )
+        # no buffer for this branch
+        slot_setter(tree, 'b')(4.)
+        self.assertEqual( tree.filled, {'b':4.} )
+
+    def test_block(self):
+        for buffers in [True, False]:
+            tree = Tree(buffers)
+            block = Block(tree, 'obj', schema)
+            block.fill(Obj(1.))
+            self.assertEqual( tree.value('obj_x'), 1. )
+            self.assertEqual( tree.value('obj_y'), 2. )
+            # None: the branch is not filled
+            block.fill(Obj(-1.))
+            self.assertEqual( tree.value('obj_x'), -1. )
+            self.assertEqual( tree.value('obj_y'), 2. )
+            if buffers:
+                self.assertEqual( tree.filled, {} )
+
+    def test_sub_schema(self):
+        tree = Tree()
+        block = Block(tree, 'obj', schema + sub_schema('sub', schema,
+                                                       attrgetter('sub')))
+        self.assertEqual( block.names, ['obj_x', 'obj_y', 'obj_sub_x', 'obj_sub_y'] )
+        block.fill(Obj(1., Obj(5.)))
+        self.assertEqual( tree.value('obj_sub_y'), 10. )
+        block.fill(Obj(2.))
+        self.assertEqual( tree.value('obj_x'), 2. )
+        self.assertEqual( tree.value('obj_sub_x'), 5. )
+
+    def test_vector_block(self):
+        for buffers in [True, False]:
+            tree = Tree(buffers)
+            block = bookVector(tree, 'objs', schema[:1], 2)
+            self.assertTrue( isinstance(block, VectorBlock) )
+            block.fill(Obj(x) for x in [1., 2., 3.])
+            self.assertEqual( tree.value('objs_n'), 2 )
+            self.assertEqual( tree.vectors['objs_x'], [1., 2.] )
+            block.fill([])
+            self.assertEqual( tree.value('objs_n'), 0 )
+            self.assertEqual( tree.vectors['objs_x'], [] )
+
+    def test_blocks_in_tree(self):
+        tree1, tree2 = Tree(), Tree()
+        bookParticle(tree1, 'ptc')
+        self.assertEqual( list(tree1._ntuple_blocks), ['ptc'] )
+        self.assertFalse( hasattr(tree2, '_ntuple_blocks') )
+        fillParticle(tree1, 'ptc', Particle())
+        self.assertEqual( tree1.value('ptc_e'), 10. )
+        # branches booked without bookParticle
+        for name in ['pdgid', 'e', 'pt', 'theta', 'eta', 'phi', 'm']:
+            tree2.var('_'.join(['ptc', name]))
+        fillParticle(tree2, 'ptc', Particle())
+        self.assertEqual( tree2.value('ptc_pdgid'), 211 )
+        self.assertTrue( tree2._ntuple_blocks['ptc'].tree is tree2 )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+from ROOT import gROOT, TCanvas
+import os
+import multiprocessing
+
+from heppy_fcc.display.core import Display, ViewPane
+from heppy_fcc.display.geometry import gdetector
+from heppy_fcc.display.pfobjects import GTrajectories
+
+class BatchDisplay(Display):
+    '''Event display without windows, writing one image per event,
+    or one page per event in a pdf file.
+
+    All views are drawn side by side in the pads of a single canvas.
+    The detector is drawn from primitives built once,
+    and only the trajectories are built for each event:
+
+      display = BatchDisplay(detector, ['xy', 'yz'], 'event_display')
+      for ievent, particles in enumerate(events):
+          display.display_event('event_{i}'.format(i=ievent), particles)
+      display.close()
+
+    With pdf set to a file name, the events are written to this multi-page
+    pdf file instead of one image file per event.
+    '''
+
+    def __init__(self, detector, views=None, outdir='event_display',
+                 filetype='png', pdf=None, dx=600, dy=600):
+        gROOT.SetBatch(True)
+        ViewPane.nviews = 0
+        if not views:
+            views = ['xy', 'yz', 'xz']
+        self.outdir = outdir
+        self.filetype = filetype
+        self.pdf = pdf
+        self.pdf_open = False
+        if not os.path.isdir(outdir):
+            os.makedirs(outdir)
+        self.canvas = TCanvas('batch_display', 'batch_display',
+                              dx * len(views), dy)
+        self.canvas.Divide(len(views), 1)
+        self.views = dict()
+        for iview, view in enumerate(views):
+            pad = self.canvas.cd(iview+1)
+            self.views[view] = self.create_view(view, pad)
+        if detector is not None:
+            self.register(gdetector(detector), layer=0, clearable=False)
+
+    def display_event(self, name, particles):
+        '''Draws the trajectories of the particles on top of the detector,
+        and writes the result. Returns the name of the output file.'''
+        self.clear()
+        for view in self.views.values():
+            view.reset_pad()
+        self.register(GTrajectories(particles), layer=1)
+        self.draw()
+        return self.save_event(name)
+
+    def save_event(self, name):
+        self.canvas.Update()
+        if self.pdf:
+            fname = os.path.join(self.outdir, self.pdf)
+            # "fname(" opens the multi-page file
+            opt = fname if self.pdf_open else fname + '('
+            self.canvas.Print(opt, 'Title:' + name)
+            self.pdf_open = True
+        else:
+            fname = '{outdir}/{name}.{filetype}'.format(outdir=self.outdir,
+                                                        name=name,
+                                                        filetype=self.filetype)
+            self.canvas.SaveAs(fname)
+        return fname
+
+    def close(self):
+        '''Closes the multi-page pdf file, if any.'''
+        if self.pdf_open:
+            self.canvas.Print(os.path.join(self.outdir, self.pdf) + ']')
+            self.pdf_open = False
+
+
+def display_events(detector, events, views=None, outdir='event_display',
+                   filetype='png', pdf=None):
+    '''Writes the display of each event of events,
+    an iterable of (name, particles). Returns the list of output files.'''
+    display = BatchDisplay(detector, views, outdir, filetype, pdf)
+    fnames = [display.display_event(name, particles)
+              for name, particles in events]
+    display.close()
+    return sorted(set(fnames))
+
+
+def _display_worker(args):
+    make_events, make_detector, chunk, views, outdir, filetype, pdf = args
+    detector = make_detector()
+    return display_events(detector, make_events(detector, chunk), views,
+                          outdir, filetype, pdf)
+
+def display_events_parallel(make_events, make_detector, indices, nworkers,
+                            views=None, outdir='event_display',
+                            filetype='png', pdf=None):
+    '''Writes the displays of the events in a pool of nworkers processes.
+
+    make_detector() must return the detector, e.g. the CMS class.
+    make_events(detector, indices) must return an iterable of
+    (name, particles) for the given event indices, e.g. by simulating
+    the events in the detector.
+    Both must be picklable, e.g. module-level functions or classes.
+    The indices are split in nworkers consecutive chunks, and each worker
+    builds its own detector and display. With pdf set, each worker writes
+    its own pdf file, named after pdf and the worker index.
+    Returns the list of output files.
+    '''
+    indices = list(indices)
+    chunk_size = (len(indices) + nworkers - 1) // nworkers
+    chunks = [indices[i*chunk_size:(i+1)*chunk_size] for i in range(nworkers)]
+    args = []
+    for iworker, chunk in enumerate(chunks):
+        if not chunk:
+            continue
+        worker_pdf = None
+        if pdf:
+            base, ext = os.path.splitext(pdf)
+            worker_pdf = '{base}_{iworker}{ext}'.format(base=base,
+                                                        iworker=iworker,
+                                                        ext=ext)
+        args.append( (make_events, make_detector, chunk, views,
+                      outdir, filetype, worker_pdf) )
+    pool = multiprocessing.Pool(nworkers)
+    try:
+        results = pool.map(_display_worker, args)
+    finally:
+        pool.close()
+        pool.join()
+    return sorted(fname for fnames in results for fname in fnames)
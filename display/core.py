@@ -12,14 +12,19 @@ class Display(object):
             views = ['xy', 'yz', 'xz']
         self.views = dict()
         for view in views:
-            if view in ['xy', 'yz', 'xz']:
-                self.views[view] = ViewPane(view, view,
-                                            100, -4, 4, 100, -4, 4)
-            elif 'thetaphi' in view:
-                self.views[view] = ViewPane(view, view,
-                                            100, -math.pi/2, math.pi/2,
-                                            100, -math.pi, math.pi,
-                                            500, 1000)
+            self.views[view] = self.create_view(view)
+
+    def create_view(self, view, pad=None):
+        if view in ['xy', 'yz', 'xz']:
+            return ViewPane(view, view,
+                            100, -4, 4, 100, -4, 4, pad=pad)
+        elif 'thetaphi' in view:
+            return ViewPane(view, view,
+                            100, -math.pi/2, math.pi/2,
+                            100, -math.pi, math.pi,
+                            500, 1000, pad=pad)
+        else:
+            raise ValueError('unknown view ' + view)
 
     def register(self, obj, layer, clearable=True):
         elems = [obj]
@@ -50,11 +55,17 @@ class Display(object):
 class ViewPane(object):
     nviews = 0
     def __init__(self, name, projection, nx, xmin, xmax, ny, ymin, ymax,
-                 dx=600, dy=600):
+                 dx=600, dy=600, pad=None):
+        '''If pad is given, the view is drawn in this pad
+        instead of a new canvas.'''
         self.projection = projection
-        tx = 50 + self.__class__.nviews * (dx+10) 
-        ty = 50
-        self.canvas = TCanvas(name, name, tx, ty, dx, dy)
+        if pad is None:
+            tx = 50 + self.__class__.nviews * (dx+10) 
+            ty = 50
+            self.canvas = TCanvas(name, name, tx, ty, dx, dy)
+        else:
+            self.canvas = pad
+            pad.cd()
         TH1.AddDirectory(False)
         self.hist = TH2F(name, name, nx, xmin, xmax, ny, ymin, ymax)
         TH1.AddDirectory(True)
@@ -72,6 +83,14 @@ class ViewPane(object):
 
     def clear(self):
         self.registered = dict(self.locked.items())
+
+    def reset_pad(self):
+        '''Removes all primitives from the pad, except the frame histogram.
+        Otherwise, each draw adds the registered objects to the pad again.'''
+        self.canvas.cd()
+        # the primitives are still owned by the registered objects
+        self.canvas.GetListOfPrimitives().Clear('nodelete')
+        self.hist.Draw()
         
     def draw(self):
         self.canvas.cd()
@@ -80,6 +80,19 @@ class GDetector(object):
             elem.draw(projection)
 
 
+_gdetectors = dict()
+
+def gdetector(description):
+    '''Returns the GDetector of a detector description.
+    The detector primitives are built once per detector,
+    and shared by all the displays.'''
+    gdet = _gdetectors.get(id(description))
+    if gdet is None or gdet.desc is not description:
+        gdet = GDetector(description)
+        _gdetectors[id(description)] = gdet
+    return gdet
+
+
             
 if __name__ == '__main__':
 
@@ -3,6 +3,25 @@ import numpy as np
 import operator
 import math
 
+
+def graph(xs, ys):
+    '''Returns a TGraph filled in one go from arrays of coordinates'''
+    xs = np.ascontiguousarray(xs, dtype=float)
+    ys = np.ascontiguousarray(ys, dtype=float)
+    return TGraph(len(xs), xs, ys)
+
+def graphs(points, direction=None):
+    '''Returns the xy, yz, xz, and thetaphi TGraphs of an (N,3) array
+    of points. If direction is given, it is used for the theta and phi
+    of the first point, usually the vertex.'''
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    theta = np.arctan2(np.hypot(x, y), z)
+    phi = np.arctan2(y, x)
+    if direction is not None and len(points):
+        theta[0] = direction.Theta()
+        phi[0] = direction.Phi()
+    return graph(x, y), graph(z, y), graph(z, x), graph(math.pi/2. - theta, phi)
+
 class Blob(object):
     def __init__(self, cluster):
         self.cluster = cluster
@@ -68,11 +87,11 @@ class GTrajectory(object):
     
     def __init__(self, description, linestyle=1, linecolor=1):
         self.desc = description
-        npoints = len(self.desc.points)
-        self.graph_xy = TGraph(npoints)
-        self.graph_yz = TGraph(npoints)
-        self.graph_xz = TGraph(npoints)
-        self.graph_thetaphi = TGraph(npoints)
+        points = np.array([(point.X(), point.Y(), point.Z())
+                           for point in self.desc.points.values()],
+                          dtype=float).reshape(len(self.desc.points), 3)
+        self.graph_xy, self.graph_yz, self.graph_xz, self.graph_thetaphi = \
+            graphs(points, description.p4().Vect())
         self.graphs = [self.graph_xy, self.graph_yz, self.graph_xz, self.graph_thetaphi]
         def set_graph_style(graph):
             graph.SetMarkerStyle(2)
@@ -83,14 +102,6 @@ class GTrajectory(object):
         set_graph_style(self.graph_yz)
         set_graph_style(self.graph_xz)
         set_graph_style(self.graph_thetaphi)
-        for i, point in enumerate(self.desc.points.values()):
-            self.graph_xy.SetPoint( i, point.X(), point.Y() )
-            self.graph_yz.SetPoint(i, point.Z(), point.Y() )
-            self.graph_xz.SetPoint(i, point.Z(), point.X() )
-            tppoint = point
-            if i == 0:
-                tppoint = description.p4().Vect()
-            self.graph_thetaphi.SetPoint(i, math.pi/2. - tppoint.Theta(), tppoint.Phi() )
         clusters = self.desc.clusters_smeared \
                    if self.__class__.draw_smeared_clusters \
                    else self.desc.clusters
@@ -133,20 +144,11 @@ class GHelixTrajectory(GTrajectory):
         self.helix_xy.SetFillStyle(0)
         #TODO this is patchy,need to access the last point, whatever its name
         max_time = helix.time_at_z(description.points.values()[-1].Z())
-        npoints = 100
-        self.graphline_xy = TGraph(npoints)
-        self.graphline_yz = TGraph(npoints)
-        self.graphline_xz = TGraph(npoints)
-        self.graphline_thetaphi = TGraph(npoints)
-        for i, time in enumerate(np.linspace(0, max_time, npoints)):
-            point = helix.point_at_time(time)
-            self.graphline_xy.SetPoint(i, point.X(), point.Y())
-            self.graphline_yz.SetPoint(i, point.Z(), point.Y())
-            self.graphline_xz.SetPoint(i, point.Z(), point.X())
-            tppoint = point
-            if i == 0:
-                tppoint = description.p4().Vect()
-            self.graphline_thetaphi.SetPoint(i, math.pi/2.-tppoint.Theta(), tppoint.Phi())
+        # more points for the helices turning more
+        npoints = helix.npoints(max_time)
+        points = helix.points_at_times(np.linspace(0, max_time, npoints))
+        self.graphline_xy, self.graphline_yz, self.graphline_xz, \
+            self.graphline_thetaphi = graphs(points, description.p4().Vect())
         if abs(self.desc.pdgid()) in [11,13]:
             def set_graph_style(graph):
                 graph.SetLineWidth(3)
@@ -0,0 +1,36 @@
+import unittest
+import math
+import shutil
+import tempfile
+from heppy_fcc.display.batch import BatchDisplay
+from heppy_fcc.fastsim.detectors.CMS import CMS
+from heppy_fcc.fastsim.simulator import Simulator
+from heppy_fcc.fastsim.toyevents import particle
+
+class TestBatchDisplay(unittest.TestCase):
+
+    def setUp(self):
+        self.outdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.outdir)
+
+    def test_primitives(self):
+        detector = CMS()
+        simulator = Simulator(detector)
+        simulator.simulate([particle(211, math.pi/2., 0.5, 20.),
+                            particle(22, math.pi/3., -1., 10.)])
+        display = BatchDisplay(detector, ['xy', 'yz'], self.outdir)
+        nprimitives = []
+        for ievent in range(3):
+            display.display_event('event_{i}'.format(i=ievent), simulator.ptcs)
+            nprimitives.append([len(view.canvas.GetListOfPrimitives())
+                                for view in display.views.values()])
+        display.close()
+        # the detector and the trajectories are drawn once per pad
+        self.assertEqual( nprimitives[0], nprimitives[1] )
+        self.assertEqual( nprimitives[0], nprimitives[2] )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 
 def circle_intersection(x1, y1, r1, r2):
@@ -26,6 +27,46 @@ def circle_intersection(x1, y1, r1, r2):
         xm, ym = ym, xm
         xp, yp = yp, xp
     return xm, ym, xp, yp
+
+
+def circle_intersections(x1, y1, r1, r2, tolerance=1e-12):
+    '''Intersections between circles 1 and a circle 2 centred at origin.
+
+    Vectorized version of circle_intersection. x1, y1, r1 (and r2)
+    can be scalars or arrays of the same length, e.g. the centers and
+    radii of all helices of an event against a cylinder radius.
+
+    Returns xm, ym, xp, yp, valid, where valid is a boolean mask that is
+    False if the two circles do not intersect (or are concentric).
+    The points are set to nan for these circles.
+    The m and p points are ordered as in circle_intersection.
+    '''
+    x1, y1, r1, r2 = np.broadcast_arrays(
+        *[np.asarray(val, dtype=float) for val in (x1, y1, r1, r2)])
+    dist2 = x1**2 + y1**2
+    dist = np.sqrt(dist2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # distance from the origin to the chord joining the two
+        # intersections, along the line joining the centers.
+        # it does not involve any division by x1 or y1,
+        # and is thus stable close to x1 == 0.
+        chord = (r2**2 - r1**2 + dist2) / (2*dist)
+        ux = x1 / dist
+        uy = y1 / dist
+    # half length of the chord. slightly negative values
+    # are obtained for tangent circles due to rounding.
+    half2 = r2**2 - chord**2
+    valid = (dist > 0.) & (half2 >= -tolerance * r2**2)
+    half = np.sqrt(np.where(valid, np.maximum(half2, 0.), np.nan))
+    xm = chord*ux + half*uy
+    ym = chord*uy - half*ux
+    xp = chord*ux - half*uy
+    yp = chord*uy + half*ux
+    # ordering: yp >= ym, or xp >= xm if x1 == 0.
+    swap = np.where(x1 == 0., xm > xp, ym > yp)
+    xm, xp = np.where(swap, xp, xm), np.where(swap, xm, xp)
+    ym, yp = np.where(swap, yp, ym), np.where(swap, ym, yp)
+    return xm, ym, xp, yp, valid
     
 
 if __name__ == '__main__':
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 from scipy import constants
 from ROOT import TVector3
 from heppy.utils.deltar import deltaPhi
@@ -28,6 +29,19 @@ class Path(object):
     def point_at_time(self, time):
         '''Returns the 3D point on the path at a given time'''
         return self.origin + self.udir * self.speed * time
+
+    def points_at_times(self, times):
+        '''Returns the (N,3) array of the points on the path
+        at the given times'''
+        times = np.asarray(times, dtype=float)
+        origin = np.array([self.origin.X(), self.origin.Y(), self.origin.Z()])
+        velocity = np.array([self.udir.X(), self.udir.Y(), self.udir.Z()]) * \
+                   self.speed
+        return origin + np.outer(times, velocity)
+
+    def npoints(self, max_time):
+        '''Number of points needed to draw the path up to max_time'''
+        return 2
         
     def vz(self):
         '''Speed magnitude along z axis'''
@@ -92,6 +106,25 @@ class Helix(Path):
             self.v_over_omega.X() * (1-math.cos(self.omega*time)) \
             + self.v_over_omega.Y() * math.sin(self.omega*time)
         return TVector3(x, y, z)
+
+    def points_at_times(self, times):
+        '''Returns the (N,3) array of the points on the helix
+        at the given times'''
+        times = np.asarray(times, dtype=float)
+        omega_t = self.omega * times
+        cos, sin = np.cos(omega_t), np.sin(omega_t)
+        vx, vy = self.v_over_omega.X(), self.v_over_omega.Y()
+        points = np.empty((len(times), 3))
+        points[:, 0] = self.origin.X() + vy * (1-cos) + vx * sin
+        points[:, 1] = self.origin.Y() - vx * (1-cos) + vy * sin
+        points[:, 2] = self.vz() * times + self.origin.Z()
+        return points
+
+    def npoints(self, max_time, points_per_radian=8, nmin=10, nmax=200):
+        '''Number of points needed to draw the helix up to max_time,
+        proportional to the angle covered in the transverse plane'''
+        angle = abs(self.omega * max_time)
+        return int(min(nmax, max(nmin, math.ceil(angle * points_per_radian))))
     
     def path_length(self, deltat):
         '''ds2 = dx2+dy2+dz2 = [w2rho2 + vz2] dt2'''
@@ -5,18 +5,31 @@ from heppy_fcc.fastsim.pfobjects import Particle
 from ROOT import TVector3, TLorentzVector
 import math
 import pprint
+import logging
+import numpy as np
+
+# Set to False to skip all tracing code in the reconstruction,
+# whatever the logging level.
+TRACE = True
 
 class PFReconstructor(object):
 
-    def __init__(self, links, detector, logger):
+    def __init__(self, links, detector, logger, trace_blocks=False):
+        '''If trace_blocks is True, block_trace is filled with one
+        dictionary per block, with the group_id, the elements, and the
+        reconstructed particles, for debugging.'''
         self.links = links
         self.detector = detector
         self.log = logger
+        self.block_trace = [] if trace_blocks else None
         self.reconstruct(links)
         
     def reconstruct(self, links):
         self.unused = []
         self.particles = []
+        # evaluated once per event, 
+        # so that nothing is formatted if INFO is disabled 
+        self.verbose = TRACE and self.log.isEnabledFor(logging.INFO)
         all_subgroups = dict()
         # pprint.pprint( links.groups )
         # import pdb; pdb.set_trace()
@@ -26,14 +39,32 @@ class PFReconstructor(object):
         for group_id, subgroups in all_subgroups.iteritems():
             del links.groups[group_id]
             links.groups.update(subgroups)
-        for group_id, group in links.groups.iteritems():
-            self.log.info( "group {group_id} {group}".format(
-                group_id = group_id,
-                group = group) ) 
-            self.particles.extend( self.reconstruct_group(group) )
+        # the groups are independent at this point.
+        # single-element groups are reconstructed together, in a batch.
+        # the particles are ordered by group id in both cases. 
+        group_particles = dict()
+        singles = []
+        for group_id in sorted(links.groups):
+            group = links.groups[group_id]
+            if self.verbose:
+                self.log.info( "group %s %s", group_id, group ) 
+            if len(group)==1:
+                singles.append( (group_id, group[0]) )
+                continue
+            group_particles[group_id] = self.reconstruct_group(group)
+        group_particles.update( self.reconstruct_singles(singles) )
+        for group_id in sorted(group_particles):
+            self.particles.extend( group_particles[group_id] )
+            if self.block_trace is not None:
+                self.block_trace.append( dict(
+                    group_id = group_id,
+                    elements = list(links.groups[group_id]),
+                    particles = group_particles[group_id]
+                ) )
         self.unused = [elem for elem in links.elements if not elem.locked]
-        self.log.info("Particles:")
-        self.log.info(str(self))
+        if self.verbose:
+            self.log.info("Particles:")
+            self.log.info("%s", self)
             
     def simplify_group(self, group):
         # for each track, keeping only the closest hcal link
@@ -69,13 +100,8 @@ class PFReconstructor(object):
     def reconstruct_group(self, group):
         particles = []
         if len(group)==1: #TODO WARNING!!! LOTS OF MISSING CASES
-            elem = group[0]
-            layer = elem.layer
-            if layer == 'ecal_in' or layer == 'hcal_in':
-                particles.append(self.reconstruct_cluster(elem, layer))
-            elif layer == 'tracker':
-                particles.append(self.reconstruct_track(elem))
-            elem.locked = True
+            # same as in the batch of single-element groups
+            particles = self.reconstruct_singles( [(None, group[0])] )[None]
         else:
             hcals = [elem for elem in group if elem.layer=='hcal_in']
             for hcal in hcals:
@@ -102,6 +128,44 @@ class PFReconstructor(object):
             #TODO deal with track-ecal
         return particles 
 
+    def reconstruct_singles(self, singles):
+        '''Reconstruct single-element groups. 
+        singles is a list of (group_id, element).
+        The momenta of the particles reconstructed from isolated 
+        clusters are computed for all clusters at once.
+        Returns a dict group_id : [particle].'''
+        group_particles = dict()
+        clusters = []
+        for group_id, elem in singles:
+            if elem.layer == 'tracker':
+                group_particles[group_id] = [self.reconstruct_track(elem)]
+            elif elem.layer == 'ecal_in' or elem.layer == 'hcal_in':
+                clusters.append( (group_id, elem) )
+            else:
+                group_particles[group_id] = []
+            elem.locked = True
+        if not clusters:
+            return group_particles
+        pdg_ids = np.array([22 if elem.layer=='ecal_in' else 130
+                            for group_id, elem in clusters])
+        masses = np.where(pdg_ids==22, particle_data[22][0], particle_data[130][0])
+        energies = np.array([elem.energy for group_id, elem in clusters])
+        positions = np.array([(elem.position.X(),
+                               elem.position.Y(),
+                               elem.position.Z()) for group_id, elem in clusters])
+        momenta = np.sqrt(np.maximum(energies**2 - masses**2, 0.))
+        p3s = positions * (momenta / np.sqrt(np.sum(positions**2, axis=1)))[:, np.newaxis]
+        for i, (group_id, cluster) in enumerate(clusters):
+            if energies[i] < masses[i]:
+                group_particles[group_id] = []
+                continue
+            px, py, pz = p3s[i]
+            p4 = TLorentzVector(px, py, pz, energies[i])
+            particle = self.make_cluster_particle(cluster, cluster.layer, p4,
+                                                  int(pdg_ids[i]))
+            group_particles[group_id] = [particle]
+        return group_particles
+
     def neutral_hadron_energy_resolution(self, hcal):
         '''WARNING CMS SPECIFIC! 
 
@@ -144,9 +208,10 @@ class PFReconstructor(object):
                 # hcal should be the only remaining linked hcal cluster (closest one)
                 thcals = [th for th in elem.linked if th.layer=='hcal_in']
                 assert(thcals[0]==hcal)
-        self.log.info( hcal )
-        self.log.info( '\tT {tracks}'.format(tracks=tracks) )
-        self.log.info( '\tE {ecals}'.format(ecals=ecals) )
+        if self.verbose:
+            self.log.info( '%s', hcal )
+            self.log.info( '\tT %s', tracks )
+            self.log.info( '\tE %s', ecals )
         hcal_energy = hcal.energy
         if len(tracks):
             ecal_energy = sum(ecal.energy for ecal in ecals)
@@ -157,13 +222,13 @@ class PFReconstructor(object):
             # WARNING
             # calo_eres = self.detector.elements['hcal'].energy_resolution(track_energy)
             calo_eres = self.neutral_hadron_energy_resolution(hcal)
-            self.log.info( 'dE/p, res = {derel}, {res} '.format(
-                derel = delta_e_rel,
-                res = calo_eres ))
+            if self.verbose:
+                self.log.info( 'dE/p, res = %s, %s ', delta_e_rel, calo_eres )
             if delta_e_rel > self.nsigma_hcal(hcal) * calo_eres:
                 excess = delta_e_rel * track_energy
-                self.log.info( 'excess = {excess:5.2f}, ecal_E = {ecal_e:5.2f}, diff = {diff:5.2f}'.format(
-                    excess=excess, ecal_e = ecal_energy, diff=excess-ecal_energy))
+                if self.verbose:
+                    self.log.info( 'excess = %5.2f, ecal_E = %5.2f, diff = %5.2f',
+                                   excess, ecal_energy, excess-ecal_energy )
                 if excess <= ecal_energy:
                     particles.append(self.reconstruct_cluster(hcal, 'ecal_in',
                                                               excess))
@@ -204,6 +269,12 @@ class PFReconstructor(object):
         momentum = math.sqrt(energy**2 - mass**2)
         p3 = cluster.position.Unit() * momentum
         p4 = TLorentzVector(p3.Px(), p3.Py(), p3.Pz(), energy)
+        return self.make_cluster_particle(cluster, layer, p4, pdg_id, vertex)
+
+    def make_cluster_particle(self, cluster, layer, p4, pdg_id, vertex=None):
+        if vertex is None:
+            vertex = TVector3()
+        mass, charge = particle_data[pdg_id]
         particle = Particle(p4, vertex, charge, pdg_id)
         path = StraightLine(p4, vertex)
         path.points[layer] = cluster.position
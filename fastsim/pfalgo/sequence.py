@@ -8,8 +8,9 @@ from pfreconstructor import PFReconstructor
 
 class PFSequence(object):
     
-    def __init__(self, simptcs, detector, logger):
+    def __init__(self, simptcs, detector, logger, trace_blocks=False):
         self.logger = logger
+        self.trace_blocks = trace_blocks
         self.recptcs = self.reconstruct(simptcs, detector)
 
     def reconstruct(self, simptcs, detector):
@@ -18,7 +19,8 @@ class PFSequence(object):
         elements = merge_clusters(elements, 'hcal_in')
         elements = merge_clusters(elements, 'ecal_in')
         self.links = Links(elements, distance)
-        self.pfreco = PFReconstructor( self.links, detector, self.logger)
+        self.pfreco = PFReconstructor( self.links, detector, self.logger,
+                                      self.trace_blocks )
         # print self.pfreco
 
 
@@ -0,0 +1,111 @@
+import unittest
+import logging
+import pfreconstructor
+from pfreconstructor import PFReconstructor
+from heppy_fcc.fastsim.pfobjects import Cluster, Track
+from heppy_fcc.fastsim.path import StraightLine
+from ROOT import TVector3, TLorentzVector
+
+class Links(object):
+    def __init__(self, groups):
+        self.groups = groups
+        self.elements = [elem for group in groups.values() for elem in group]
+
+class Logger(object):
+    '''Logger recording the formatted messages.'''
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.messages = []
+    def isEnabledFor(self, level):
+        return self.enabled
+    def info(self, msg, *args):
+        self.messages.append(msg % args)
+
+def track(px, py, pz):
+    p4 = TLorentzVector()
+    p4.SetXYZM(px, py, pz, 0.13957)
+    return Track(p4.Vect(), 1, StraightLine(p4, TVector3()))
+
+def elements():
+    return [ track(1., 2., 3.),
+             Cluster(10., TVector3(1., 0., 0.), 0.04, 'ecal_in'),
+             Cluster(20., TVector3(0., 1., 1.), 0.1, 'hcal_in'),
+             # below the K0L mass
+             Cluster(0.3, TVector3(1., 1., 0.), 0.1, 'hcal_in') ]
+
+class TestPFReconstructor(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level='ERROR')
+        self.logger = logging.getLogger('TestPFReconstructor')
+        self.reconstructor = PFReconstructor(Links({}), None, self.logger)
+
+    def reference(self, elem):
+        '''single-element reconstruction, one element at a time'''
+        if elem.layer == 'tracker':
+            particle = self.reconstructor.reconstruct_track(elem)
+        else:
+            particle = self.reconstructor.reconstruct_cluster(elem, elem.layer)
+        return [particle] if particle is not None else []
+
+    def assertSameParticles(self, particles, ref_particles):
+        self.assertEqual( len(particles), len(ref_particles) )
+        for particle, ref in zip(particles, ref_particles):
+            self.assertEqual( particle.pdgid(), ref.pdgid() )
+            self.assertEqual( particle.q(), ref.q() )
+            for i in range(4):
+                self.assertAlmostEqual( particle.p4()[i], ref.p4()[i] )
+
+    def test_singles(self):
+        elems = elements()
+        singles = [ (3-i, elem) for i, elem in enumerate(elems) ]
+        group_particles = self.reconstructor.reconstruct_singles(singles)
+        self.assertEqual( sorted(group_particles), [0, 1, 2, 3] )
+        for group_id, elem in singles:
+            self.assertTrue( elem.locked )
+            ref_particles = self.reference(elem)
+            self.assertSameParticles( group_particles[group_id], ref_particles )
+            self.assertSameParticles(
+                self.reconstructor.reconstruct_group([elem]), ref_particles )
+        self.assertEqual( group_particles[0], [] )
+
+    def test_group_order(self):
+        elems = elements()
+        groups = dict( (group_id, [elem]) for group_id, elem in
+                       zip([2, 0, 1, 3], elems) )
+        reconstructor = PFReconstructor(Links(groups), None, self.logger)
+        self.assertEqual( [ptc.pdgid() for ptc in reconstructor.particles],
+                          [22, 130, 211] )
+        self.assertEqual( reconstructor.unused, [] )
+
+    def test_block_trace(self):
+        groups = dict( enumerate([elem] for elem in elements()) )
+        reconstructor = PFReconstructor(Links(groups), None, self.logger)
+        self.assertIsNone( reconstructor.block_trace )
+        groups = dict( enumerate([elem] for elem in elements()) )
+        reconstructor = PFReconstructor(Links(groups), None, self.logger,
+                                        trace_blocks=True)
+        trace = reconstructor.block_trace
+        self.assertEqual( [block['group_id'] for block in trace], [0, 1, 2, 3] )
+        self.assertEqual( [block['elements'] for block in trace],
+                          [groups[i] for i in range(4)] )
+        self.assertEqual( [len(block['particles']) for block in trace],
+                          [1, 1, 1, 0] )
+
+    def test_trace_disabled(self):
+        def messages(enabled):
+            logger = Logger(enabled)
+            groups = dict( enumerate([elem] for elem in elements()) )
+            PFReconstructor(Links(groups), None, logger)
+            return logger.messages
+        self.assertEqual( messages(False), [] )
+        self.assertTrue( len(messages(True)) > 0 )
+        pfreconstructor.TRACE = False
+        try:
+            self.assertEqual( messages(True), [] )
+        finally:
+            pfreconstructor.TRACE = True
+
+
+if __name__ == '__main__':
+    unittest.main()
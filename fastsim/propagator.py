@@ -1,8 +1,9 @@
 from vectors import Point
 import math
 import copy
+import numpy as np
 from ROOT import TVector3
-from geotools import circle_intersection
+from geotools import circle_intersection, circle_intersections
 from path import Helix, StraightLine
 
 class Info(object):
@@ -51,18 +52,55 @@ class StraightLinePropagator(Propagator):
 
         
 class HelixPropagator(Propagator):
-    
+
+    def propagate(self, particles, cylinders, field):
+        '''Propagate all particles to all cylinders.
+
+        The helix of each particle is built once, and the intersections
+        with each cylinder are computed for all particles in one call.
+        '''
+        helices = []
+        for ptc in particles:
+            helix = Helix(field, ptc.q(), ptc.p4(), ptc.vertex)
+            ptc.set_path(helix)
+            helices.append(helix)
+        if not helices:
+            return
+        xcenters = np.array([helix.center_xy.X() for helix in helices])
+        ycenters = np.array([helix.center_xy.Y() for helix in helices])
+        rhos = np.array([helix.rho for helix in helices])
+        extremes = np.array([helix.extreme_point_xy.Mag() for helix in helices])
+        for cyl in cylinders:
+            xm, ym, xp, yp, valid = circle_intersections(xcenters, ycenters,
+                                                         rhos, cyl.rad)
+            is_looper = (extremes < cyl.rad) | ~valid
+            for i, ptc in enumerate(particles):
+                intersections = None
+                if not is_looper[i]:
+                    intersections = xm[i], ym[i], xp[i], yp[i]
+                self.propagate_helix(ptc, helices[i], cyl, intersections)
+
     def propagate_one(self, particle, cylinder, field, debug_info=None):
         helix = Helix(field, particle.q(), particle.p4(),
                       particle.vertex)
         particle.set_path(helix)
         is_looper = helix.extreme_point_xy.Mag() < cylinder.rad
+        intersections = None
+        if not is_looper:
+            intersections = circle_intersection(helix.center_xy.X(),
+                                                helix.center_xy.Y(),
+                                                helix.rho,
+                                                cylinder.rad)
+        return self.propagate_helix(particle, helix, cylinder, intersections)
+
+    def propagate_helix(self, particle, helix, cylinder, intersections):
+        '''Set the destination point of the particle on the cylinder.
+        intersections is (xm, ym, xp, yp) in the transverse plane,
+        or None for a looper.'''
+        is_looper = intersections is None
         is_positive = particle.p4().Z() > 0.
         if not is_looper:
-            xm, ym, xp, yp = circle_intersection(helix.center_xy.X(),
-                                                 helix.center_xy.Y(),
-                                                 helix.rho,
-                                                 cylinder.rad)
+            xm, ym, xp, yp = intersections
             # particle.points[cylinder.name+'_m'] = Point(xm,ym,0)
             # particle.points[cylinder.name+'_p'] = Point(xp,yp,0)
             phi_m = helix.phi(xm, ym)
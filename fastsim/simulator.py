@@ -22,9 +22,10 @@ def pfsimparticle(ptc):
 
 class Simulator(object):
 
-    def __init__(self, detector, logger=None):
+    def __init__(self, detector, logger=None, trace_blocks=False):
         self.verbose = True
         self.detector = detector
+        self.trace_blocks = trace_blocks
         if logger is None:
             import logging
             logging.basicConfig(level='ERROR')
@@ -32,6 +33,8 @@ class Simulator(object):
         self.logger = logger
         self.prop_helix = HelixPropagator()
         self.prop_straight = StraightLinePropagator()
+        # (id of the particle, cylinder name) already propagated in the event
+        self.propagated = set()
 
     def write_ptcs(self, dbname):
         db = shelve.open(dbname)
@@ -43,6 +46,7 @@ class Simulator(object):
         self.ptcs = None
         Cluster.max_energy = 0.
         SmearedCluster.max_energy = 0.
+        self.propagated = set()
         
     def propagator(self, ptc):
         is_neutral = abs(ptc.q())<0.5
@@ -50,16 +54,42 @@ class Simulator(object):
         
     def propagate(self, ptc):
         '''propagate the particle to all detector cylinders'''
-        self.propagator(ptc).propagate([ptc], self.detector.cylinders(),
+        cylinders = self.detector.cylinders()
+        if all((id(ptc), cyl.name) in self.propagated for cyl in cylinders):
+            return
+        self.propagator(ptc).propagate([ptc], cylinders,
                                        self.detector.elements['field'].magnitude)
 
+    def propagate_one(self, ptc, cylinder):
+        '''propagate the particle to a cylinder, 
+        unless already done by propagate_charged'''
+        if (id(ptc), cylinder.name) in self.propagated:
+            return
+        self.propagator(ptc).propagate_one(ptc, cylinder,
+                                           self.detector.elements['field'].magnitude)
+
+    def propagate_charged(self, ptcs):
+        '''propagate all charged particles of the event at once: 
+        the muons to all detector cylinders, 
+        the other ones to the ecal inner cylinder.'''
+        field = self.detector.elements['field'].magnitude
+        ecal_in = self.detector.elements['ecal'].volume.inner
+        charged = [ptc for ptc in ptcs if abs(ptc.q())>0.5]
+        muons = [ptc for ptc in charged if abs(ptc.pdgid()) == 13]
+        others = [ptc for ptc in charged if abs(ptc.pdgid()) != 13]
+        for selected, cylinders in [(muons, self.detector.cylinders()),
+                                    (others, [ecal_in])]:
+            if not selected:
+                continue
+            self.prop_helix.propagate(selected, cylinders, field)
+            self.propagated.update((id(ptc), cyl.name)
+                                   for ptc in selected for cyl in cylinders)
+
     def make_cluster(self, ptc, detname, fraction=1., size=None):
         '''adds a cluster in a given detector, with a given fraction of 
         the particle energy.'''
         detector = self.detector.elements[detname]
-        self.propagator(ptc).propagate_one(ptc,
-                                           detector.volume.inner,
-                                           self.detector.elements['field'].magnitude )
+        self.propagate_one(ptc, detector.volume.inner)
         if size is None:
             size = detector.cluster_size(ptc)
         cylname = detector.volume.inner.name
@@ -115,9 +145,7 @@ class Simulator(object):
 
     def simulate_electron(self, ptc):
         ecal = self.detector.elements['ecal']
-        self.prop_helix.propagate_one(ptc,
-                                      ecal.volume.inner,
-                                      self.detector.elements['field'].magnitude )
+        self.propagate_one(ptc, ecal.volume.inner)
         cluster = self.make_cluster(ptc, 'ecal')
         smeared_cluster = self.smear_cluster(cluster, ecal)
         if smeared_cluster: 
@@ -138,9 +166,7 @@ class Simulator(object):
         ecal = self.detector.elements['ecal']
         hcal = self.detector.elements['hcal']        
         frac_ecal = 0.
-        self.propagator(ptc).propagate_one(ptc,
-                                           ecal.volume.inner,
-                                           self.detector.elements['field'].magnitude)
+        self.propagate_one(ptc, ecal.volume.inner)
         path_length = ecal.material.path_length(ptc)
         if path_length<sys.float_info.max:
             # ecal path length can be infinite in case the ecal
@@ -183,9 +209,7 @@ class Simulator(object):
 
     def smear_electron(self, ptc):
         ecal = self.detector.elements['ecal']
-        self.prop_helix.propagate_one(ptc,
-                                      ecal.volume.inner,
-                                      self.detector.elements['field'].magnitude )
+        self.propagate_one(ptc, ecal.volume.inner)
         smeared = copy.deepcopy(ptc)
         return smeared
     
@@ -193,8 +217,15 @@ class Simulator(object):
         self.reset()
         self.ptcs = []
         smeared = []
+        simptcs = []
         for gen_ptc in ptcs:
             ptc = pfsimparticle(gen_ptc)
+            if abs(ptc.pdgid()) > 100 and ptc.q() and ptc.pt()<0.2:
+                # to avoid numerical problems in propagation
+                continue
+            simptcs.append(ptc)
+        self.propagate_charged(simptcs)
+        for ptc in simptcs:
             if ptc.pdgid() == 22:
                 self.simulate_photon(ptc)
             elif abs(ptc.pdgid()) == 11:
@@ -208,12 +239,10 @@ class Simulator(object):
             elif abs(ptc.pdgid()) in [12,14,16]:
                 self.simulate_neutrino(ptc)
             elif abs(ptc.pdgid()) > 100: #TODO make sure this is ok
-                if ptc.q() and ptc.pt()<0.2:
-                    # to avoid numerical problems in propagation
-                    continue
                 self.simulate_hadron(ptc)
             self.ptcs.append(ptc)
-        self.pfsequence = PFSequence(self.ptcs, self.detector, self.logger)
+        self.pfsequence = PFSequence(self.ptcs, self.detector, self.logger,
+                                     self.trace_blocks)
         self.particles = copy.copy(self.pfsequence.pfreco.particles)
         self.particles.extend(smeared)
         
@@ -0,0 +1,39 @@
+import unittest
+import math
+import numpy as np
+from geotools import circle_intersection, circle_intersections
+
+class TestCircleIntersections(unittest.TestCase):
+
+    def test_scalar_consistency(self):
+        x1s = [0.5, -1.2, 0., 1.5, 0.3]
+        y1s = [1.8, 0.7, 1.8, 0., -2.1]
+        r1s = [1., 1.1, 1., 1., 0.9]
+        r2 = 2.
+        results = circle_intersections(x1s, y1s, r1s, r2)
+        self.assertTrue( results[4].all() )
+        for i in range(len(x1s)):
+            expected = circle_intersection(x1s[i], y1s[i], r1s[i], r2)
+            for val, exp in zip(results[:4], expected):
+                self.assertAlmostEqual( val[i], exp )
+
+    def test_no_solution(self):
+        # circle inside, outside, and concentric
+        xm, ym, xp, yp, valid = circle_intersections([0.1, 5., 0.],
+                                                     [0., 0., 0.],
+                                                     [0.5, 1., 1.], 2.)
+        self.assertFalse( valid.any() )
+        self.assertTrue( np.isnan(xm).all() )
+
+    def test_tangent(self):
+        xm, ym, xp, yp, valid = circle_intersections([0., 1.5], [1., 0.],
+                                                     [1., 0.5], 2.)
+        self.assertTrue( valid.all() )
+        self.assertAlmostEqual( xm[0], 0. )
+        self.assertAlmostEqual( ym[0], 2. )
+        self.assertAlmostEqual( xp[1], 2. )
+        self.assertAlmostEqual( yp[1], 0. )
+        
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+import numpy as np
+from ROOT import TLorentzVector, TVector3
+from path import Helix, StraightLine
+
+class TestPath(unittest.TestCase):
+
+    def test_points_at_times(self):
+        p4 = TLorentzVector()
+        p4.SetPtEtaPhiM(1, 0.5, 0.3, 0.14)
+        origin = TVector3(0.1, -0.2, 0.3)
+        for path in [Helix(3.8, -1, p4, origin), StraightLine(p4, origin)]:
+            times = np.linspace(0, 1e-8, 7)
+            points = path.points_at_times(times)
+            self.assertEqual( points.shape, (7, 3) )
+            for time, point in zip(times, points):
+                ref = path.point_at_time(time)
+                self.assertAlmostEqual( point[0], ref.X() )
+                self.assertAlmostEqual( point[1], ref.Y() )
+                self.assertAlmostEqual( point[2], ref.Z() )
+
+    def test_npoints(self):
+        p4 = TLorentzVector()
+        p4.SetPtEtaPhiM(1, 0., 0., 0.14)
+        helix = Helix(3.8, 1, p4, TVector3())
+        # one full turn
+        period = 2 * np.pi / abs(helix.omega)
+        self.assertEqual( helix.npoints(period), 51 )
+        self.assertEqual( helix.npoints(period/100.), 10 )
+        self.assertEqual( helix.npoints(period*100.), 200 )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import math
+from simulator import Simulator, pfsimparticle
+from detectors.CMS import cms
+from toyevents import particle
+
+class TestSimulator(unittest.TestCase):
+
+    def test_propagate_charged(self):
+        simulator = Simulator(cms)
+        calls = []
+        propagate = simulator.prop_helix.propagate
+        def counting_propagate(particles, cylinders, field):
+            calls.append(len(particles))
+            return propagate(particles, cylinders, field)
+        simulator.prop_helix.propagate = counting_propagate
+        ptcs = [pfsimparticle(particle(pdgid, math.pi/2. + 0.1*i, 0.5*i, 10.))
+                for i, pdgid in enumerate([211, -211, 11, 130, 22, 13])]
+        simulator.propagate_charged(ptcs)
+        # muons, then the other charged particles
+        self.assertEqual( calls, [1, 3] )
+        ecal_in = cms.elements['ecal'].volume.inner
+        field = cms.elements['field'].magnitude
+        for ptc in ptcs[:3]:
+            batch_point = ptc.points[ecal_in.name]
+            simulator.prop_helix.propagate_one(ptc, ecal_in, field)
+            self.assertAlmostEqual( (batch_point - ptc.points[ecal_in.name]).Mag(),
+                                    0., places=5 )
+        self.assertTrue( 'hcal_in' in ptcs[-1].points )
+        self.assertFalse( ecal_in.name in ptcs[3].points )
+        # already propagated: no new call
+        simulator.make_cluster(ptcs[0], 'ecal')
+        self.assertEqual( calls, [1, 3] )
+        simulator.reset()
+        self.assertEqual( len(simulator.propagated), 0 )
+
+    def test_trace_blocks(self):
+        ptcs = [particle(211, math.pi/2., 0., 10.),
+                particle(22, math.pi/2., math.pi/2., 10.)]
+        simulator = Simulator(cms)
+        simulator.simulate(ptcs)
+        self.assertIsNone( simulator.pfsequence.pfreco.block_trace )
+        simulator = Simulator(cms, trace_blocks=True)
+        simulator.simulate(ptcs)
+        trace = simulator.pfsequence.pfreco.block_trace
+        self.assertTrue( len(trace) > 0 )
+        self.assertEqual( sum(len(block['particles']) for block in trace),
+                          len(simulator.pfsequence.pfreco.particles) )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import math
+import numpy as np
+from ROOT import TLorentzVector, TVector3
+from toyevents import p4_array, boost_array, particles_batch, monojets_batch
+from pdt import particle_data
+
+class TestToyEvents(unittest.TestCase):
+
+    def test_p4_array(self):
+        p4 = p4_array(np.array([10., 5.]), np.array([11., 6.]),
+                      np.array([math.pi/2, 0.3]), np.array([0., -1.]))
+        self.assertEqual( p4.shape, (2, 4) )
+        self.assertTrue( np.allclose(p4[0], [10., 0., 0., 11.]) )
+        tlv = TLorentzVector(*p4[1])
+        self.assertAlmostEqual( tlv.Theta(), 0.3 )
+        self.assertAlmostEqual( tlv.Phi(), -1. )
+        self.assertAlmostEqual( tlv.P(), 5. )
+
+    def test_boost_array(self):
+        p4s = np.array([[1., 2., 3., 10.],
+                        [-5., 0.5, 0., 5.2],
+                        [0., 0., 0., 0.14]])
+        betas = np.array([[0.1, 0.2, 0.3],
+                          [-0.9, 0., 0.],
+                          [0., 0., 0.]])
+        boosted = boost_array(p4s, betas)
+        for p4, beta, result in zip(p4s, betas, boosted):
+            tlv = TLorentzVector(*p4)
+            tlv.Boost(TVector3(*beta))
+            for i in range(4):
+                self.assertAlmostEqual( result[i], tlv[i] )
+
+    def test_particles_batch(self):
+        batch = particles_batch(50, 3, 211, 0.5, 2.5, 10., 20.,
+                                vertex=(0.1, 0., -0.2))
+        mass = particle_data[211][0]
+        p4 = batch.p4
+        self.assertEqual( p4.shape, (50, 3, 4) )
+        m2 = p4[..., 3]**2 - np.sum(p4[..., :3]**2, axis=-1)
+        self.assertTrue( np.allclose(m2, mass**2, atol=1e-6) )
+        theta = np.arctan2(np.hypot(p4[..., 0], p4[..., 1]), p4[..., 2])
+        self.assertTrue( ((theta >= 0.5) & (theta <= 2.5)).all() )
+        self.assertTrue( ((p4[..., 3] >= 10.) & (p4[..., 3] <= 20.)).all() )
+        self.assertTrue( np.allclose(batch.vertex, [0.1, 0., -0.2]) )
+        ptc = batch.event(0)[0]
+        self.assertEqual( ptc.pdgid(), 211 )
+        self.assertAlmostEqual( ptc.vertex.X(), 0.1 )
+
+    def test_monojets_batch(self):
+        pdgids = [211, -211, 22, 130]
+        theta, phi = 1., 0.5
+        batch = monojets_batch(20, pdgids, theta, phi, 1., 50.)
+        p4 = batch.p4
+        masses = np.array([particle_data[pdgid][0] for pdgid in pdgids])
+        m2 = p4[..., 3]**2 - np.sum(p4[..., :3]**2, axis=-1)
+        self.assertTrue( np.allclose(m2, masses**2, atol=1e-6) )
+        self.assertTrue( np.allclose(batch.vertex, 0.) )
+        jets = p4.sum(axis=1)
+        self.assertTrue( np.allclose(jets[:, 3], 50.) )
+        for jet in jets:
+            tlv = TLorentzVector(*jet)
+            self.assertAlmostEqual( tlv.Theta(), theta )
+            self.assertAlmostEqual( tlv.Phi(), phi )
+
+
+if __name__ == '__main__':
+    unittest.main()
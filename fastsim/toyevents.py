@@ -3,6 +3,7 @@ import random
 from vectors import *
 from ROOT import TLorentzVector
 import math
+import numpy as np
 
 from pfobjects import Particle
 from pdt import particle_data
@@ -92,6 +93,127 @@ def monojet(pdgids, theta, phi, pstar, jetenergy, vertex=None):
                                            ptc.pdgid()) )
     # print jetp4.M(), jetp4.E()
     return boosted_particles
+
+
+class ParticleBatch(object):
+    '''Kinematics of nevents x nptcs particles stored in numpy arrays.
+
+    attributes:
+    - pdgid  : (nevents, nptcs) array of pdg IDs
+    - charge : (nevents, nptcs) array of charges
+    - p4     : (nevents, nptcs, 4) array of px, py, pz, E
+    - vertex : (nevents, nptcs, 3) array of x, y, z
+    '''
+
+    def __init__(self, pdgid, charge, p4, vertex=None):
+        self.pdgid = pdgid
+        self.charge = charge
+        self.p4 = p4
+        if vertex is None:
+            vertex = np.zeros(p4.shape[:-1] + (3,))
+        self.vertex = vertex
+
+    def __len__(self):
+        return self.p4.shape[0]
+
+    def event(self, i):
+        '''Returns the particles of event i as a list of pfobjects.Particle.'''
+        ptcs = []
+        for pdgid, charge, p4, vertex in zip(self.pdgid[i], self.charge[i],
+                                             self.p4[i], self.vertex[i]):
+            ptcs.append( Particle(LorentzVector(*p4),
+                                  Point(*vertex),
+                                  int(charge), int(pdgid)) )
+        return ptcs
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.event(i)
+
+
+def p4_array(momentum, energy, theta, phi):
+    '''Returns an (..., 4) array of px, py, pz, E.'''
+    sintheta = np.sin(theta)
+    return np.stack([momentum*sintheta*np.cos(phi),
+                     momentum*sintheta*np.sin(phi),
+                     momentum*np.cos(theta),
+                     energy], axis=-1)
+
+
+def boost_array(p4, beta):
+    '''Boosts an (..., 4) array of p4s by an (..., 3) array of
+    velocities, as TLorentzVector.Boost.'''
+    p3 = p4[..., :3]
+    energy = p4[..., 3]
+    beta2 = np.sum(beta**2, axis=-1)
+    gamma = 1. / np.sqrt(1. - beta2)
+    bp = np.sum(beta * p3, axis=-1)
+    gamma2 = np.where(beta2 > 0., (gamma - 1.) / np.where(beta2 > 0., beta2, 1.), 0.)
+    boosted = np.empty_like(p4)
+    boosted[..., :3] = p3 + ((gamma2 * bp + gamma * energy)[..., np.newaxis]) * beta
+    boosted[..., 3] = gamma * (energy + bp)
+    return boosted
+
+
+def vertex_array(vertex, shape):
+    '''Returns the (shape, 3) array of the vertex, a Point or
+    a sequence x, y, z, repeated for all particles.
+    None stands for the origin.'''
+    if vertex is None:
+        return np.zeros(shape + (3,))
+    if hasattr(vertex, 'X'):
+        vertex = (vertex.X(), vertex.Y(), vertex.Z())
+    return np.broadcast_to(np.asarray(vertex, dtype=float), shape + (3,)).copy()
+
+
+def particles_batch(nevents, nptcs, pdgid, thetamin, thetamax, emin, emax,
+                    vertex=None):
+    '''Generates nevents x nptcs particles as in particles,
+    in a ParticleBatch.'''
+    mass, charge = particle_data[pdgid]
+    shape = (nevents, nptcs)
+    theta = np.random.uniform(thetamin, thetamax, shape)
+    phi = np.random.uniform(-math.pi, math.pi, shape)
+    energy = np.random.uniform(emin, emax, shape)
+    momentum = np.sqrt(energy**2 - mass**2)
+    p4 = p4_array(momentum, energy, theta, phi)
+    return ParticleBatch(np.full(shape, pdgid, dtype=int),
+                         np.full(shape, charge, dtype=int),
+                         p4, vertex_array(vertex, shape))
+
+
+def monojets_batch(nevents, pdgids, theta, phi, pstar, jetenergy,
+                   vertex=None):
+    '''Generates nevents monojets as in monojet, in a ParticleBatch.
+    The particles of each jet are generated and boosted to the lab
+    frame for all events at once.'''
+    nptcs = len(pdgids)
+    masses = np.array([particle_data[pdgid][0] for pdgid in pdgids])
+    charges = np.array([particle_data[pdgid][1] for pdgid in pdgids])
+    shape = (nevents, nptcs - 1)
+    phistar = np.random.uniform(-math.pi, math.pi, shape)
+    thetastar = np.random.uniform(-math.pi, math.pi, shape)
+    p3 = np.stack([pstar * np.sin(thetastar) * np.cos(phistar),
+                   pstar * np.sin(thetastar) * np.sin(phistar),
+                   pstar * np.cos(thetastar)], axis=-1)
+    # the last particle balances the momentum of the other ones
+    p3 = np.concatenate([p3, -p3.sum(axis=1, keepdims=True)], axis=1)
+    energy = np.sqrt(np.sum(p3**2, axis=-1) + masses**2)
+    p4star = np.concatenate([p3, energy[..., np.newaxis]], axis=-1)
+    # boosting to lab
+    jetmass = energy.sum(axis=1)
+    gamma = jetenergy / jetmass
+    beta = np.sqrt(1 - 1/gamma**2)
+    direction = np.array([math.sin(theta)*math.cos(phi),
+                          math.sin(theta)*math.sin(phi),
+                          math.cos(theta)])
+    boostvec = beta[:, np.newaxis, np.newaxis] * direction
+    p4 = boost_array(p4star, boostvec)
+    shape = (nevents, nptcs)
+    return ParticleBatch(np.broadcast_to(pdgids, shape).copy(),
+                         np.broadcast_to(charges, shape).copy(),
+                         p4, vertex_array(vertex, shape))
+
         
 if __name__ == '__main__':
 
@@ -0,0 +1,223 @@
+'''Columnar tools for the macros: the branches needed by a set of plots
+are read once into numpy arrays, and the histograms are computed
+from these arrays.'''
+
+import numpy as np
+import os
+
+try:
+    from root_numpy import tree2array
+except ImportError:
+    tree2array = None
+
+
+def read_branches(tree, names, selection=''):
+    '''Returns a dictionary name:array with the values of the branches
+    (or TTree formulas) names, for the entries passing selection.'''
+    names = list(names)
+    if tree2array is not None and \
+       all(tree.GetBranch(name) for name in names):
+        array = tree2array(tree, branches=names,
+                           selection=selection if selection else None)
+        return dict((name, np.asarray(array[name], dtype=float))
+                    for name in names)
+    arrays = dict()
+    tree.SetEstimate(tree.GetEntries() + 1)
+    # TTree.Draw evaluates at most 4 expressions at a time
+    for start in range(0, len(names), 4):
+        group = names[start:start+4]
+        nentries = tree.Draw(':'.join(group), selection, 'goff')
+        getters = [tree.GetV1, tree.GetV2, tree.GetV3, tree.GetV4]
+        for name, getter in zip(group, getters):
+            buf = getter()
+            if nentries > 0:
+                buf.SetSize(nentries)
+                arrays[name] = np.array(buf, dtype=float, copy=True)
+            else:
+                arrays[name] = np.zeros(0)
+    return arrays
+
+
+def tree_files(tree):
+    '''Returns the names of the files of a tree or chain'''
+    if hasattr(tree, 'GetListOfFiles'):
+        return [elem.GetTitle() for elem in tree.GetListOfFiles()]
+    rootfile = tree.GetCurrentFile()
+    return [rootfile.GetName()] if rootfile else []
+
+
+def cached_read_branches(tree, names, cachefile, selection=''):
+    '''Same as read_branches, with the arrays cached in the numpy
+    file cachefile. The cache is used if it was made with the same
+    selection, from the same files of the tree, unchanged since then,
+    and if it contains all names. Otherwise, the tree is read again
+    and the cache is rewritten.'''
+    names = list(names)
+    if not cachefile.endswith('.npz'):
+        cachefile += '.npz'
+    files = tree_files(tree)
+    signature = repr( (selection,
+                       [(fname, os.path.getmtime(fname)) for fname in files
+                        if os.path.isfile(fname)]) )
+    if os.path.isfile(cachefile):
+        cache = np.load(cachefile)
+        try:
+            cached_names = list(cache['names'])
+            if str(cache['signature']) == signature and \
+               all(name in cached_names for name in names):
+                return dict(
+                    (name, cache['array_{i}'.format(i=cached_names.index(name))])
+                    for name in names
+                )
+        finally:
+            cache.close()
+    arrays = read_branches(tree, names, selection)
+    # branch names are not valid keys in a npz file
+    stored = dict(('array_{i}'.format(i=i), arrays[name])
+                  for i, name in enumerate(names))
+    np.savez(cachefile, names=np.array(names), signature=np.array(signature),
+             **stored)
+    return arrays
+
+
+def bin_indices(x, nbins, xmin, xmax):
+    '''Returns the index of the bin of each value in a histogram
+    with nbins bins between xmin and xmax, -1 for the values outside.'''
+    x = np.asarray(x, dtype=float)
+    with np.errstate(invalid='ignore'):
+        index = np.floor((x - xmin) / (xmax - xmin) * nbins)
+        inside = (x >= xmin) & (x < xmax)
+    index = np.where(inside, index, -1).astype(int)
+    # rounding at the upper edge
+    index[index >= nbins] = nbins - 1
+    return index
+
+
+def histogram_counts(index, nbins, masks, weights=None):
+    '''Returns the (nmasks, nbins) array of the sums of weights
+    in each bin for each boolean mask.
+    The bin indices are computed once and shared by all masks.'''
+    inside = index >= 0
+    counts = np.zeros((len(masks), nbins))
+    for imask, mask in enumerate(masks):
+        selected = inside & mask
+        w = None if weights is None else weights[selected]
+        counts[imask] = np.bincount(index[selected], weights=w,
+                                    minlength=nbins)[:nbins]
+    return counts
+
+
+def binomial_efficiency(num, denom):
+    '''Returns the efficiency num/denom and its binomial error,
+    0 where denom is 0, as TH1.Divide with the B option.'''
+    num = np.asarray(num, dtype=float)
+    denom = np.asarray(denom, dtype=float)
+    eff = np.zeros(np.broadcast(num, denom).shape)
+    err = np.zeros_like(eff)
+    filled = denom > 0
+    eff[filled] = num[filled] / denom[filled]
+    err[filled] = np.sqrt(eff[filled] * (1 - eff[filled]) / denom[filled])
+    return eff, err
+
+
+def efficiencies(x, cuts, numcut, nbins, xmin, xmax):
+    '''Efficiencies of numcut as a function of x for several selections.
+
+    x      : array of values
+    cuts   : list of boolean arrays, the selections of the denominators
+    numcut : boolean array, the additional selection of the numerators
+
+    Returns the arrays num, denom, eff, err, of shape (len(cuts), nbins).
+    '''
+    index = bin_indices(x, nbins, xmin, xmax)
+    numcut = np.asarray(numcut, dtype=bool)
+    cuts = [np.asarray(cut, dtype=bool) for cut in cuts]
+    masks = cuts + [cut & numcut for cut in cuts]
+    counts = histogram_counts(index, nbins, masks)
+    denom, num = counts[:len(cuts)], counts[len(cuts):]
+    eff, err = binomial_efficiency(num, denom)
+    return num, denom, eff, err
+
+
+def slice_quantiles(index, y, nbins, quantiles):
+    '''Returns the (nbins, nquantiles) array of the quantiles of y
+    in each bin, with linear interpolation, and the number of entries
+    per bin. The quantiles are nan for the empty bins.'''
+    inside = index >= 0
+    index, y = index[inside], np.asarray(y, dtype=float)[inside]
+    order = np.lexsort((y, index))
+    index, y = index[order], y[order]
+    counts = np.bincount(index, minlength=nbins)[:nbins]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full((nbins, len(quantiles)), np.nan)
+    filled = counts > 0
+    for iq, q in enumerate(quantiles):
+        pos = starts[filled] + q * (counts[filled] - 1)
+        low = np.floor(pos).astype(int)
+        high = np.minimum(low + 1, starts[filled] + counts[filled] - 1)
+        frac = pos - low
+        result[filled, iq] = y[low] * (1 - frac) + y[high] * frac
+    return result, counts
+
+
+# gaussian sigma from the interquartile range
+IQR_TO_SIGMA = 1. / 1.3489795
+# asymptotic standard errors, in units of sigma/sqrt(n), for gaussian data
+MEDIAN_ERROR = 1.2533141
+IQR_SIGMA_ERROR = 1.1664
+
+def robust_resolution(x, y, nbins, xmin, xmax, nentries_min=20):
+    '''Scale and resolution of y in each x slice, from robust estimators:
+    the median, and the gaussian sigma corresponding to the interquartile
+    range, which are insensitive to the tails.
+
+    Returns the arrays mean, mean_err, sigma, sigma_err, counts.
+    The slices with less than nentries_min entries are set to nan.
+    '''
+    index = bin_indices(x, nbins, xmin, xmax)
+    quantiles, counts = slice_quantiles(index, y, nbins, [0.25, 0.5, 0.75])
+    q1, median, q3 = quantiles.T
+    sigma = (q3 - q1) * IQR_TO_SIGMA
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sqrtn = np.sqrt(counts)
+        median_err = MEDIAN_ERROR * sigma / sqrtn
+        sigma_err = IQR_SIGMA_ERROR * sigma / sqrtn
+    few = counts < nentries_min
+    for array in [median, median_err, sigma, sigma_err]:
+        array[few] = np.nan
+    return median, median_err, sigma, sigma_err, counts
+
+
+def component_fractions(x, jet_e, component_e, cuts, nbins, xmin, xmax):
+    '''Energy fractions of the jet components, binned in x,
+    for several selections at once.
+
+    x           : array of values
+    jet_e       : array of jet energies
+    component_e : list of arrays of component energies
+    cuts        : list of boolean arrays
+
+    Returns the arrays:
+    - counts, of shape (ncuts, nbins): number of jets per bin
+    - sums, of shape (ncuts, ncomponents, nbins): sum of the fractions
+      of each component per bin, counting only the jets with a positive
+      fraction, as in FractionStack.Project
+    - means: sums divided by counts, 0 for the empty bins
+    '''
+    index = bin_indices(x, nbins, xmin, xmax)
+    jet_e = np.asarray(jet_e, dtype=float)
+    cuts = [np.asarray(cut, dtype=bool) for cut in cuts]
+    counts = histogram_counts(index, nbins, cuts)
+    sums = np.zeros((len(cuts), len(component_e), nbins))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for icomp, comp_e in enumerate(component_e):
+            # jets with no energy have no fraction
+            frac = np.where(jet_e > 0,
+                            np.asarray(comp_e, dtype=float) / jet_e, 0.)
+            positive = frac > 0
+            sums[:, icomp] = histogram_counts(index, nbins,
+                                              [cut & positive for cut in cuts],
+                                              weights=frac)
+        means = np.where(counts[:, np.newaxis] > 0,
+                         sums / counts[:, np.newaxis], 0.)
+    return counts, sums, means
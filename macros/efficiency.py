@@ -1,4 +1,7 @@
 from cpyroot import *
+from heppy_fcc.macros.arrays import read_branches, efficiencies
+
+import numpy as np
 
 class Efficiency(object):
 
@@ -15,6 +18,17 @@ class Efficiency(object):
     def project(self, var, cut, numcut, nbins, xmin, xmax):
         if cut == '':
             cut = '1'
+        self.book(var, nbins, xmin, xmax)
+        print 'denom: var = ', var, ' cut = ', cut
+        self.tree.Project(self.denom.GetName(), var, cut)
+        numcut = '({cut}) && ({numcut})'.format(cut=cut,
+                                                numcut=numcut)
+        print 'num: var = ', var, ' cut = ', numcut
+        self.tree.Project(self.num.GetName(), var, numcut)
+        self.eff.Divide(self.num, self.denom, 1, 1, 'B')
+        self.eff.GetYaxis().SetRangeUser(0,1)
+
+    def book(self, var, nbins, xmin, xmax):
         if self.num is None: 
             self.num = TH1F( self.hname('num'), self.name, nbins, xmin, xmax)
         else:
@@ -38,13 +52,82 @@ class Efficiency(object):
             h.SetTitle(self.name)
             h.GetXaxis().SetTitle(var)
             h.GetYaxis().SetTitle('efficiency')
-        
-        print 'denom: var = ', var, ' cut = ', cut
-        self.tree.Project(self.denom.GetName(), var, cut)
-        numcut = '({cut}) && ({numcut})'.format(cut=cut,
-                                                numcut=numcut)
-        print 'num: var = ', var, ' cut = ', numcut
-        self.tree.Project(self.num.GetName(), var, numcut)
-        self.eff.Divide(self.num, self.denom, 1, 1, 'B')
+
+
+def set_bins(hist, contents, errors=None):
+    '''Sets the bin contents and errors of hist from arrays'''
+    for ibin, content in enumerate(contents):
+        hist.SetBinContent(ibin+1, content)
+        if errors is not None:
+            hist.SetBinError(ibin+1, errors[ibin])
+
+
+def selection(arrays, cut):
+    '''Boolean array from cut, which can be None (all entries),
+    a boolean array, or a function of the dictionary of arrays.'''
+    nentries = len(arrays.values()[0]) if arrays else 0
+    if cut is None:
+        return np.ones(nentries, dtype=bool)
+    if callable(cut):
+        cut = cut(arrays)
+    return np.asarray(cut, dtype=bool)
+
+
+class ArrayEfficiency(Efficiency):
+    '''Efficiency computed from arrays instead of a tree.
+
+    arrays is a dictionary name:array, e.g. from read_branches.
+    The cuts are boolean arrays, or functions of the arrays, e.g.
+
+      arrays = read_branches(tree, ['ptc_pt', 'ptc_eta', ...])
+      found = lambda a: (a['ptc_match_pt']>0.) & (a['ptc_match_pdgid']==a['ptc_pdgid'])
+      pt_eff = ArrayEfficiency('pt', arrays)
+      pt_eff.project('ptc_pt', lambda a: np.abs(a['ptc_eta'])<1.4, found, 100, 0, 20)
+
+    See also array_efficiencies, to compute the efficiencies of several
+    selections at once.
+    '''
+
+    def __init__(self, name, arrays):
+        super(ArrayEfficiency, self).__init__(name, None)
+        self.arrays = arrays
+
+    def project(self, var, cut, numcut, nbins, xmin, xmax):
+        num, denom, eff, err = efficiencies(
+            self.arrays[var],
+            [selection(self.arrays, cut)],
+            selection(self.arrays, numcut),
+            nbins, xmin, xmax
+        )
+        self.set_counts(var, num[0], denom[0], eff[0], err[0],
+                        nbins, xmin, xmax)
+
+    def set_counts(self, var, num, denom, eff, err, nbins, xmin, xmax):
+        self.book(var, nbins, xmin, xmax)
+        set_bins(self.num, num, np.sqrt(num))
+        set_bins(self.denom, denom, np.sqrt(denom))
+        set_bins(self.eff, eff, err)
+        for hist in [self.num, self.denom]:
+            hist.SetEntries(hist.Integral())
         self.eff.GetYaxis().SetRangeUser(0,1)
 
+
+def array_efficiencies(name, arrays, var, cuts, numcut, nbins, xmin, xmax):
+    '''Computes in one pass the efficiencies of numcut
+    for each selection in cuts, a dictionary label:cut.
+    Returns a dictionary label:ArrayEfficiency.'''
+    labels = sorted(cuts.keys())
+    num, denom, eff, err = efficiencies(
+        arrays[var],
+        [selection(arrays, cuts[label]) for label in labels],
+        selection(arrays, numcut),
+        nbins, xmin, xmax
+    )
+    result = dict()
+    for ilabel, label in enumerate(labels):
+        aeff = ArrayEfficiency('_'.join([name, label]), arrays)
+        aeff.set_counts(var, num[ilabel], denom[ilabel],
+                        eff[ilabel], err[ilabel], nbins, xmin, xmax)
+        result[label] = aeff
+    return result
+
@@ -1,4 +1,7 @@
 from cpyroot import * 
+from heppy_fcc.macros.arrays import cached_read_branches, read_branches, \
+    component_fractions
+from heppy_fcc.macros.efficiency import selection
 
 class FractionStack(object):
 
@@ -43,6 +46,20 @@ class FractionStack(object):
             #     same = 'same'
         self.Draw()
 
+    def fill(self, counts, sums):
+        '''Fills the histograms from the arrays of component_fractions,
+        for one selection.'''
+        self.histsum.Reset()
+        for ibin, count in enumerate(counts):
+            self.histsum.SetBinContent(ibin+1, count)
+        self.histsum.SetEntries(counts.sum())
+        for pdgid, comp_sums in zip(self.pdgids, sums):
+            hist = self.hists[pdgid]
+            hist.Reset()
+            for ibin, comp_sum in enumerate(comp_sums):
+                hist.SetBinContent(ibin+1, comp_sum)
+        self.Draw()
+
     def Draw(self):
         self.histsum.Draw('hist')
         self.stack.Draw("histsame")
@@ -53,3 +70,59 @@ class FractionStack(object):
         self.histsum.GetYaxis().SetRangeUser(min, max)
         self.Draw()
 
+
+def jet_branches(var, pdgids):
+    '''Names of the branches needed for the fraction stacks of var,
+    e.g. jet1_e / jet1_gen_e.'''
+    jet = var.split('_')[0]
+    return [var, '_'.join([jet, 'e'])] + \
+           ['_'.join([jet, str(pdgid), 'e']) for pdgid in pdgids]
+
+
+def fraction_stacks(tree, pdgids, hist, var, cuts, cachefile=None,
+                    extra_branches=None):
+    '''Builds a FractionStack for each selection in cuts, a dictionary
+    label:cut, reading the tree only once.
+
+    The cuts are boolean arrays or functions of the dictionary of arrays
+    read from the tree, which contains the branches needed for var
+    and extra_branches, e.g.
+
+      cuts = dict(
+        central = lambda a: np.abs(a['jet1_eta'])<1.2,
+        forward = lambda a: np.abs(a['jet1_eta'])>=1.2
+      )
+      stacks = fraction_stacks(tree, [211, 22, 130], TH1F(...),
+                               'jet1_e / jet1_gen_e', cuts,
+                               cachefile='jets.npz',
+                               extra_branches=['jet1_eta'])
+
+    If cachefile is given, the arrays are cached in this file,
+    and later calls read the cache instead of the tree.
+    The histogram hist is cloned for each selection.
+    Returns the dictionary label:FractionStack.
+    '''
+    names = jet_branches(var, pdgids)
+    if extra_branches:
+        names += [name for name in extra_branches if name not in names]
+    if cachefile:
+        arrays = cached_read_branches(tree, names, cachefile)
+    else:
+        arrays = read_branches(tree, names)
+    labels = sorted(cuts.keys())
+    jet_e_name = names[1]
+    counts, sums, means = component_fractions(
+        arrays[var], arrays[jet_e_name],
+        [arrays[name] for name in names[2:2+len(pdgids)]],
+        [selection(arrays, cuts[label]) for label in labels],
+        hist.GetNbinsX(),
+        hist.GetXaxis().GetXmin(), hist.GetXaxis().GetXmax()
+    )
+    stacks = dict()
+    for ilabel, label in enumerate(labels):
+        stack = FractionStack(pdgids,
+                              hist.Clone('_'.join([hist.GetName(), label])))
+        stack.fill(counts[ilabel], sums[ilabel])
+        stack.means = means[ilabel]
+        stacks[label] = stack
+    return stacks
@@ -1,7 +1,10 @@
 from cpyroot import *
 from heppy.statistics.value import Value
+from heppy_fcc.macros.arrays import read_branches, robust_resolution
+from heppy_fcc.macros.efficiency import set_bins, selection
 
 import copy
+import numpy as np
 
 class Resolution(object):
 
@@ -15,7 +18,9 @@ class Resolution(object):
     def hname(self, name):
         return '_'.join([self.name, name])
         
-    def project(self, var, cut, nbins, xmin, xmax, ynbins, ymin, ymax):
+    def book(self, var, nbins, xmin, xmax, ynbins, ymin, ymax):
+        '''Books or resets the 2d histogram for var, y:x.
+        Returns the names of y and x.'''
         if self.h2d is None: 
             self.h2d = TH2F( self.hname('h2d'), self.name,
                              nbins, xmin, xmax,
@@ -26,6 +31,10 @@ class Resolution(object):
         vary, varx = var.split(':')
         self.h2d.GetXaxis().SetTitle(varx)
         self.h2d.GetYaxis().SetTitle(vary)
+        return vary, varx
+
+    def project(self, var, cut, nbins, xmin, xmax, ynbins, ymin, ymax):
+        vary, varx = self.book(var, nbins, xmin, xmax, ynbins, ymin, ymax)
 
         print vary
         print varx
@@ -49,7 +58,8 @@ class Resolution(object):
                        func.GetParError(2))
         return mean, sigma
 
-    def fit(self):
+    def book_fit(self):
+        '''Books the histograms of the scale and resolution vs x'''
         self.hmean = self.h2d.ProjectionX().Clone('hmean')
         self.hmean.Reset()
         self.hmean.SetYTitle('relative scale')
@@ -58,6 +68,15 @@ class Resolution(object):
         self.hsigma.Reset()
         self.hsigma.SetYTitle('relative resolution')
         self.style.formatHisto(self.hsigma)
+
+    def fit(self):
+        self.book_fit()
+        self.fill_fit()
+        self.fit_res()
+
+    def fill_fit(self):
+        '''Fills the scale and resolution histograms from gaussian fits
+        to the y distribution in each x slice'''
         for ibin in range(self.h2d.GetNbinsX()):
             ii = ibin+1
             mean, sigma = self.fit_slice(ii, False)
@@ -66,7 +85,6 @@ class Resolution(object):
                 self.hmean.SetBinError(ii, mean.err)
                 self.hsigma.SetBinContent(ii, sigma.val)
                 self.hsigma.SetBinError(ii, sigma.err)
-        self.fit_res()
                 
     def fit_res(self, draw=True):
         func = TF1(self.hname('res_calo'),
@@ -85,3 +103,48 @@ class Resolution(object):
     def draw_2d(self):
         self.h2d.Draw('colz')
         self.hmean.Draw('same')
+
+
+class ArrayResolution(Resolution):
+    '''Resolution computed from arrays instead of a tree.
+
+    arrays is a dictionary name:array, e.g. from read_branches.
+    In each x slice, the scale and the resolution are estimated
+    by the median and the interquartile range of y, for all slices at once,
+    instead of a gaussian fit per slice.
+
+      arrays = read_branches(tree, ['ptc_match_e/ptc_e', 'ptc_e', ...])
+      res = ArrayResolution('res_e', arrays)
+      res.project('ptc_match_e/ptc_e:ptc_e', None, 20, 0.3, 20, 20, 0., 2)
+    '''
+
+    def __init__(self, name, arrays, style=sBlack):
+        super(ArrayResolution, self).__init__(name, None, style)
+        self.arrays = arrays
+
+    def project(self, var, cut, nbins, xmin, xmax, ynbins, ymin, ymax,
+                nentries_min=20):
+        vary, varx = self.book(var, nbins, xmin, xmax, ynbins, ymin, ymax)
+        selected = selection(self.arrays, cut)
+        x = self.arrays[varx][selected]
+        y = self.arrays[vary][selected]
+        counts, xedges, yedges = np.histogram2d(x, y, bins=[nbins, ynbins],
+                                                range=[[xmin, xmax],
+                                                       [ymin, ymax]])
+        for ix in range(nbins):
+            for iy in range(ynbins):
+                self.h2d.SetBinContent(ix+1, iy+1, counts[ix, iy])
+        self.h2d.SetEntries(counts.sum())
+        self.resolution = robust_resolution(x, y, nbins, xmin, xmax,
+                                            nentries_min)
+        self.fit()
+
+    def fill_fit(self):
+        '''Fills the scale and resolution histograms from the median
+        and interquartile range computed in project'''
+        mean, mean_err, sigma, sigma_err, counts = self.resolution
+        filled = ~np.isnan(mean)
+        set_bins(self.hmean, np.where(filled, mean, 0.),
+                 np.where(filled, mean_err, 0.))
+        set_bins(self.hsigma, np.where(filled, sigma, 0.),
+                 np.where(filled, sigma_err, 0.))
@@ -0,0 +1,153 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from arrays import bin_indices, efficiencies, slice_quantiles, \
+    robust_resolution, component_fractions, cached_read_branches
+
+
+class Buffer(list):
+
+    def SetSize(self, size):
+        pass
+
+
+class File(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def GetTitle(self):
+        return self.name
+
+
+class Tree(object):
+    '''Minimal TChain, reading branches from a dictionary'''
+
+    def __init__(self, fname, branches):
+        self.fname = fname
+        self.branches = branches
+        self.ndraws = 0
+
+    def GetListOfFiles(self):
+        return [File(self.fname)]
+
+    def GetBranch(self, name):
+        return name in self.branches
+
+    def GetEntries(self):
+        return len(self.branches.values()[0])
+
+    def SetEstimate(self, n):
+        pass
+
+    def Draw(self, varexp, selection, option):
+        self.ndraws += 1
+        self.values = [Buffer(self.branches[name])
+                       for name in varexp.split(':')]
+        return self.GetEntries()
+
+    def GetV1(self):
+        return self.values[0]
+
+    def GetV2(self):
+        return self.values[1]
+
+    def GetV3(self):
+        return self.values[2]
+
+    def GetV4(self):
+        return self.values[3]
+
+class TestArrays(unittest.TestCase):
+
+    def test_bin_indices(self):
+        x = np.array([-1., 0., 0.5, 1.99, 2., np.nan])
+        self.assertEqual( list(bin_indices(x, 4, 0., 2.)),
+                          [-1, 0, 1, 3, -1, -1] )
+
+    def test_efficiencies(self):
+        np.random.seed(1)
+        x = np.random.uniform(0, 10, 1000)
+        eta = np.random.uniform(-3, 3, 1000)
+        found = np.random.uniform(0, 1, 1000) < 0.8
+        cuts = [np.abs(eta)<1.4, np.abs(eta)>=1.4]
+        num, denom, eff, err = efficiencies(x, cuts, found, 5, 0, 10)
+        self.assertEqual( eff.shape, (2, 5) )
+        for cut, cut_num, cut_denom in zip(cuts, num, denom):
+            ref_denom, edges = np.histogram(x[cut], 5, (0, 10))
+            ref_num, edges = np.histogram(x[cut & found], 5, (0, 10))
+            self.assertEqual( list(cut_denom), list(ref_denom) )
+            self.assertEqual( list(cut_num), list(ref_num) )
+        self.assertTrue( np.allclose(eff, num/denom) )
+        self.assertTrue( np.allclose(err, np.sqrt(eff*(1-eff)/denom)) )
+
+    def test_quantiles(self):
+        np.random.seed(2)
+        x = np.random.uniform(0, 3, 3000)
+        y = np.random.normal(1, 0.1, 3000)
+        index = bin_indices(x, 3, 0, 3)
+        quantiles, counts = slice_quantiles(index, y, 4, [0.25, 0.5, 0.75])
+        for ibin in range(3):
+            ref = np.percentile(y[index==ibin], [25, 50, 75])
+            self.assertTrue( np.allclose(quantiles[ibin], ref) )
+        self.assertTrue( np.all(np.isnan(quantiles[3])) )
+        self.assertEqual( counts[3], 0 )
+
+    def test_resolution(self):
+        np.random.seed(3)
+        x = np.random.uniform(0, 10, 100000)
+        y = np.random.normal(1, 0.1 + 0.01 * x)
+        # tails do not bias the estimates
+        y[::100] = 50.
+        mean, mean_err, sigma, sigma_err, counts = \
+            robust_resolution(x, y, 5, 0, 10, nentries_min=30)
+        centers = np.arange(1, 10, 2)
+        self.assertTrue( np.allclose(mean, 1., atol=5*mean_err) )
+        self.assertTrue( np.allclose(sigma, 0.1 + 0.01*centers, rtol=0.05) )
+        few = robust_resolution(x[:20], y[:20], 5, 0, 10, nentries_min=30)
+        self.assertTrue( np.all(np.isnan(few[0])) )
+
+    def test_component_fractions(self):
+        jet_e = np.array([10., 10., 20., 20., 0.])
+        x = np.array([0.5, 1.5, 1.5, 1.5, 0.5])
+        comp_e = [np.array([5., 10., 5., 0., 1.]),
+                  np.array([5., 0., 15., 20., 1.])]
+        cuts = [np.ones(5, dtype=bool), x > 1]
+        counts, sums, means = component_fractions(x, jet_e, comp_e, cuts,
+                                                  2, 0, 2)
+        self.assertEqual( counts.tolist(), [[2, 3], [0, 3]] )
+        # the jet with 0 energy is not counted in the fractions
+        self.assertTrue( np.all(np.isfinite(sums)) )
+        self.assertEqual( sums[0, :, 0].tolist(), [0.5, 0.5] )
+        self.assertEqual( sums[0, 0, 1], 1.25 )
+        self.assertEqual( sums[1, 1, 1], 1.75 )
+        self.assertEqual( means[1, 0].tolist(), [0., 1.25/3] )
+
+    def test_cache(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(tmpdir, 'tree.root')
+            open(fname, 'w').close()
+            tree = Tree(fname, {'a': [1., 2., 3.], 'b': [4., 5., 6.],
+                                'c': [7., 8., 9.], 'd': [0., 1., 0.],
+                                'e': [2., 2., 2.]})
+            cachefile = os.path.join(tmpdir, 'cache')
+            names = ['a', 'b', 'c', 'd', 'e']
+            first = cached_read_branches(tree, names, cachefile)
+            self.assertEqual( tree.ndraws, 2 )
+            self.assertEqual( first['e'].tolist(), [2., 2., 2.] )
+            second = cached_read_branches(tree, ['e', 'a'], cachefile)
+            self.assertEqual( tree.ndraws, 2 )
+            self.assertEqual( second['a'].tolist(), [1., 2., 3.] )
+            # another selection invalidates the cache
+            cached_read_branches(tree, ['a', 'b', 'c', 'd', 'e'], cachefile,
+                                 selection='a>1')
+            self.assertEqual( tree.ndraws, 4 )
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,9 +5,16 @@ class Vertex(object):
         self.fccvertex = fccvertex
         self.incoming = []
         self.outgoing = []
+        self._key = None
+
+    def key(self):
+        '''identifier of the fcc vertex, read once'''
+        if self._key is None:
+            self._key = (self.fccvertex.containerID(), self.fccvertex.index())
+        return self._key
 
     def __hash__(self):
-        return hash( (self.fccvertex.containerID(), self.fccvertex.index()) )
+        return hash( self.key() )
 
     def __eq__(self, other):
-        return self.fccvertex ==other.fccvertex
+        return self.key() == other.key()
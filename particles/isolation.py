@@ -1,11 +1,24 @@
 from heppy.utils.deltar import deltaR2
+import math
+import numpy as np
 
 class Area(object):
     '''Base Area interface.'''
+
+    # maximum distance in (eta, phi) between the reference particle
+    # and a particle inside the area. None if unbounded.
+    R = None
+
     def is_inside(self, ptc_ref, ptc_tested):
         '''returns True if ptc_tested is in the Area around ptc_ref, 
         a reference particle used to position the area.'''
 
+    def is_inside_array(self, eta, phi, etas, phis):
+        '''returns a boolean array, True for the particles at (etas, phis)
+        in the area around (eta, phi).'''
+        return np.array([self.is_inside(eta, phi, teta, tphi)
+                         for teta, tphi in zip(etas, phis)], dtype=bool)
+
 
 class EtaPhiCircle(Area):
     '''Circle in (eta, phi) space.'''
@@ -18,6 +31,11 @@ class EtaPhiCircle(Area):
         dR2 = deltaR2(*args)
         return dR2 < self._R2
 
+    def is_inside_array(self, eta, phi, etas, phis):
+        dphis = (phis - phi + math.pi) % (2*math.pi) - math.pi
+        dR2s = (etas - eta)**2 + dphis**2
+        return dR2s < self._R2
+
 
 class IsolationInfo(object):
     '''Holds the results of an isolation calculation.'''
@@ -63,6 +81,73 @@ class IsolationInfo(object):
                 
         
     
+class IsolationIndex(object):
+    '''Kinematic arrays of the particles of an event, 
+    with an (eta, phi) binned index to find the particles around a lepton.
+
+    Build it once per event, and use it in IsolationComputer.compute_index
+    for all leptons and isolation computers.
+    '''
+
+    def __init__(self, particles, cell_size=0.4):
+        '''Create the index.
+        
+        particles : list of particles 
+        cell_size : size of the (eta, phi) cells. 
+        '''
+        self.particles = particles
+        self.eta = np.array([ptc.eta() for ptc in particles], dtype=float)
+        self.phi = np.array([ptc.phi() for ptc in particles], dtype=float)
+        self.pt = np.array([ptc.pt() for ptc in particles], dtype=float)
+        self.e = np.array([ptc.e() for ptc in particles], dtype=float)
+        self.pdgid = np.array([ptc.pdgid() for ptc in particles], dtype=int)
+        self._positions = dict( (id(ptc), i) for i, ptc in enumerate(particles) )
+        self.cell_size = cell_size
+        self.nphi = max(1, int(2*math.pi / cell_size))
+        self.phi_cell_size = 2*math.pi / self.nphi
+        ietas, iphis = self._cell(self.eta, self.phi)
+        keys = ietas * self.nphi + iphis
+        order = np.argsort(keys, kind='mergesort')
+        keys = keys[order]
+        cell_keys, starts = np.unique(keys, return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        self.cells = dict( (key, order[start:end]) for key, start, end
+                           in zip(cell_keys, starts, ends) )
+
+    def _cell(self, eta, phi):
+        ieta = np.floor(eta / self.cell_size).astype(int)
+        iphi = np.floor((phi + math.pi) / self.phi_cell_size).astype(int) % self.nphi
+        return ieta, iphi
+
+    def candidates(self, lepton, radius=None):
+        '''Returns the sorted indices of the particles that can be within 
+        radius of the lepton in (eta, phi), excluding the lepton itself. 
+        All particles are candidates if radius is None.'''
+        if radius is None:
+            indices = np.arange(len(self.particles))
+        else:
+            ieta, iphi = self._cell(np.array([lepton.eta()]),
+                                    np.array([lepton.phi()]))
+            ieta, iphi = ieta[0], iphi[0]
+            neta = int(math.ceil(radius / self.cell_size))
+            nphi = int(math.ceil(radius / self.phi_cell_size))
+            phi_cells = set( (iphi + i) % self.nphi
+                             for i in range(-nphi, nphi+1) )
+            found = []
+            for jeta in range(ieta-neta, ieta+neta+1):
+                for jphi in phi_cells:
+                    cell = self.cells.get(jeta * self.nphi + jphi)
+                    if cell is not None:
+                        found.append(cell)
+            if not found:
+                return np.array([], dtype=int)
+            indices = np.sort(np.concatenate(found))
+        position = self._positions.get(id(lepton))
+        if position is not None:
+            indices = indices[indices != position]
+        return indices
+
+
 class IsolationComputer(object):
     '''Computes isolation for a given lepton.'''
 
@@ -93,6 +178,14 @@ class IsolationComputer(object):
         self.e_thresh = e_thresh
         self.label = label
 
+    def radius(self):
+        '''Maximum (eta, phi) distance of the particles in the on areas,
+        None if unbounded.'''
+        radii = [area.R for area in self.on_areas]
+        if None in radii or not radii:
+            return None
+        return max(radii)
+
         
     def compute(self, lepton, particles):
         '''Compute the isolation for lepton, using particles.
@@ -121,4 +214,35 @@ class IsolationComputer(object):
             if is_on:
                 isolation.add_particle(ptc)        
         return isolation
-    
+
+    def compute_index(self, lepton, index, candidates=None, pdgid=None):
+        '''Compute the isolation for lepton, using an IsolationIndex.
+        
+        candidates : indices of the particles to consider in the index,
+                     by default index.candidates(lepton, self.radius()).
+                     can be shared by several computers with the same areas. 
+        pdgid      : if not None, only particles with this pdgid are used.
+        returns an IsolationInfo, equivalent to the one given by compute.
+        '''
+        if candidates is None:
+            candidates = index.candidates(lepton, self.radius())
+        if pdgid is not None:
+            candidates = candidates[index.pdgid[candidates]==pdgid]
+        etas = index.eta[candidates]
+        phis = index.phi[candidates]
+        mask = (index.e[candidates] >= self.e_thresh) & \
+               (index.pt[candidates] >= self.pt_thresh)
+        eta, phi = lepton.eta(), lepton.phi()
+        is_on = np.zeros(len(candidates), dtype=bool)
+        for area in self.on_areas:
+            is_on |= area.is_inside_array(eta, phi, etas, phis)
+        mask &= is_on
+        for area in self.off_areas:
+            mask &= ~area.is_inside_array(eta, phi, etas, phis)
+        selected = candidates[mask]
+        isolation = IsolationInfo(self.label, lepton)
+        isolation.particles = [index.particles[i] for i in selected]
+        isolation.sumpt = index.pt[selected].sum()
+        isolation.sume = index.e[selected].sum()
+        isolation.num = len(selected)
+        return isolation
@@ -1,4 +1,6 @@
 import math
+import numpy as np
+from p4 import P4
 
 def group_pdgid(ptc):
     pdgid = abs(ptc.pdgid())
@@ -59,26 +61,28 @@ class JetComponent(list):
  
 class JetConstituents(dict):
 
+    all_pdgids = [211, 22, 130, 11, 13, 
+                  1, 2 #HF had and em 
+                  ]
+
     def __init__(self):
         super(JetConstituents, self).__init__()
-        all_pdgids = [211, 22, 130, 11, 13, 
-                      1, 2 #HF had and em 
-                      ]
-        for pdgid in all_pdgids:
+        for pdgid in self.all_pdgids:
             self[pdgid] = JetComponent(pdgid)
 
     def validate(self, jet_energy, tolerance = 1e-2):
-        '''Calls pdb if total component energy != jet energy'''
+        '''Raises ValueError if total component energy != jet energy'''
         tote = sum([comp.e() for comp in self.values()]) 
         if abs(jet_energy-tote)>tolerance: 
-            import pdb; pdb.set_trace()
+            raise ValueError('total component energy {tote} != jet energy {jete}'.format(
+                tote=tote, jete=jet_energy))
     
     def append(self, ptc):
         pdgid = group_pdgid(ptc)
         try:
             self[pdgid].append(ptc)
         except KeyError:
-            import pdb; pdb.set_trace()
+            raise ValueError('no jet component for particle {ptc}'.format(ptc=ptc))
 
     def sort(self):
         for ptcs in self.values():
@@ -87,31 +91,50 @@ class JetConstituents(dict):
     def __str__(self):
         return '\n'.join(map(str, self.values()))
             
-class Jet(object):
-    
-    def p4(self):
-        return self._tlv
+def jet_constituents(particles, jet_index, njets):
+    '''Returns the list of the JetConstituents of njets jets.
+
+    jet_index gives the index of the jet of each particle,
+    -1 if the particle does not belong to a jet. 
+    The energy and pt sums of all components are computed at once,
+    and the particles are sorted by decreasing energy in each component.
+    '''
+    all_pdgids = JetConstituents.all_pdgids
+    ncomps = len(all_pdgids)
+    all_constituents = [JetConstituents() for i in range(njets)]
+    jet_index = np.asarray(jet_index, dtype=int)
+    sel = np.nonzero(jet_index >= 0)[0]
+    if len(sel) == 0:
+        return all_constituents
+    comp_index = []
+    for i in sel:
+        pdgid = group_pdgid(particles[i])
+        if pdgid not in all_pdgids:
+            raise ValueError('no jet component for particle {ptc}'.format(ptc=particles[i]))
+        comp_index.append(all_pdgids.index(pdgid))
+    energies = np.array([particles[i].e() for i in sel])
+    pts = np.array([particles[i].pt() for i in sel])
+    keys = jet_index[sel] * ncomps + np.array(comp_index)
+    nkeys = njets * ncomps
+    sume = np.bincount(keys, weights=energies, minlength=nkeys)
+    sumpt = np.bincount(keys, weights=pts, minlength=nkeys)
+    num = np.bincount(keys, minlength=nkeys)
+    # by component, then decreasing energy
+    order = np.lexsort((-energies, keys))
+    for i in order:
+        jeti, compi = divmod(keys[i], ncomps)
+        list.append(all_constituents[jeti][all_pdgids[compi]], particles[sel[i]])
+    for jeti, constituents in enumerate(all_constituents):
+        for compi, pdgid in enumerate(all_pdgids):
+            key = jeti * ncomps + compi
+            component = constituents[pdgid]
+            component._e = sume[key]
+            component._pt = sumpt[key]
+            component._num = int(num[key])
+    return all_constituents
 
-    def p3(self):
-        return self._tlv.Vect()
     
-    def e(self):
-        return self._tlv.E()
-
-    def pt(self):
-        return self._tlv.Pt()
-    
-    def theta(self):
-        return math.pi/2 - self._tlv.Theta()
-
-    def eta(self):
-        return self._tlv.Eta()
-
-    def phi(self):
-        return self._tlv.Phi()
-
-    def m(self):
-        return self._tlv.M()
+class Jet(P4):
 
     def pdgid(self):
         return 0
@@ -1,6 +1,41 @@
 import math
 
 class P4(object):
+    '''4-momentum interface, based on a TLorentzVector stored in self._tlv.
+
+    The kinematic quantities (e, pt, eta, phi, ...) are computed once
+    and cached, unless cache_kinematics is set to False. 
+    The cache is invalidated when a different TLorentzVector is assigned 
+    to self._tlv. The TLorentzVector returned by p4() must not be modified
+    in place, unless invalidate_kinematics is called afterwards. 
+    '''
+
+    cache_kinematics = True
+
+    def _kinematic(self, name):
+        '''returns self._tlv.name(), from the cache if possible'''
+        tlv = self._tlv
+        if not self.cache_kinematics:
+            return getattr(tlv, name)()
+        # not using getattr, as some subclasses define __getattr__
+        cache = self.__dict__.get('_kinematics')
+        if cache is None or cache[0] is not tlv:
+            cache = (tlv, dict())
+            self.__dict__['_kinematics'] = cache
+        values = cache[1]
+        try:
+            return values[name]
+        except KeyError:
+            value = getattr(tlv, name)()
+            values[name] = value
+            return value
+
+    def invalidate_kinematics(self):
+        '''to be called after modifying the TLorentzVector in place'''
+        cache = self.__dict__.get('_kinematics')
+        if cache is not None:
+            # clearing in place, as the cache may be shared by copies
+            cache[1].clear()
 
     def p4(self):
         '''4-momentum, px, py, pz, E'''
@@ -12,15 +47,15 @@ class P4(object):
 
     def e(self):
         '''energy'''
-        return self._tlv.E()
+        return self._kinematic('E')
 
     def pt(self):
         '''transverse momentum (magnitude of p3 in transverse plane)'''
-        return self._tlv.Pt()
+        return self._kinematic('Pt')
     
     def theta(self):
         '''angle w/r to transverse plane'''
-        return math.pi/2 - self._tlv.Theta()
+        return math.pi/2 - self._kinematic('Theta')
 
     def eta(self):
         '''pseudo-rapidity (-ln(tan self._tlv.Theta()/2)).
@@ -28,15 +63,15 @@ class P4(object):
         theta = pi/2 -> 0 
         theta = pi -> eta = -inf
         '''
-        return self._tlv.Eta()
+        return self._kinematic('Eta')
 
     def phi(self):
         '''azymuthal angle (from x axis, in the transverse plane)'''
-        return self._tlv.Phi()
+        return self._kinematic('Phi')
 
     def m(self):
         '''mass'''
-        return self._tlv.M()
+        return self._kinematic('M')
     
     
     def __str__(self):
@@ -0,0 +1,73 @@
+import numpy as np
+
+class P4Arrays(object):
+    '''Kinematic arrays of a collection of particles.
+
+    Attributes:
+      px, py, pz, e : 4-momentum components
+      pt            : transverse momentum
+      q             : charge
+    '''
+
+    def __init__(self, particles):
+        self.particles = particles
+        tlvs = [ptc.p4() for ptc in particles]
+        p4s = np.array([(tlv.Px(), tlv.Py(), tlv.Pz(), tlv.E()) for tlv in tlvs],
+                       dtype=float).reshape(len(tlvs), 4)
+        self.px, self.py, self.pz, self.e = p4s.T
+        self.pt = np.sqrt(self.px**2 + self.py**2)
+        self.q = np.array([ptc.q() for ptc in particles], dtype=float)
+        self._status = None
+
+    def status(self):
+        '''status codes of the particles, computed on first call'''
+        if self._status is None:
+            self._status = np.array([ptc.status() for ptc in self.particles],
+                                    dtype=int)
+        return self._status
+
+    def sum_p4(self):
+        '''returns the sums of px, py, pz, E'''
+        return self.px.sum(), self.py.sum(), self.pz.sum(), self.e.sum()
+
+    def sum_pt(self):
+        '''scalar sum of the transverse momenta'''
+        return self.pt.sum()
+
+    def sum_q(self):
+        '''total charge'''
+        return self.q.sum()
+
+
+def p4_arrays(event, name):
+    '''Returns the P4Arrays of the collection name in the event.
+
+    The arrays are built once per event and per collection, and shared by
+    all analyzers reading this collection. They are rebuilt if the
+    collection does not contain the same particle objects anymore,
+    e.g. if it has been replaced, filtered, or if particles have been
+    replaced in place. An analyzer modifying the kinematics of the particles
+    themselves must call invalidate.
+    '''
+    particles = getattr(event, name)
+    cache = getattr(event, '_p4_arrays', None)
+    if cache is None:
+        cache = dict()
+        event._p4_arrays = cache
+    cached = cache.get(name)
+    if cached is not None:
+        members, arrays = cached
+        if len(members) == len(particles) and \
+           all(old is new for old, new in zip(members, particles)):
+            return arrays
+    arrays = P4Arrays(particles)
+    cache[name] = (tuple(particles), arrays)
+    return arrays
+
+
+def invalidate(event, name):
+    '''Removes the cached P4Arrays of the collection name,
+    to be called after modifying the particles of this collection.'''
+    cache = getattr(event, '_p4_arrays', None)
+    if cache is not None:
+        cache.pop(name, None)
@@ -45,6 +45,29 @@ class TestIsolation(unittest.TestCase):
         iso = computer.compute(lepton, [ptc])
         self.assertEqual(iso.sumpt, 0.)
 
+    def test_index(self):
+        p4 = TLorentzVector()
+        p4.SetPtEtaPhiM(10, 0, 3.1, 0.105)
+        lepton = Particle(13, 1, p4)
+        ptcs = [lepton]
+        # around the lepton, across phi = pi, and far away
+        for pdgid, eta, phi in [(211, 0.1, -3.1), (22, 0., 2.9),
+                                (211, 0.05, 3.12), (130, 2., 0.)]:
+            p4 = TLorentzVector()
+            p4.SetPtEtaPhiM(1, eta, phi, 0.105)
+            ptcs.append( Particle(pdgid, 1, p4) )
+        index = IsolationIndex(ptcs)
+        computer = IsolationComputer([EtaPhiCircle(0.4)], [EtaPhiCircle(0.1)])
+        for pdgid in [None, 211, 22, 130]:
+            sel_ptcs = [ptc for ptc in ptcs
+                        if pdgid is None or ptc.pdgid()==pdgid]
+            iso = computer.compute(lepton, sel_ptcs)
+            iso_index = computer.compute_index(lepton, index, pdgid=pdgid)
+            self.assertEqual(iso_index.particles, iso.particles)
+            self.assertAlmostEqual(iso_index.sumpt, iso.sumpt)
+            self.assertAlmostEqual(iso_index.sume, iso.sume)
+        self.assertEqual(computer.compute_index(lepton, index).num, 2)
+
         
 if __name__ == '__main__':
     unittest.main()
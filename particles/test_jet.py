@@ -1,6 +1,6 @@
 import unittest
 from tlv.jet import Jet
-from jet import JetConstituents
+from jet import JetConstituents, jet_constituents
 from tlv.particle import Particle
 from ROOT import TLorentzVector
 
@@ -32,6 +32,23 @@ class TestJet(unittest.TestCase):
         self.assertEqual(jet_const[211].pdgid(), 211)
         self.assertRaises(ValueError, jet_const[211].append, ptcs[2])
         print jet_const[211]
+
+    def test_jet_constituents(self):
+        ptcs = [ Particle(211, 1, TLorentzVector(1, 0, 0, 1)),
+                 Particle(22, 0, TLorentzVector(5, 0, 0, 5)),
+                 Particle(211, 1, TLorentzVector(2, 0, 0, 2)),
+                 Particle(130, 0, TLorentzVector(0, 3, 0, 3)) ]
+        all_constituents = jet_constituents(ptcs, [0, 0, 0, -1], 1)
+        self.assertEqual(len(all_constituents), 1)
+        jet_const = all_constituents[0]
+        self.assertEqual(jet_const[211], [ptcs[2], ptcs[0]])
+        self.assertEqual(jet_const[211].e(), 3)
+        self.assertEqual(jet_const[211].pt(), 3)
+        self.assertEqual(jet_const[211].num(), 2)
+        self.assertEqual(jet_const[22], [ptcs[1]])
+        self.assertEqual(jet_const[130].num(), 0)
+        jet_const.validate(8)
+        self.assertRaises(ValueError, jet_const.validate, 11)
         
         
 if __name__ == '__main__':
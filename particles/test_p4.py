@@ -0,0 +1,32 @@
+import unittest
+import copy
+from tlv.particle import Particle
+from ROOT import TLorentzVector
+
+class TestP4(unittest.TestCase):
+
+    def test_cache(self):
+        ptc = Particle(211, 1, TLorentzVector(1, 0, 0, 2))
+        self.assertEqual( ptc.pt(), 1. )
+        self.assertEqual( ptc.e(), 2. )
+        # modifying the TLorentzVector in place
+        ptc.p4().SetPxPyPzE(3, 0, 0, 4)
+        # accessing the TLorentzVector does not clear the cache
+        self.assertEqual( ptc.p4().E(), 4. )
+        self.assertEqual( ptc.pt(), 1. )
+        ptc.invalidate_kinematics()
+        self.assertEqual( ptc.pt(), 3. )
+        self.assertEqual( ptc.e(), 4. )
+        # modifying the TLorentzVector of a shallow copy
+        ptc2 = copy.copy(ptc)
+        ptc2.p4().SetPxPyPzE(5, 0, 0, 6)
+        ptc2.invalidate_kinematics()
+        self.assertEqual( ptc.pt(), 5. )
+        # replacing the TLorentzVector
+        ptc._tlv = TLorentzVector(0, 2, 0, 3)
+        self.assertEqual( ptc.pt(), 2. )
+        self.assertEqual( ptc.e(), 3. )
+
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from p4arrays import P4Arrays, p4_arrays, invalidate
+from tlv.particle import Particle
+from ROOT import TLorentzVector
+
+class Event(object):
+    pass
+
+class TestP4Arrays(unittest.TestCase):
+
+    def test_sums(self):
+        ptcs = [ Particle(211, 1, TLorentzVector(1, 0, 0, 2)),
+                 Particle(-211, -1, TLorentzVector(0, 2, 1, 3)),
+                 Particle(22, 0, TLorentzVector(0, 0, -3, 3)) ]
+        arrays = P4Arrays(ptcs)
+        self.assertEqual( arrays.sum_p4(), (1, 2, -2, 8) )
+        self.assertAlmostEqual( arrays.sum_pt(), 3 )
+        self.assertEqual( arrays.sum_q(), 0 )
+        self.assertEqual( list(arrays.status()), [1, 1, 1] )
+
+    def test_cache(self):
+        event = Event()
+        event.ptcs = [ Particle(211, 1, TLorentzVector(1, 0, 0, 2)) ]
+        arrays = p4_arrays(event, 'ptcs')
+        self.assertTrue( p4_arrays(event, 'ptcs') is arrays )
+        event.ptcs.append( Particle(22, 0, TLorentzVector(0, 0, -3, 3)) )
+        self.assertEqual( p4_arrays(event, 'ptcs').sum_p4()[3], 5 )
+        event.ptcs = []
+        self.assertEqual( p4_arrays(event, 'ptcs').sum_p4()[3], 0 )
+
+    def test_cache_in_place(self):
+        event = Event()
+        event.ptcs = [ Particle(211, 1, TLorentzVector(1, 0, 0, 2)),
+                       Particle(22, 0, TLorentzVector(0, 0, -3, 3)) ]
+        self.assertEqual( p4_arrays(event, 'ptcs').sum_p4()[3], 5 )
+        # same length, other particles
+        event.ptcs[1] = Particle(22, 0, TLorentzVector(0, 0, -4, 4))
+        self.assertEqual( p4_arrays(event, 'ptcs').sum_p4()[3], 6 )
+        event.ptcs[:] = [event.ptcs[1], event.ptcs[0]]
+        self.assertEqual( list(p4_arrays(event, 'ptcs').e), [4, 2] )
+        # modified particles
+        event.ptcs[0].p4().SetE(10.)
+        invalidate(event, 'ptcs')
+        self.assertEqual( p4_arrays(event, 'ptcs').sum_p4()[3], 12 )
+
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+'''Local catalog of the datasets: file lists, event counts and sizes.
+
+The catalog is a json file, by default ~/.heppy_fcc/datasets.json,
+or the file given by the HEPPY_FCC_CATALOG environment variable.
+It is read without any network access, and updated explicitly:
+
+  python catalog.py /ee_qq/745_v1/RECOSIM --count
+
+refreshes the file list of a dataset and counts the events of its files.
+'''
+
+import os
+import json
+import time
+import tempfile
+import numpy as np
+
+default_path = os.environ.get(
+    'HEPPY_FCC_CATALOG',
+    os.path.expanduser('~/.heppy_fcc/datasets.json')
+)
+
+EOS_URL = 'root://eoscms.cern.ch//eos/cms{fname}'
+
+
+def dataset_key(dataset, user, basedir):
+    return ':'.join([user, basedir, dataset])
+
+
+def list_files(dataset, user, basedir, cache=True):
+    '''Lists the files of a dataset on EOS, and returns their xrootd urls.
+    Needs the network.'''
+    from PhysicsTools.HeppyCore.utils.dataset import createDataset
+    ds = createDataset(user, dataset, '.*root',
+                       readcache=cache, basedir=basedir)
+    filenames = ds.listOfGoodFiles()
+    return [EOS_URL.format(fname=fname) for fname in filenames]
+
+
+def count_entries(fname, treenames=('events', 'Events')):
+    '''Returns the number of entries and the size in bytes of a root file,
+    None, None if the file cannot be read.'''
+    from ROOT import TFile
+    rootfile = TFile.Open(fname)
+    if not rootfile or rootfile.IsZombie():
+        return None, None
+    try:
+        size = rootfile.GetSize()
+        for treename in treenames:
+            tree = rootfile.Get(treename)
+            if tree:
+                return int(tree.GetEntries()), size
+        return None, size
+    finally:
+        rootfile.Close()
+
+
+class JsonStore(object):
+    '''Dictionary stored in a json file.'''
+
+    def __init__(self, path):
+        self.path = path
+        self.data = dict()
+        if os.path.isfile(path):
+            with open(path) as store_file:
+                self.data = json.load(store_file)
+
+    def save(self):
+        dirname = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        # writing to a temporary file first, not to lose the file
+        # if the job is interrupted. The temporary file is unique,
+        # as parallel jobs may save at the same time.
+        fd, tmp = tempfile.mkstemp(dir=dirname,
+                                   prefix=os.path.basename(self.path) + '.',
+                                   suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as store_file:
+                json.dump(self.data, store_file, indent=1, sort_keys=True)
+            os.chmod(tmp, 0644)
+            os.rename(tmp, self.path)
+        except:
+            os.remove(tmp)
+            raise
+
+
+class Catalog(JsonStore):
+    '''Local index of the datasets.
+
+    Each dataset has a list of files, with for each file the number of
+    events and the size in bytes, None if unknown.
+    '''
+
+    def __init__(self, path=default_path):
+        super(Catalog, self).__init__(path)
+
+    @property
+    def datasets(self):
+        return self.data
+
+    def entries(self, key):
+        '''Returns the list of file entries of a dataset,
+        dictionaries with the keys name, nevents, size,
+        or None if the dataset is not in the catalog.'''
+        dataset = self.datasets.get(key)
+        if dataset is None:
+            return None
+        return dataset['files']
+
+    def files(self, key):
+        entries = self.entries(key)
+        if entries is None:
+            return None
+        return [entry['name'] for entry in entries]
+
+    def nevents(self, key):
+        '''Returns the array of the numbers of events of the files,
+        with -1 for the unknown ones.'''
+        entries = self.entries(key)
+        if entries is None:
+            return None
+        return np.array([entry['nevents'] if entry['nevents'] is not None
+                         else -1 for entry in entries], dtype=int)
+
+    def file_nevents(self):
+        '''Returns a dictionary file name : number of events,
+        for the files of all datasets with a known number of events.'''
+        return dict((entry['name'], entry['nevents'])
+                    for dataset in self.datasets.itervalues()
+                    for entry in dataset['files']
+                    if entry['nevents'] is not None)
+
+    def set_files(self, key, files, nevents=None, sizes=None):
+        '''Sets the files of a dataset. The known numbers of events
+        and sizes of the files already in the catalog are kept,
+        unless given.'''
+        old = dict((entry['name'], entry)
+                   for entry in self.entries(key) or [])
+        entries = []
+        for ifile, fname in enumerate(files):
+            entry = dict(name=fname, nevents=None, size=None)
+            if fname in old:
+                entry.update(old[fname])
+            if nevents is not None:
+                entry['nevents'] = nevents[ifile]
+            if sizes is not None:
+                entry['size'] = sizes[ifile]
+            entries.append(entry)
+        self.datasets[key] = dict(files=entries, updated=time.time())
+
+    def count(self, key, force=False):
+        '''Counts the events of the files of a dataset,
+        only for the files with an unknown number of events unless force.'''
+        for entry in self.entries(key):
+            if force or entry['nevents'] is None:
+                entry['nevents'], entry['size'] = count_entries(entry['name'])
+
+    def refresh(self, dataset, user='EOS',
+                basedir='/store/cmst3/user/cbern/CMG', count=False):
+        '''Lists the files of a dataset again, and optionally counts
+        their events. Saves the catalog.'''
+        key = dataset_key(dataset, user, basedir)
+        self.set_files(key, list_files(dataset, user, basedir, cache=False))
+        if count:
+            self.count(key)
+        self.save()
+        return self.files(key)
+
+
+def balanced_chunks(nevents, nchunks):
+    '''Splits a list of files in at most nchunks chunks of consecutive files,
+    with about the same number of events.
+
+    nevents is the array of the numbers of events of the files,
+    with negative values for the unknown ones, which are then
+    taken equal to the average of the known ones.
+    Returns the list of (start, stop) file index ranges.
+    '''
+    nevents = np.array(nevents, dtype=float)
+    nfiles = len(nevents)
+    if nfiles == 0:
+        return []
+    nchunks = max(1, min(nchunks, nfiles))
+    known = nevents >= 0
+    nevents[~known] = nevents[known].mean() if known.any() else 1.
+    cumulative = np.concatenate(([0.], np.cumsum(nevents)))
+    targets = cumulative[-1] * np.arange(1, nchunks) / nchunks
+    # closest file boundary to each target
+    bounds = np.searchsorted(cumulative, targets)
+    lower = np.maximum(bounds - 1, 0)
+    closer_lower = np.abs(cumulative[lower] - targets) <= \
+                   np.abs(cumulative[bounds] - targets)
+    bounds = np.where(closer_lower, lower, bounds)
+    # each chunk has at least one file
+    result = []
+    start = 0
+    for ichunk, bound in enumerate(bounds):
+        bound = min(max(bound, start + 1), nfiles - (nchunks - 1 - ichunk))
+        result.append((start, bound))
+        start = bound
+    result.append((start, nfiles))
+    return result
+
+
+def file_chunks(key, nchunks, catalog=None):
+    '''Returns the files of a dataset of the catalog in at most nchunks
+    lists with about the same number of events.'''
+    if catalog is None:
+        catalog = get_catalog()
+    files = catalog.files(key)
+    return [files[start:stop]
+            for start, stop in balanced_chunks(catalog.nevents(key), nchunks)]
+
+
+_catalog = None
+
+def get_catalog():
+    '''Returns the default catalog, read once.'''
+    global _catalog
+    if _catalog is None:
+        _catalog = Catalog()
+    return _catalog
+
+
+if __name__ == '__main__':
+
+    import sys
+    from optparse import OptionParser
+
+    parser = OptionParser(usage='%prog [options] dataset [dataset...]')
+    parser.add_option('-u', '--user', dest='user', default='EOS',
+                      help='user, e.g. EOS or CMS')
+    parser.add_option('-b', '--basedir', dest='basedir',
+                      default='/store/cmst3/user/cbern/CMG',
+                      help='base directory')
+    parser.add_option('-c', '--count', dest='count', action='store_true',
+                      default=False, help='count the events of the files')
+    options, args = parser.parse_args()
+    if not args:
+        parser.print_usage()
+        sys.exit(1)
+    catalog = Catalog()
+    for dataset in args:
+        files = catalog.refresh(dataset, options.user, options.basedir,
+                                options.count)
+        key = dataset_key(dataset, options.user, options.basedir)
+        nevents = catalog.nevents(key)
+        print dataset, len(files), 'files', nevents[nevents>=0].sum(), 'events'
@@ -1,9 +1,24 @@
-from PhysicsTools.HeppyCore.utils.dataset import createDataset
+from catalog import get_catalog, dataset_key, list_files
 
-def getFiles(dataset, cache=True, user='EOS', basedir='/store/cmst3/user/cbern/CMG'):
-    ds = createDataset(user, dataset, '.*root', 
-                       readcache=cache, basedir=basedir)
-    filenames = ds.listOfGoodFiles()
-    return ['root://eoscms.cern.ch//eos/cms{fname}'.format(fname=fname) 
-            for fname in filenames]
+def getFiles(dataset, cache=True, user='EOS', basedir='/store/cmst3/user/cbern/CMG',
+             refresh=False):
+    '''Returns the xrootd urls of the files of a dataset.
 
+    The file list is taken from the local dataset catalog, without network
+    access, if the dataset is there and refresh is False. Otherwise,
+    the files are listed on EOS and the catalog is updated.
+    cache=False implies refresh=True: neither the catalog nor the
+    dataset cache of heppy is read.
+    '''
+    catalog = get_catalog()
+    key = dataset_key(dataset, user, basedir)
+    files = None if refresh or not cache else catalog.files(key)
+    if files is None:
+        files = list_files(dataset, user, basedir, cache)
+        catalog.set_files(key, files)
+        try:
+            catalog.save()
+        except (IOError, OSError):
+            # read-only catalog, e.g. in a batch job
+            pass
+    return files
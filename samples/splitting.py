@@ -0,0 +1,195 @@
+'''Splitting of the components in jobs with about the same runtime.
+
+The number of entries of each file is taken from the dataset catalog,
+or, for the files not in the catalog, read once and cached. The
+event rate of each analyzer sequence is measured on past jobs:
+
+  from heppy_fcc.samples.splitting import SplittingPlanner
+  planner = SplittingPlanner()
+  selectedComponents = planner.split(selectedComponents, sequence,
+                                     max_seconds=3600.)
+
+The rate of each job is recorded to calibrate the next plans
+by adding a ThroughputRecorder to the sequence:
+
+  from heppy_fcc.analyzers.ThroughputRecorder import add_recorder
+  add_recorder(sequence)
+'''
+
+import os
+import copy
+import math
+import numpy as np
+
+from catalog import JsonStore, balanced_chunks, count_entries, get_catalog
+
+cache_dir = os.environ.get('HEPPY_FCC_CACHE',
+                           os.path.expanduser('~/.heppy_fcc'))
+
+
+class EntryCounts(JsonStore):
+    '''Cache of the number of entries of the files not in the
+    dataset catalog, by default the one of get_catalog.
+    The entries of a local file are counted again if the file
+    has been modified.'''
+
+    def __init__(self, path=None, counter=count_entries, catalog=None):
+        if path is None:
+            path = os.path.join(cache_dir, 'entries.json')
+        super(EntryCounts, self).__init__(path)
+        self.counter = counter
+        if catalog is None:
+            catalog = get_catalog()
+        self.cataloged = catalog.file_nevents()
+
+    def nentries(self, fname):
+        '''Returns the number of entries of fname, -1 if unknown.
+        The files of the catalog are not opened.'''
+        nevents = self.cataloged.get(fname)
+        if nevents is not None:
+            return nevents
+        mtime = os.path.getmtime(fname) if os.path.isfile(fname) else None
+        cached = self.data.get(fname)
+        if cached is not None and cached['mtime'] == mtime:
+            return cached['nentries']
+        nentries, size = self.counter(fname)
+        if nentries is None:
+            return -1
+        self.data[fname] = dict(mtime=mtime, nentries=nentries)
+        return nentries
+
+    def counts(self, fnames):
+        return np.array([self.nentries(fname) for fname in fnames], dtype=int)
+
+
+def sequence_key(sequence):
+    '''Identifies an analyzer sequence by the classes of its analyzers.
+    The classes with a true skip_in_sequence_key attribute,
+    like the ThroughputRecorder, are ignored.'''
+    names = []
+    for ana in sequence:
+        cls = getattr(ana, 'class_object', ana)
+        # analyzers instrumented by heppy_fcc.tools.instrumentation
+        cls = getattr(cls, 'analyzer_class', cls)
+        if getattr(cls, 'skip_in_sequence_key', False):
+            continue
+        names.append(getattr(cls, '__name__', str(cls)))
+    return '/'.join(names)
+
+
+class Throughput(JsonStore):
+    '''Measured event rates of the analyzer sequences.
+
+    The measurements are accumulated over the jobs. Several jobs
+    can record their measurements to the same file: the file is read
+    again when saving, so that the measurements saved by the other jobs
+    in the meantime are kept.'''
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(cache_dir, 'throughput.json')
+        super(Throughput, self).__init__(path)
+        self.recorded = dict()
+
+    def record(self, sequence, nevents, seconds):
+        '''Records a job of the sequence, which processed nevents
+        in seconds. sequence can also be the key of the sequence.'''
+        key = sequence if isinstance(sequence, basestring) \
+              else sequence_key(sequence)
+        for measures in [self.data, self.recorded]:
+            measure = measures.setdefault(key, dict(nevents=0, seconds=0.))
+            measure['nevents'] += nevents
+            measure['seconds'] += seconds
+
+    def save(self):
+        '''Adds the measurements recorded since the last save
+        to the ones in the file.'''
+        current = Throughput(self.path)
+        for key, recorded in self.recorded.iteritems():
+            measure = current.data.setdefault(key, dict(nevents=0, seconds=0.))
+            measure['nevents'] += recorded['nevents']
+            measure['seconds'] += recorded['seconds']
+        self.data = current.data
+        super(Throughput, self).save()
+        self.recorded = dict()
+
+    def rate(self, sequence, default=None):
+        '''Average number of events per second of the sequence,
+        default if the sequence has never been measured.'''
+        measure = self.data.get(sequence_key(sequence))
+        if not measure or measure['seconds'] <= 0:
+            return default
+        return measure['nevents'] / measure['seconds']
+
+
+class SplittingPlanner(object):
+    '''Splits components in chunks of consecutive files
+    with about the same expected runtime.
+
+    The expected runtime of a file is nentries / rate + file_overhead,
+    where rate is the measured rate of the sequence.
+    '''
+
+    def __init__(self, entry_counts=None, throughput=None,
+                 default_rate=100., file_overhead=5.):
+        self.entry_counts = entry_counts if entry_counts is not None \
+                            else EntryCounts()
+        self.throughput = throughput if throughput is not None \
+                          else Throughput()
+        self.default_rate = default_rate
+        self.file_overhead = file_overhead
+
+    def costs(self, fnames, sequence):
+        '''Expected runtimes of the files, in seconds.'''
+        rate = self.throughput.rate(sequence, self.default_rate)
+        nentries = self.entry_counts.counts(fnames).astype(float)
+        known = nentries >= 0
+        if known.any():
+            nentries[~known] = nentries[known].mean()
+        else:
+            nentries[:] = rate
+        return nentries / rate + self.file_overhead
+
+    def plan(self, fnames, sequence, nchunks=None, max_seconds=None):
+        '''Returns the (start, stop) file ranges of the chunks.
+
+        With max_seconds, the number of chunks is chosen so that
+        each job is expected to last less than max_seconds,
+        if the files are small enough. Otherwise, nchunks is used.'''
+        costs = self.costs(fnames, sequence)
+        if max_seconds is not None:
+            nchunks = int(math.ceil(costs.sum() / max_seconds))
+        elif nchunks is None:
+            nchunks = 1
+        return balanced_chunks(costs, nchunks)
+
+    def split(self, components, sequence, nchunks=None, max_seconds=None):
+        '''Returns the components split in chunks, as components
+        named <name>_Chunk<i>, each with its files.
+        The entry counts are saved to the cache.'''
+        result = []
+        for comp in components:
+            chunks = self.plan(comp.files, sequence, nchunks, max_seconds)
+            if len(chunks) <= 1:
+                result.append(comp)
+                continue
+            for ichunk, (start, stop) in enumerate(chunks):
+                chunk = copy.copy(comp)
+                chunk.name = '{name}_Chunk{ichunk}'.format(name=comp.name,
+                                                           ichunk=ichunk)
+                chunk.files = comp.files[start:stop]
+                chunk.splitFactor = 1
+                result.append(chunk)
+        self.entry_counts.save()
+        return result
+
+    def gen_jobs(self, nevents, sequence, max_seconds):
+        '''For generation jobs without input files, returns the number of
+        jobs and the number of events per job needed to generate nevents,
+        with jobs lasting less than max_seconds.'''
+        rate = self.throughput.rate(sequence, self.default_rate)
+        nevents_per_job = max(1, int(rate * max_seconds))
+        njobs = int(math.ceil(float(nevents) / nevents_per_job))
+        # same number of events in all jobs
+        nevents_per_job = int(math.ceil(float(nevents) / njobs))
+        return njobs, nevents_per_job
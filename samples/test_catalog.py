@@ -0,0 +1,47 @@
+import unittest
+import os
+import shutil
+import tempfile
+from catalog import Catalog, balanced_chunks, file_chunks
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'sub', 'datasets.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_catalog(self):
+        catalog = Catalog(self.path)
+        self.assertIsNone( catalog.files('key') )
+        catalog.set_files('key', ['a.root', 'b.root'], nevents=[10, None])
+        catalog.save()
+        catalog = Catalog(self.path)
+        self.assertEqual( catalog.files('key'), ['a.root', 'b.root'] )
+        self.assertEqual( list(catalog.nevents('key')), [10, -1] )
+        # known event counts are kept when the file list is updated
+        catalog.set_files('key', ['a.root', 'c.root'])
+        self.assertEqual( list(catalog.nevents('key')), [10, -1] )
+        catalog.set_files('key', ['a.root', 'b.root', 'c.root'],
+                          nevents=[10, 20, 30])
+        self.assertEqual( file_chunks('key', 2, catalog),
+                          [['a.root', 'b.root'], ['c.root']] )
+
+    def test_balanced_chunks(self):
+        self.assertEqual( balanced_chunks([], 3), [] )
+        self.assertEqual( balanced_chunks([5, 5], 4), [(0, 1), (1, 2)] )
+        self.assertEqual( balanced_chunks([100, 1, 1, 1, 1, 100], 2),
+                          [(0, 3), (3, 6)] )
+        self.assertEqual( balanced_chunks([100, 1, 1, 1, 1], 3),
+                          [(0, 1), (1, 2), (2, 5)] )
+        # unknown counts are replaced by the average
+        self.assertEqual( balanced_chunks([10, -1, 10, -1], 2),
+                          [(0, 2), (2, 4)] )
+        chunks = balanced_chunks([1] * 10, 3)
+        self.assertEqual( [stop - start for start, stop in chunks], [3, 4, 3] )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import os
+import shutil
+import tempfile
+from splitting import EntryCounts, Throughput, SplittingPlanner, sequence_key
+from catalog import Catalog
+
+class Component(object):
+    def __init__(self, name, files):
+        self.name = name
+        self.files = files
+        self.splitFactor = 1
+
+class Analyzer(object):
+    def __init__(self, class_object):
+        self.class_object = class_object
+
+class Gun(object):
+    pass
+
+class PFSim(object):
+    pass
+
+class Recorder(object):
+    skip_in_sequence_key = True
+
+class TestSplitting(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.nentries = {'a.root':1000, 'b.root':10, 'c.root':10,
+                         'd.root':1000, 'bad.root':None}
+        self.ncounts = 0
+        self.sequence = [Analyzer(Gun), Analyzer(PFSim)]
+        self.catalog = Catalog(os.path.join(self.tmpdir, 'datasets.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def counter(self, fname):
+        self.ncounts += 1
+        return self.nentries[fname], 0
+
+    def planner(self):
+        entries = EntryCounts(os.path.join(self.tmpdir, 'entries.json'),
+                              counter=self.counter, catalog=self.catalog)
+        throughput = Throughput(os.path.join(self.tmpdir, 'throughput.json'))
+        return SplittingPlanner(entries, throughput, file_overhead=0.)
+
+    def test_entry_counts(self):
+        planner = self.planner()
+        self.assertEqual( list(planner.entry_counts.counts(['a.root', 'bad.root'])),
+                          [1000, -1] )
+        planner.entry_counts.save()
+        planner = self.planner()
+        planner.entry_counts.nentries('a.root')
+        # a.root read from the cache
+        self.assertEqual( self.ncounts, 2 )
+
+    def test_cataloged(self):
+        self.catalog.set_files('dataset', ['a.root', 'b.root'],
+                               nevents=[500, None])
+        planner = self.planner()
+        self.assertEqual( list(planner.entry_counts.counts(['a.root', 'b.root'])),
+                          [500, 10] )
+        # only b.root, with an unknown number of events, is opened
+        self.assertEqual( self.ncounts, 1 )
+
+    def test_throughput(self):
+        throughput = self.planner().throughput
+        self.assertEqual( sequence_key(self.sequence), 'Gun/PFSim' )
+        self.assertIsNone( throughput.rate(self.sequence) )
+        throughput.record(self.sequence, 100, 1.)
+        throughput.record(self.sequence, 300, 3.)
+        throughput.save()
+        throughput = self.planner().throughput
+        self.assertAlmostEqual( throughput.rate(self.sequence), 100. )
+        self.assertIsNone( throughput.rate(self.sequence[:1]) )
+
+    def test_throughput_parallel_jobs(self):
+        # two jobs saving their measurements to the same file
+        job1 = self.planner().throughput
+        job2 = self.planner().throughput
+        job1.record(self.sequence, 100, 1.)
+        job2.record('Gun/PFSim', 300, 1.)
+        job1.save()
+        job2.save()
+        job1.save()
+        throughput = self.planner().throughput
+        self.assertAlmostEqual( throughput.rate(self.sequence), 200. )
+        self.assertEqual( os.listdir(self.tmpdir), ['throughput.json'] )
+        # the recorder is not part of the sequence key
+        self.assertEqual(
+            sequence_key([Analyzer(Recorder)] + self.sequence), 'Gun/PFSim'
+        )
+
+    def test_split(self):
+        planner = self.planner()
+        comp = Component('sample', ['a.root', 'b.root', 'c.root', 'd.root'])
+        chunks = planner.split([comp], self.sequence, nchunks=2)
+        self.assertEqual( [chunk.name for chunk in chunks],
+                          ['sample_Chunk0', 'sample_Chunk1'] )
+        self.assertEqual( [chunk.files for chunk in chunks],
+                          [['a.root', 'b.root'], ['c.root', 'd.root']] )
+        self.assertEqual( comp.files, ['a.root', 'b.root', 'c.root', 'd.root'] )
+        # 100 events per second: about 20 s in total
+        planner.throughput.record(self.sequence, 100, 1.)
+        self.assertEqual( len(planner.plan(comp.files, self.sequence,
+                                           max_seconds=11.)), 2 )
+        self.assertEqual( planner.split([comp], self.sequence,
+                                        max_seconds=100.), [comp] )
+
+    def test_gen_jobs(self):
+        planner = self.planner()
+        planner.throughput.record(self.sequence, 10, 1.)
+        self.assertEqual( planner.gen_jobs(1000, self.sequence, 30.), (4, 250) )
+        self.assertEqual( planner.gen_jobs(10, self.sequence, 30.), (1, 10) )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,16 +9,18 @@ import heppy.framework.config as cfg
 gen_jobs = 0
 do_display = True
 do_pf = False
+# per-analyzer timing and memory counters
+do_instrument = False
 
 nevents_per_job = 5000
+# if set, jobs are split to last about max_job_seconds,
+# from the event rate measured for the sequence
+max_job_seconds = None
 
 GEN = gen_jobs 
 FCC = os.environ.get('FCCEDM', False) and not GEN
 CMS = os.environ.get('CMSSW_BASE', False) and not GEN
 
-if gen_jobs>1:
-    do_display = False
-
 selectedComponents = None
 if CMS:
     # from heppy_fcc.samples.gun_0_50 import *  
@@ -146,6 +148,29 @@ if FCC:
 # inputSample.files.append('albers_2.root')
 # inputSample.splitFactor = 2  # splitting the component in 2 chunks
 
+from heppy_fcc.tools.instrumentation import instrument
+instrument(sequence, enabled=do_instrument)
+
+if max_job_seconds:
+    from heppy_fcc.samples.splitting import SplittingPlanner
+    planner = SplittingPlanner()
+    if GEN:
+        gen_jobs, nevents_per_job = planner.gen_jobs(gen_jobs * nevents_per_job,
+                                                     sequence, max_job_seconds)
+        selectedComponents = [cfg.Component(''.join(['sample_Chunk',str(i)]),
+                                            files=['dummy.root'])
+                              for i in range(gen_jobs)]
+    else:
+        selectedComponents = planner.split(selectedComponents, sequence,
+                                           max_seconds=max_job_seconds)
+    # recording the event rate of the jobs for the next plans
+    from heppy_fcc.analyzers.ThroughputRecorder import add_recorder
+    add_recorder(sequence)
+
+if gen_jobs>1:
+    do_display = False
+    pfsim.display = False
+
 # finalization of the configuration object.
 Events = None
 if gen_jobs:
@@ -197,7 +222,7 @@ if __name__ == '__main__':
                    nEvents=nevents_per_job,
                    nPrint=5,
                    timeReport=True)
-    pfsim = loop.analyzers[1]
+    pfsim = [ana for ana in loop.analyzers if isinstance(ana, PFSim)][0]
     display = getattr(pfsim, 'display', None)
     simulator = pfsim.simulator
     detector = simulator.detector
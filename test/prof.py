@@ -1,6 +1,11 @@
-import pstats
-p = pstats.Stats('restats')
-p.sort_stats('cumulative').print_stats(20)
-p.strip_dirs().sort_stats(-1).print_stats()
-p.sort_stats('cumulative').print_stats(20)
-p.print_callees('particle.py')
+'''Profiles a configuration, see heppy_fcc.tools.profiling.
+
+  python prof.py simple_papas_cfg.py -n 100 -o prof_out
+  python prof.py simple_papas_cfg.py -n 100 -m sample
+  python prof.py -s prof_out/profile.prof
+'''
+
+from heppy_fcc.tools.profiling import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import numpy as np
+
+class CollectionView(object):
+    '''Read-only view on a subset of a collection, without copy.
+
+    The view holds a reference to the base collection (a list),
+    and the array of the indices of the selected objects in this collection.
+    Views of views refer directly to the base collection.
+
+    A view can be built from a selection function, evaluated lazily,
+    the first time the view is accessed:
+
+      leptons = CollectionView(particles, func=lambda ptc: abs(ptc.pdgid()) in [11, 13])
+      hard_leptons = leptons.filter(lambda ptc: ptc.pt()>30)
+
+    or from an array of indices or a boolean mask over the parent collection:
+
+      first_two = CollectionView(particles, indices=[0, 1])
+      charged = CollectionView(particles, mask=[ptc.q()!=0 for ptc in particles])
+    '''
+
+    def __init__(self, parent, indices=None, mask=None, func=None):
+        self.parent = parent
+        if isinstance(parent, CollectionView):
+            self.base = parent.base
+        else:
+            self.base = parent
+        self._indices = None
+        self._func = func
+        if mask is not None:
+            indices = np.nonzero(np.asarray(mask, dtype=bool))[0]
+        if indices is not None:
+            self._set_indices(np.asarray(indices, dtype=int))
+        elif func is None:
+            self._set_indices(np.arange(len(parent)))
+
+    def _set_indices(self, indices):
+        '''indices are relative to the parent'''
+        if isinstance(self.parent, CollectionView):
+            indices = self.parent.indices[indices]
+        self._indices = indices
+
+    @property
+    def indices(self):
+        '''indices of the selected objects in the base collection'''
+        if self._indices is None:
+            mask = [bool(self._func(obj)) for obj in self.parent]
+            self._set_indices(np.nonzero(np.array(mask, dtype=bool))[0])
+        return self._indices
+
+    def filter(self, func):
+        '''Returns a lazy view on the objects of this view passing func.'''
+        return CollectionView(self, func=func)
+
+    def select(self, mask):
+        '''Returns a view on the objects of this view for which mask is True.'''
+        return CollectionView(self, mask=mask)
+
+    def tolist(self):
+        base = self.base
+        return [base[i] for i in self.indices]
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        base = self.base
+        for i in self.indices:
+            yield base[i]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return CollectionView(self, indices=np.arange(len(self))[item])
+        return self.base[self.indices[item]]
+
+    def __nonzero__(self):
+        return len(self) > 0
+
+    __bool__ = __nonzero__
+
+    def __contains__(self, obj):
+        return any(obj == other for other in self)
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+
+class LazyCollection(object):
+    '''List built by func the first time it is accessed, and memoized.
+
+    A reader can store a LazyCollection in the event instead of a list,
+    so that the collection is converted only if an analyzer uses it:
+
+      event.gen_jets = LazyCollection(lambda: map(Jet, store.get('GenJet')))
+
+    The LazyCollection behaves as the list returned by func,
+    and the list methods (sort, append, index...) act on this list.
+    '''
+
+    def __init__(self, func):
+        self._func = func
+        self._list = None
+
+    def converted(self):
+        '''True if the list has already been built.'''
+        return self._list is not None
+
+    def tolist(self):
+        if self._list is None:
+            self._list = list(self._func())
+            self._func = None
+        return self._list
+
+    def __getattr__(self, attr):
+        if attr.startswith('__') or attr in ['_func', '_list']:
+            raise AttributeError(attr)
+        return getattr(self.tolist(), attr)
+
+    def __len__(self):
+        return len(self.tolist())
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, item):
+        return self.tolist()[item]
+
+    def __setitem__(self, item, value):
+        self.tolist()[item] = value
+
+    def __delitem__(self, item):
+        del self.tolist()[item]
+
+    def __contains__(self, obj):
+        return obj in self.tolist()
+
+    def __nonzero__(self):
+        return len(self) > 0
+
+    __bool__ = __nonzero__
+
+    def __add__(self, other):
+        return self.tolist() + list(other)
+
+    def __radd__(self, other):
+        return list(other) + self.tolist()
+
+    def __eq__(self, other):
+        if isinstance(other, LazyCollection):
+            other = other.tolist()
+        return self.tolist() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(self.tolist())
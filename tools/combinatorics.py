@@ -0,0 +1,46 @@
+import itertools
+import numpy as np
+
+
+def leg_combinations(nlegs, n):
+    '''Returns an (ncombinations, n) array with all combinations
+    of n leg indices among nlegs, in the order of itertools.combinations.'''
+    if n == 2:
+        first, second = np.triu_indices(nlegs, 1)
+        return np.stack([first, second], axis=1)
+    combinations = list(itertools.combinations(range(nlegs), n))
+    return np.array(combinations, dtype=int).reshape(len(combinations), n)
+
+
+def combination_masses(p4s, combinations):
+    '''Returns the invariant mass of each combination of legs,
+    with the sign convention of TLorentzVector.M() for negative mass squares.
+    p4s is an (nlegs, 4) array of px, py, pz, E.'''
+    total = p4s[combinations].sum(axis=1)
+    m2 = total[:, 3]**2 - np.sum(total[:, :3]**2, axis=1)
+    return np.where(m2 >= 0., np.sqrt(np.abs(m2)), -np.sqrt(np.abs(m2)))
+
+
+def select_combinations(combinations, mass, nominal_mass, charges=None,
+                        charge=None, mass_window=None, top_k=None):
+    '''Returns the indices of the selected combinations, sorted by
+    increasing distance of their mass to nominal_mass.
+
+    charges    : array of the charges of the legs, needed if charge is set
+    charge     : if set, required total charge of the legs
+    mass_window: if set, (min, max) mass range
+    top_k      : if set, maximum number of combinations returned
+    '''
+    selected = np.ones(len(combinations), dtype=bool)
+    if charge is not None:
+        charges = np.asarray(charges)
+        selected &= charges[combinations].sum(axis=1) == charge
+    if mass_window is not None:
+        mmin, mmax = mass_window
+        selected &= (mass >= mmin) & (mass <= mmax)
+    candidates = np.nonzero(selected)[0]
+    distance = np.abs(mass[candidates] - nominal_mass)
+    candidates = candidates[np.argsort(distance, kind='mergesort')]
+    if top_k is not None:
+        candidates = candidates[:top_k]
+    return candidates
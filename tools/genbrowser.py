@@ -1,75 +1,232 @@
-import copy
+import collections
+import numpy as np
+
+def csr(keys, nkeys):
+    '''Returns the arrays ptr, indices such that
+    indices[ptr[k]:ptr[k+1]] are the indices i with keys[i]==k, in order.
+    negative keys are ignored.'''
+    keys = np.asarray(keys, dtype=int)
+    valid = np.nonzero(keys >= 0)[0]
+    order = valid[np.argsort(keys[valid], kind='mergesort')]
+    counts = np.bincount(keys[valid], minlength=nkeys)
+    ptr = np.zeros(nkeys + 1, dtype=int)
+    np.cumsum(counts, out=ptr[1:])
+    return ptr, order
+
 
 class GenBrowser(object):
-    """Browser for gen particle history."""
-    
+    """Browser for gen particle history.
+
+    The particle graph is stored in integer arrays built once,
+    in the constructor. Particle i has the mothers
+    mother_indices(i) and the daughters daughter_indices(i).
+    The traversals are iterative, and the ancestor pdgid queries
+    are memoized.
+    """
+
     def __init__(self, particles, vertices):
         """
-        parameters: 
-        - particles: a list of gen particles 
-        
-        the particles must have a start_vertex and an end_vertex 
-        attribute, set to None if the vertex doesn't exist. 
-    
-        After calling this constructor, two lists are added to each 
-        particle: 
+        parameters:
+        - particles: a list of gen particles
+        - vertices: a list of gen vertices
+
+        the particles must have a start_vertex and an end_vertex
+        attribute, set to None if the vertex doesn't exist.
+
+        After calling this constructor, two lists are added to each
+        particle:
         - daughters: list of direct daugthers
-        - mothers: list of direct mothers  
+        - mothers: list of direct mothers
+        and two lists are added to each vertex:
+        - incoming: list of incoming particles
+        - outgoing: list of outgoing particles
         """
-        self.vertices = dict()
-        for v in vertices:
-            self.vertices[v] = v
-        self.particles = particles
-        for ptc in particles:
-            ptc.daughters = []
-            ptc.mothers = []
+        self.particles = list(particles)
+        self.vertices = list(vertices)
+        vertex_index = dict()
+        for ivtx, vtx in enumerate(self.vertices):
+            vertex_index[vtx] = ivtx
+        self.indices = dict()
+        nptcs = len(self.particles)
+        # start and end vertex index of each particle, -1 if none
+        self.start = np.full(nptcs, -1, dtype=int)
+        self.end = np.full(nptcs, -1, dtype=int)
+        for iptc, ptc in enumerate(self.particles):
+            self.indices[id(ptc)] = iptc
             start = ptc.start_vertex()
             if start:
-                vertex = self.vertices.get(start, None)
-                if vertex:
-                    vertex.outgoing.append(ptc)
-                else:
-                    raise ValueError('vertex not found!')
+                self.start[iptc] = self._vertex_index(vertex_index, start)
             end = ptc.end_vertex()
             if end:
-                vertex = self.vertices.get(end, None)
-                if vertex:
-                    vertex.incoming.append(ptc)
+                self.end[iptc] = self._vertex_index(vertex_index, end)
+        nvertices = len(self.vertices)
+        self.in_ptr, self.in_particles = csr(self.end, nvertices)
+        self.out_ptr, self.out_particles = csr(self.start, nvertices)
+        self._pdgids = None
+        self._ancestor_pdgids = dict()
+        self._first_ancestors = dict()
+
+        # setting the lists of incoming and outgoing particles
+        # for each vertex, and of daughters and mothers for each particle
+        for ivtx, vtx in enumerate(self.vertices):
+            vtx.incoming = self._particles(self._vertex_in(ivtx))
+            vtx.outgoing = self._particles(self._vertex_out(ivtx))
+        for iptc, ptc in enumerate(self.particles):
+            start, end = self.start[iptc], self.end[iptc]
+            ptc.mothers = self.vertices[start].incoming if start>=0 else []
+            ptc.daughters = self.vertices[end].outgoing if end>=0 else []
+
+    def _vertex_index(self, vertex_index, vertex):
+        ivtx = vertex_index.get(vertex, None)
+        if ivtx is None:
+            raise ValueError('vertex not found!')
+        return ivtx
+
+    def _vertex_in(self, ivtx):
+        return self.in_particles[self.in_ptr[ivtx]:self.in_ptr[ivtx+1]]
+
+    def _vertex_out(self, ivtx):
+        return self.out_particles[self.out_ptr[ivtx]:self.out_ptr[ivtx+1]]
+
+    def _particles(self, indices):
+        return [self.particles[i] for i in indices]
+
+    def index(self, particle):
+        """Returns the index of particle in the list of particles."""
+        return self.indices[id(particle)]
+
+    def mother_indices(self, iptc):
+        """Returns the indices of the mothers of particle iptc."""
+        start = self.start[iptc]
+        if start < 0:
+            return self.in_particles[:0]
+        return self._vertex_in(start)
+
+    def daughter_indices(self, iptc):
+        """Returns the indices of the daughters of particle iptc."""
+        end = self.end[iptc]
+        if end < 0:
+            return self.out_particles[:0]
+        return self._vertex_out(end)
+
+    def traverse_indices(self, iptc, up=True, depth_first=True):
+        """Iterates over the indices of the ancestors (if up is True)
+        or of the descendants of particle iptc, each of them once.
+        The traversal is depth first (pre-order), or breadth first,
+        in which case the particles are ordered by generation."""
+        neighbours = self.mother_indices if up else self.daughter_indices
+        visited = set([iptc])
+        if depth_first:
+            stack = [iter(neighbours(iptc))]
+            while stack:
+                for index in stack[-1]:
+                    if index not in visited:
+                        visited.add(index)
+                        yield index
+                        stack.append(iter(neighbours(index)))
+                        break
                 else:
-                    raise ValueError('vertex not found!')
-
-        # now the lists of incoming and outgoing particles is
-        # complete for each vertex
-        # setting the list of daughters and mothers for each particle
-        for vtx in self.vertices:
-            # print vtx, id(vtx),'-'*50
-            # print 'incoming'
-            for ptc in vtx.incoming:
-                # print ptc
-                ptc.daughters = vtx.outgoing
-            # print 'outgoing'
-            for ptc in vtx.outgoing:
-                # print ptc
-                ptc.mothers = vtx.incoming
-                
+                    stack.pop()
+        else:
+            queue = collections.deque([iptc])
+            while queue:
+                for index in neighbours(queue.popleft()):
+                    if index not in visited:
+                        visited.add(index)
+                        yield index
+                        queue.append(index)
+
+    def traverse(self, particle, up=True, depth_first=True):
+        """Iterates over the ancestors (if up is True) or the descendants
+        of particle, as traverse_indices."""
+        for iptc in self.traverse_indices(self.index(particle), up, depth_first):
+            yield self.particles[iptc]
+
     def ancestors(self, particle):
-        """Returns the list of ancestors for a given particle, 
+        """Returns the list of ancestors for a given particle,
         that is mothers, grandmothers, etc."""
-        result = []
-        for mother in particle.mothers:
-            result.append(mother)
-            result.extend(self.ancestors(mother))
-        return result
+        return list(self.traverse(particle, up=True))
 
     def descendants(self, particle):
-        """Returns the list of descendants for a given particle, 
+        """Returns the list of descendants for a given particle,
         that is daughters, granddaughters, etc."""
-        result = []
-        for daughter in particle.daughters:
-            result.append(daughter)
-            result.extend(self.descendants(daughter))
-        return result
+        return list(self.traverse(particle, up=False))
+
+    def _memoized_up(self, iptc, memo, merge):
+        """Computes memo[iptc] = merge(iptc, mothers) for iptc and all its
+        ancestors not yet in memo, without recursion. merge is called once
+        the memo of all the mothers is available.
+        In case of a cycle, the mother closing the cycle is ignored."""
+        if iptc in memo:
+            return memo[iptc]
+        on_path = set([iptc])
+        stack = [(iptc, iter(self.mother_indices(iptc)))]
+        while stack:
+            current, mothers = stack[-1]
+            for mother in mothers:
+                if mother not in memo and mother not in on_path:
+                    on_path.add(mother)
+                    stack.append((mother, iter(self.mother_indices(mother))))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(current)
+                mothers = [m for m in self.mother_indices(current) if m in memo]
+                memo[current] = merge(current, mothers)
+        return memo[iptc]
+
+    def ancestor_indices(self, particle):
+        """Returns the frozenset of the indices of the ancestors
+        of particle."""
+        return frozenset(self.traverse_indices(self.index(particle)))
+
+    def is_ancestor(self, ancestor, particle):
+        """True if ancestor is an ancestor of particle.
+        The traversal stops as soon as ancestor is found."""
+        target = self.index(ancestor)
+        return any(iptc == target
+                   for iptc in self.traverse_indices(self.index(particle)))
+
+    def pdgids(self):
+        """Returns the array of the pdgids of the particles."""
+        if self._pdgids is None:
+            self._pdgids = np.array([ptc.pdgid() for ptc in self.particles],
+                                    dtype=int)
+        return self._pdgids
 
+    def ancestor_pdgids(self, particle):
+        """Returns the frozenset of the absolute pdgids
+        of the ancestors of particle, memoized."""
+        memo = self._ancestor_pdgids
+        pdgids = self.pdgids()
+        def merge(iptc, mothers):
+            result = set(abs(pdgids[mother]) for mother in mothers)
+            for mother in mothers:
+                result.update(memo[mother])
+            return frozenset(result)
+        return self._memoized_up(self.index(particle), memo, merge)
 
+    def is_descendant_of_pdgid(self, particle, pdgid):
+        """True if particle has an ancestor with pdgid pdgid
+        or -pdgid."""
+        return abs(pdgid) in self.ancestor_pdgids(particle)
 
+    def first_ancestor(self, particle, func):
+        """Returns the closest ancestor of particle for which func
+        is True, None if there is none. The ancestors are scanned
+        generation by generation."""
+        for ancestor in self.traverse(particle, up=True, depth_first=False):
+            if func(ancestor):
+                return ancestor
+        return None
 
+    def first_ancestor_with_status(self, particle, status):
+        """Returns the closest ancestor of particle with a given status,
+        e.g. 22 for the particles of the hard process.
+        The result is memoized."""
+        key = (self.index(particle), status)
+        if key not in self._first_ancestors:
+            self._first_ancestors[key] = self.first_ancestor(
+                particle, lambda ptc: ptc.status()==status
+            )
+        return self._first_ancestors[key]
@@ -0,0 +1,146 @@
+'''Timing and memory counters of the analyzers of a sequence.
+
+The instrumentation is opt-in. In the configuration:
+
+  from heppy_fcc.tools.instrumentation import instrument
+  sequence = instrument(sequence, enabled=True)
+
+Each analyzer of the sequence then measures,
+for each call to process, the wall time, the cpu time, and the increase
+of the peak resident memory (RSS) of the process. At the end of the loop,
+each analyzer prints a summary and writes the histogram of its latency
+per event to instrumentation.txt, in its output directory.
+
+When not enabled, the sequence is left untouched and costs nothing.
+'''
+
+import os
+import time
+import bisect
+import resource
+
+
+class LatencyCounters(object):
+    '''Counters of the process calls of an analyzer.
+
+    The wall times are histogrammed in logarithmic bins,
+    10 per decade between 1 us and 100 s, plus the underflow
+    and overflow bins.'''
+
+    edges = [10 ** (i / 10.) for i in range(-60, 21)]
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.
+        self.cpu = 0.
+        self.max_wall = 0.
+        # increase of the peak RSS, in kB
+        self.rss = 0
+        self.counts = [0] * (len(self.edges) + 1)
+
+    def fill(self, wall, cpu, rss):
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.rss += rss
+        self.max_wall = max(self.max_wall, wall)
+        self.counts[bisect.bisect(self.edges, wall)] += 1
+
+    def quantile(self, q):
+        '''Upper edge of the bin containing the quantile q
+        of the wall time.'''
+        if not self.calls:
+            return 0.
+        threshold = q * self.calls
+        cumulative = 0
+        for ibin, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= threshold and count:
+                break
+        return self.edges[ibin] if ibin < len(self.edges) else self.max_wall
+
+    def summary(self):
+        calls = max(self.calls, 1)
+        return ('{name}: {calls} calls, wall {wall:.3f} ms/call '
+                '(p50 {p50:.3f}, p90 {p90:.3f}, p99 {p99:.3f}, max {max:.3f}), '
+                'cpu {cpu:.3f} ms/call, peak rss +{rss} kB').format(
+                    name=self.name, calls=self.calls,
+                    wall=1e3 * self.wall / calls,
+                    p50=1e3 * self.quantile(0.5),
+                    p90=1e3 * self.quantile(0.9),
+                    p99=1e3 * self.quantile(0.99),
+                    max=1e3 * self.max_wall,
+                    cpu=1e3 * self.cpu / calls, rss=self.rss)
+
+    def write(self, fname):
+        '''Writes the summary and the non-empty bins of the
+        latency histogram, in ms.'''
+        with open(fname, 'w') as out:
+            out.write(self.summary() + '\n')
+            out.write('{low:>12} {high:>12} {count:>10}\n'.format(
+                low='low (ms)', high='high (ms)', count='calls'))
+            lows = [0.] + self.edges
+            highs = self.edges + [float('inf')]
+            for low, high, count in zip(lows, highs, self.counts):
+                if count:
+                    out.write('{low:>12.4g} {high:>12.4g} {count:>10}\n'.format(
+                        low=1e3 * low, high=1e3 * high, count=count))
+
+
+class Instrumented(object):
+    '''Replaces the class of an analyzer in its configuration.
+    Creates the analyzer, and times its process calls.
+
+    Defined at module level, so that the configuration can be pickled,
+    e.g. by heppy_batch.'''
+
+    def __init__(self, analyzer_class):
+        self.analyzer_class = analyzer_class
+        self.__name__ = analyzer_class.__name__
+
+    def __call__(self, *args, **kwargs):
+        analyzer = self.analyzer_class(*args, **kwargs)
+        instrument_analyzer(analyzer)
+        return analyzer
+
+
+def instrument_analyzer(analyzer):
+    '''Replaces the process and endLoop methods of an analyzer
+    by methods measuring the calls to process, and dumping the
+    measurements at the end of the loop.'''
+    analyzer.latency = LatencyCounters(analyzer.name)
+    process = analyzer.process
+    end_loop = analyzer.endLoop
+
+    def timed_process(event):
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        start = time.time()
+        result = process(event)
+        wall = time.time() - start
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        cpu = after.ru_utime + after.ru_stime - \
+              before.ru_utime - before.ru_stime
+        analyzer.latency.fill(wall, cpu, after.ru_maxrss - before.ru_maxrss)
+        return result
+
+    def dumping_end_loop(setup):
+        end_loop(setup)
+        print analyzer.latency.summary()
+        if os.path.isdir(analyzer.dirName):
+            analyzer.latency.write(os.path.join(analyzer.dirName,
+                                                'instrumentation.txt'))
+
+    analyzer.process = timed_process
+    analyzer.endLoop = dumping_end_loop
+
+
+def instrument(sequence, enabled=True):
+    '''Instruments the analyzers of sequence, a list of cfg.Analyzer,
+    and returns it. Does nothing if not enabled.'''
+    if not enabled:
+        return sequence
+    for cfg_ana in sequence:
+        if not isinstance(cfg_ana.class_object, Instrumented):
+            cfg_ana.class_object = Instrumented(cfg_ana.class_object)
+    return sequence
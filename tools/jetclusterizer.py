@@ -0,0 +1,182 @@
+import math
+import numpy as np
+
+# maximum rapidity, for particles along the beam axis
+MAX_RAP = 1e5
+
+class JetClusterizer(object):
+    '''Sequential recombination jet clustering in numpy.
+
+    Pure python replacement for the compiled JetClusterizer classes,
+    which takes all particles at once.
+
+    Algorithms:
+    - kt, cambridge, antikt: hadron collider algorithms,
+      using pt, rapidity and phi, with dij = min(pti^2p, ptj^2p) dRij^2 / R^2
+    - ee_genkt: generalized kt algorithm for e+e- collisions,
+      using energy and angle, with dij = min(Ei^2p, Ej^2p) (1-cos(thetaij)) / (1-cos(R))
+    - ee_kt: Durham algorithm, dij = 2 min(Ei^2, Ej^2) (1-cos(thetaij)).
+      Exclusive only, njets must be set.
+
+    In inclusive mode (njets is None), the beam distance is diB = pti^2p
+    (Ei^2p for ee_genkt) and the jets with an energy larger than min_e are kept.
+    In exclusive mode, the pseudo-jets are merged until njets remain.
+
+    The nearest geometric neighbour of each pseudo-jet is kept up to date
+    after each recombination, so that each step costs O(N) numpy operations
+    instead of the O(N^2) evaluation of all dij.
+    '''
+
+    p_values = {'kt': 1., 'cambridge': 0., 'antikt': -1., 'ee_kt': 1.}
+
+    def __init__(self, min_e=0., algorithm='antikt', R=0.4, p=None, njets=None):
+        if algorithm not in ['kt', 'cambridge', 'antikt', 'ee_genkt', 'ee_kt']:
+            raise ValueError('unknown algorithm ' + algorithm)
+        if algorithm == 'ee_kt' and njets is None:
+            raise ValueError('ee_kt is an exclusive algorithm, set njets')
+        if p is None:
+            if algorithm == 'ee_genkt':
+                raise ValueError('set p for ee_genkt')
+            p = self.p_values[algorithm]
+        self.min_e = min_e
+        self.algorithm = algorithm
+        self.R = R
+        self.p = p
+        self.njets = njets
+        self.is_ee = algorithm.startswith('ee')
+
+    def _weights(self, p4):
+        '''returns pt^2p, or E^2p for ee algorithms'''
+        if self.is_ee:
+            var2 = p4[:, 3]**2
+        else:
+            var2 = p4[:, 0]**2 + p4[:, 1]**2
+        if self.p == 0:
+            return np.ones(len(p4))
+        return np.maximum(var2, 1e-300)**self.p
+
+    def _geometry(self, p4):
+        '''returns the coordinates used in the geometric distance:
+        unit vectors for ee algorithms, (rapidity, phi) otherwise.'''
+        if self.is_ee:
+            norm = np.sqrt(np.sum(p4[:, :3]**2, axis=1))
+            norm = np.where(norm > 0., norm, 1.)
+            return p4[:, :3] / norm[:, np.newaxis]
+        pt2 = p4[:, 0]**2 + p4[:, 1]**2
+        phi = np.arctan2(p4[:, 1], p4[:, 0])
+        phi = np.where(phi < 0., phi + 2*math.pi, phi)
+        energy, pz = p4[:, 3], p4[:, 2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rap = 0.5 * np.log((energy + pz) / (energy - pz))
+        along_beam = (energy <= np.abs(pz)) & (pt2 == 0.)
+        rap = np.where(along_beam | ~np.isfinite(rap),
+                       np.sign(pz) * (MAX_RAP + np.abs(pz)), rap)
+        return np.stack([rap, phi], axis=1)
+
+    def _distances(self, geo, i, others):
+        '''geometric distances between pseudo-jet i and the pseudo-jets others'''
+        if self.is_ee:
+            return 1. - np.dot(geo[others], geo[i])
+        drap = geo[others, 0] - geo[i, 0]
+        dphi = np.abs(geo[others, 1] - geo[i, 1])
+        dphi = np.where(dphi > math.pi, 2*math.pi - dphi, dphi)
+        return drap**2 + dphi**2
+
+    def _norm(self):
+        '''normalization of the geometric distance in dij'''
+        if self.algorithm == 'ee_kt':
+            return 0.5
+        elif self.is_ee:
+            if self.R < math.pi:
+                return 1. - math.cos(self.R)
+            return 3. + math.cos(self.R)
+        return self.R**2
+
+    def clusterize(self, px, py, pz, e):
+        '''Cluster the particles with the given momentum components.
+
+        returns:
+        - jets : (njets, 4) array of px, py, pz, E, sorted by decreasing energy
+        - jet_index : index of the jet of each particle,
+                      -1 if the particle is not in a jet
+        '''
+        p4 = np.stack([np.asarray(px, dtype=float),
+                       np.asarray(py, dtype=float),
+                       np.asarray(pz, dtype=float),
+                       np.asarray(e, dtype=float)], axis=1)
+        nptcs = len(p4)
+        if nptcs == 0:
+            return np.zeros((0, 4)), np.zeros(0, dtype=int)
+        owner = np.arange(nptcs)
+        active = np.ones(nptcs, dtype=bool)
+        is_jet = np.zeros(nptcs, dtype=bool)
+        weights = self._weights(p4)
+        geo = self._geometry(p4)
+        norm = self._norm()
+        nn_dist = np.full(nptcs, np.inf)
+        nn_index = np.full(nptcs, -1, dtype=int)
+        indices = np.arange(nptcs)
+
+        def update_nn(i):
+            others = indices[active]
+            others = others[others != i]
+            if len(others) == 0:
+                nn_dist[i] = np.inf
+                nn_index[i] = -1
+                return
+            dists = self._distances(geo, i, others)
+            best = np.argmin(dists)
+            nn_dist[i] = dists[best]
+            nn_index[i] = others[best]
+
+        for i in range(nptcs):
+            update_nn(i)
+        nactive = nptcs
+        while nactive > 0:
+            if self.njets is not None and nactive <= self.njets:
+                break
+            with np.errstate(invalid='ignore'):
+                nn_weights = np.where(nn_index >= 0, weights[nn_index], np.inf)
+                dij = np.where(active, np.minimum(weights, nn_weights) * nn_dist / norm,
+                               np.inf)
+            i = np.argmin(dij)
+            if self.njets is None:
+                dib = np.where(active, weights, np.inf)
+                ib = np.argmin(dib)
+                if dib[ib] <= dij[i] or not np.isfinite(dij[i]):
+                    # pseudo-jet ib becomes a jet
+                    active[ib] = False
+                    is_jet[ib] = True
+                    nactive -= 1
+                    for k in indices[active & (nn_index == ib)]:
+                        update_nn(k)
+                    continue
+            elif not np.isfinite(dij[i]):
+                break
+            j = nn_index[i]
+            i, j = min(i, j), max(i, j)
+            # merging j into i
+            p4[i] += p4[j]
+            active[j] = False
+            owner[owner == j] = i
+            nactive -= 1
+            weights[i] = self._weights(p4[i:i+1])[0]
+            geo[i] = self._geometry(p4[i:i+1])[0]
+            for k in indices[active & ((nn_index == i) | (nn_index == j))]:
+                update_nn(k)
+            update_nn(i)
+            # the new pseudo-jet can be the nearest neighbour of other ones
+            others = indices[active]
+            others = others[others != i]
+            if len(others):
+                dists = self._distances(geo, i, others)
+                closer = dists < nn_dist[others]
+                nn_dist[others[closer]] = dists[closer]
+                nn_index[others[closer]] = i
+        if self.njets is not None:
+            is_jet = active
+        jet_ids = indices[is_jet & (p4[:, 3] >= self.min_e)]
+        jet_ids = jet_ids[np.argsort(-p4[jet_ids, 3], kind='mergesort')]
+        jet_number = np.full(nptcs, -1, dtype=int)
+        jet_number[jet_ids] = np.arange(len(jet_ids))
+        return p4[jet_ids], jet_number[owner]
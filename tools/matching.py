@@ -0,0 +1,121 @@
+import math
+import numpy as np
+
+def delta_phi(phi1, phi2):
+    '''phi1 - phi2 in [-pi, pi], for arrays'''
+    return (phi1 - phi2 + math.pi) % (2*math.pi) - math.pi
+
+
+class EtaPhiIndex(object):
+    '''Objects sorted in eta, to find the objects within a given
+    distance in (eta, phi) of many other objects.'''
+
+    def __init__(self, etas, phis):
+        etas = np.asarray(etas, dtype=float)
+        self.order = np.argsort(etas, kind='mergesort')
+        self.etas = etas[self.order]
+        self.phis = np.asarray(phis, dtype=float)[self.order]
+
+    def __len__(self):
+        return len(self.etas)
+
+    def nearest(self, etas, phis, dr2_max):
+        '''For each (eta, phi), returns the index of the nearest object
+        with deltaR2 < dr2_max, -1 if none, and the corresponding deltaR2.'''
+        etas = np.asarray(etas, dtype=float)
+        phis = np.asarray(phis, dtype=float)
+        dr_max = math.sqrt(dr2_max)
+        starts = np.searchsorted(self.etas, etas - dr_max, side='left')
+        ends = np.searchsorted(self.etas, etas + dr_max, side='right')
+        index = np.full(len(etas), -1, dtype=int)
+        dr2 = np.full(len(etas), np.inf)
+        for i in np.nonzero(ends > starts)[0]:
+            start, end = starts[i], ends[i]
+            dr2s = (self.etas[start:end] - etas[i])**2 + \
+                   delta_phi(self.phis[start:end], phis[i])**2
+            best = np.argmin(dr2s)
+            if dr2s[best] < dr2_max:
+                index[i] = self.order[start + best]
+                dr2[i] = dr2s[best]
+        return index, dr2
+
+    def pairs(self, etas, phis, dr2_max):
+        '''Returns the arrays i, j, dr2 of all pairs of objects i
+        and indexed objects j with deltaR2 < dr2_max.'''
+        etas = np.asarray(etas, dtype=float)
+        phis = np.asarray(phis, dtype=float)
+        dr_max = math.sqrt(dr2_max)
+        starts = np.searchsorted(self.etas, etas - dr_max, side='left')
+        ends = np.searchsorted(self.etas, etas + dr_max, side='right')
+        all_i, all_j, all_dr2 = [], [], []
+        for i in np.nonzero(ends > starts)[0]:
+            start, end = starts[i], ends[i]
+            dr2s = (self.etas[start:end] - etas[i])**2 + \
+                   delta_phi(self.phis[start:end], phis[i])**2
+            inside = np.nonzero(dr2s < dr2_max)[0]
+            all_i.append(np.full(len(inside), i, dtype=int))
+            all_j.append(self.order[start + inside])
+            all_dr2.append(dr2s[inside])
+        if not all_i:
+            return (np.zeros(0, dtype=int), np.zeros(0, dtype=int),
+                    np.zeros(0))
+        return (np.concatenate(all_i), np.concatenate(all_j),
+                np.concatenate(all_dr2))
+
+
+def match_indices(etas, phis, match_etas, match_phis, dr2_max,
+                  one_to_one=False):
+    '''Matches objects at (etas, phis) to objects at (match_etas, match_phis).
+
+    Returns the index of the matched object for each object, -1 if none,
+    and the corresponding deltaR2.
+
+    By default, each object is matched to the nearest object within
+    deltaR2 < dr2_max, and several objects can be matched to the same one.
+    If one_to_one is True, each matched object is used at most once,
+    and the sum of the deltaR2 of the matched pairs is minimized among the
+    assignments with the largest number of pairs.
+    '''
+    index = EtaPhiIndex(match_etas, match_phis)
+    if not one_to_one:
+        return index.nearest(etas, phis, dr2_max)
+    nobjs = len(etas)
+    matches = np.full(nobjs, -1, dtype=int)
+    dr2 = np.full(nobjs, np.inf)
+    ii, jj, dr2s = index.pairs(etas, phis, dr2_max)
+    if len(ii) == 0:
+        return matches, dr2
+    # scipy is only needed for the one-to-one matching
+    from scipy.optimize import linear_sum_assignment
+    # assignment problem restricted to the objects with candidates
+    rows, ii = np.unique(ii, return_inverse=True)
+    cols, jj = np.unique(jj, return_inverse=True)
+    # forbidden pairs cost more than any set of allowed ones,
+    # so that the number of allowed pairs is maximized first.
+    forbidden = dr2_max * (min(len(rows), len(cols)) + 1)
+    cost = np.full((len(rows), len(cols)), forbidden)
+    cost[ii, jj] = dr2s
+    row_ind, col_ind = linear_sum_assignment(cost)
+    allowed = cost[row_ind, col_ind] < dr2_max
+    matches[rows[row_ind[allowed]]] = cols[col_ind[allowed]]
+    dr2[rows[row_ind[allowed]]] = cost[row_ind[allowed], col_ind[allowed]]
+    return matches, dr2
+
+
+def match_collection(objects, match_objects, dr2_max, one_to_one=False):
+    '''Replacement for heppy.utils.deltar.matchObjectCollection.
+
+    Returns a dictionary object : matched object (None if no match).
+    The objects must have eta() and phi() methods.
+    See match_indices for the one_to_one parameter.
+    '''
+    etas = [obj.eta() for obj in objects]
+    phis = [obj.phi() for obj in objects]
+    match_etas = [obj.eta() for obj in match_objects]
+    match_phis = [obj.phi() for obj in match_objects]
+    indices, dr2 = match_indices(etas, phis, match_etas, match_phis,
+                                 dr2_max, one_to_one)
+    pairs = dict()
+    for obj, index in zip(objects, indices):
+        pairs[obj] = match_objects[index] if index >= 0 else None
+    return pairs
@@ -0,0 +1,297 @@
+'''Profiling of the heppy configurations.
+
+A configuration is run for a given number of events under cProfile,
+or under a sampling profiler, and the time is attributed to each method
+of the analyzers (beginLoop, process, endLoop, write), and to each stage
+of PAPAS (propagation, smearing, merging, links, floodfill, reconstruction):
+
+  python test/prof.py test/simple_papas_cfg.py -n 100 -o prof_out
+
+The output directory contains:
+- report.txt: time per analyzer and stage, and the most expensive functions
+- stages.folded: time per analyzer and stage, in microseconds,
+  with the nesting of the calls
+- profile.prof (cProfile) or samples.folded (sampling profiler)
+
+The folded files can be given to flamegraph.pl:
+
+  flamegraph.pl prof_out/samples.folded > samples.svg
+'''
+
+import os
+import sys
+import time
+import signal
+import imp
+import functools
+import importlib
+import collections
+import cProfile
+import pstats
+import StringIO
+
+
+class Attribution(object):
+    '''Wall time spent in labelled functions.
+
+    The functions are wrapped by instrument. For each label, the time
+    is accumulated including the nested labelled functions (inclusive),
+    and excluding them (exclusive). A recursive call of a label is
+    accounted in its outermost call.
+    '''
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        # label, start time, time in nested labels
+        self.stack = []
+        self.active = collections.Counter()
+        self.calls = collections.Counter()
+        self.inclusive = collections.defaultdict(float)
+        self.exclusive = collections.defaultdict(float)
+        # path of labels -> exclusive time
+        self.folded = collections.defaultdict(float)
+        self.patches = []
+
+    def call(self, label, func, args, kwargs):
+        if self.active[label]:
+            return func(*args, **kwargs)
+        frame = [label, self.clock(), 0.]
+        self.stack.append(frame)
+        self.active[label] += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = self.clock() - frame[1]
+            self.stack.pop()
+            self.active[label] -= 1
+            self.calls[label] += 1
+            self.inclusive[label] += elapsed
+            self.exclusive[label] += elapsed - frame[2]
+            path = ';'.join([f[0] for f in self.stack] + [label])
+            self.folded[path] += elapsed - frame[2]
+            if self.stack:
+                self.stack[-1][2] += elapsed
+
+    def instrument(self, owner, name, label):
+        '''Replaces the function or method name of owner, a module or
+        a class, by a function timing it under label.
+        label can be a function returning the label from the first
+        argument of the call, e.g. the analyzer.'''
+        if any(p_owner is owner and p_name == name
+               for p_owner, p_name, had, old in self.patches):
+            return
+        had = name in owner.__dict__
+        self.patches.append( (owner, name, had, owner.__dict__.get(name)) )
+        original = getattr(owner, name)
+        attribution = self
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            the_label = label(args[0]) if callable(label) else label
+            return attribution.call(the_label, original, args, kwargs)
+        setattr(owner, name, timed)
+
+    def restore(self):
+        '''Puts the original functions back.'''
+        for owner, name, had, old in reversed(self.patches):
+            if had:
+                setattr(owner, name, old)
+            else:
+                delattr(owner, name)
+        self.patches = []
+
+
+# stage, module, class (None for a module function), functions
+papas_stages = [
+    ('papas', 'heppy_fcc.fastsim.simulator', 'Simulator', ['simulate']),
+    ('propagation', 'heppy_fcc.fastsim.propagator', 'StraightLinePropagator',
+     ['propagate', 'propagate_one']),
+    ('propagation', 'heppy_fcc.fastsim.propagator', 'HelixPropagator',
+     ['propagate', 'propagate_one']),
+    ('smearing', 'heppy_fcc.fastsim.simulator', 'Simulator',
+     ['smear_cluster', 'smear_track', 'smear_muon', 'smear_electron']),
+    ('merging', 'heppy_fcc.fastsim.pfalgo.sequence', None, ['merge_clusters']),
+    ('links', 'heppy_fcc.fastsim.pfalgo.links', 'Links', ['__init__']),
+    ('floodfill', 'heppy_fcc.fastsim.pfalgo.floodfill', 'FloodFill',
+     ['__init__']),
+    ('reconstruction', 'heppy_fcc.fastsim.pfalgo.pfreconstructor',
+     'PFReconstructor', ['__init__']),
+]
+
+analyzer_methods = ['beginLoop', 'process', 'endLoop', 'write']
+
+
+def instrument_papas(attribution, stages=papas_stages):
+    for stage, modname, clsname, funcs in stages:
+        module = importlib.import_module(modname)
+        owner = getattr(module, clsname) if clsname else module
+        for func in funcs:
+            attribution.instrument(owner, func, stage)
+
+
+def instrument_analyzers(attribution, config, methods=analyzer_methods):
+    '''Times the methods of the analyzers of the sequence of config,
+    labelled with the name of the analyzer, e.g. PFSim_papas.process.
+    Must be called before the creation of the looper.'''
+    for cfg_ana in config.sequence:
+        cls = cfg_ana.class_object
+        # analyzers instrumented by heppy_fcc.tools.instrumentation
+        cls = getattr(cls, 'analyzer_class', cls)
+        for method in methods:
+            label = lambda ana, method=method: '.'.join([ana.name, method])
+            attribution.instrument(cls, method, label)
+
+
+class Sampler(object):
+    '''Sampling profiler: the python stack is recorded every interval
+    seconds of cpu time. Same interface as cProfile.Profile.'''
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.counts = collections.Counter()
+        self.old_handler = None
+
+    def sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append('{func} ({fname}:{line})'.format(
+                func=code.co_name,
+                fname=os.path.basename(code.co_filename),
+                line=code.co_firstlineno))
+            frame = frame.f_back
+        self.counts[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self.old_handler = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def disable(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self.old_handler or signal.SIG_DFL)
+
+    def self_counts(self):
+        '''Number of samples per function, in the function itself.'''
+        counts = collections.Counter()
+        for stack, count in self.counts.iteritems():
+            counts[stack.rsplit(';', 1)[-1]] += count
+        return counts
+
+
+def write_folded(fname, folded, scale=1.):
+    '''Writes the stacks in the folded format of flamegraph.pl.
+    folded is a dictionary stack:value, with the frames separated by ;'''
+    with open(fname, 'w') as out:
+        for stack, value in sorted(folded.iteritems()):
+            value = int(round(value * scale))
+            if value > 0:
+                out.write('{stack} {value}\n'.format(stack=stack, value=value))
+
+
+def attribution_report(attribution, total):
+    '''Table of the time per label, sorted by inclusive time.'''
+    lines = ['{label:<40} {calls:>8} {incl:>10} {excl:>10} {frac:>6} {percall:>10}'.format(
+        label='analyzer / stage', calls='calls', incl='incl (s)',
+        excl='excl (s)', frac='%', percall='ms/call')]
+    for label, incl in sorted(attribution.inclusive.iteritems(),
+                              key=lambda item: -item[1]):
+        calls = attribution.calls[label]
+        lines.append('{label:<40} {calls:>8} {incl:>10.3f} {excl:>10.3f} {frac:>6.1f} {percall:>10.3f}'.format(
+            label=label, calls=calls, incl=incl,
+            excl=attribution.exclusive[label],
+            frac=100. * incl / total if total else 0.,
+            percall=1000. * incl / calls))
+    return '\n'.join(lines)
+
+
+def profile_cfg(cfgfile, nevents, outdir, mode='cprofile', interval=0.001,
+                nfunctions=30):
+    '''Runs the configuration cfgfile on nevents events, and writes the
+    profiling reports to outdir. mode is cprofile or sample.
+    Returns the text report.'''
+    from heppy.framework.looper import Looper
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+    cfo = imp.load_source('profiled_cfg', cfgfile)
+    config = cfo.config
+    attribution = Attribution()
+    instrument_analyzers(attribution, config)
+    instrument_papas(attribution)
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+    elif mode == 'sample':
+        profiler = Sampler(interval)
+    else:
+        raise ValueError('unknown profiling mode ' + mode)
+    start = time.time()
+    profiler.enable()
+    try:
+        looper = Looper(os.path.join(outdir, 'looper'), config,
+                        nEvents=nevents, nPrint=0)
+        looper.loop()
+        looper.write()
+    finally:
+        profiler.disable()
+        attribution.restore()
+    total = time.time() - start
+    report = ['{cfg}: {nevents} events, {total:.3f} s'.format(
+        cfg=cfgfile, nevents=nevents, total=total), '',
+              attribution_report(attribution, total), '']
+    write_folded(os.path.join(outdir, 'stages.folded'),
+                 attribution.folded, 1e6)
+    if mode == 'cprofile':
+        profiler.dump_stats(os.path.join(outdir, 'profile.prof'))
+        stream = StringIO.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(nfunctions)
+        report.append(stream.getvalue())
+    else:
+        write_folded(os.path.join(outdir, 'samples.folded'), profiler.counts)
+        nsamples = sum(profiler.counts.values())
+        report.append('{nsamples} samples, most frequent functions:'.format(
+            nsamples=nsamples))
+        for func, count in profiler.self_counts().most_common(nfunctions):
+            report.append('{frac:6.1f}% {func}'.format(
+                frac=100. * count / nsamples, func=func))
+    report = '\n'.join(report)
+    with open(os.path.join(outdir, 'report.txt'), 'w') as out:
+        out.write(report + '\n')
+    return report
+
+
+def print_stats(fname, nfunctions=20):
+    '''Prints an existing cProfile output file.'''
+    stats = pstats.Stats(fname)
+    stats.sort_stats('cumulative').print_stats(nfunctions)
+    stats.sort_stats('tottime').print_stats(nfunctions)
+
+
+def main(argv=None):
+    from optparse import OptionParser
+    parser = OptionParser(usage='%prog [options] cfg.py')
+    parser.add_option('-n', '--nevents', dest='nevents', type='int',
+                      default=100, help='number of events')
+    parser.add_option('-o', '--outdir', dest='outdir', default='prof_out',
+                      help='output directory')
+    parser.add_option('-m', '--mode', dest='mode', default='cprofile',
+                      help='cprofile or sample')
+    parser.add_option('-i', '--interval', dest='interval', type='float',
+                      default=0.001,
+                      help='sampling interval in seconds, for the sample mode')
+    parser.add_option('-s', '--stats', dest='stats', action='store_true',
+                      default=False,
+                      help='only print the argument, a cProfile output file')
+    options, args = parser.parse_args(argv)
+    if len(args) != 1:
+        parser.print_usage()
+        sys.exit(1)
+    if options.stats:
+        print_stats(args[0])
+        return
+    # the configurations import their modules relative to their directory
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args[0])))
+    print profile_cfg(args[0], options.nevents, options.outdir,
+                      options.mode, options.interval)
+
+
+if __name__ == '__main__':
+    main()
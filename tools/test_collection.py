@@ -0,0 +1,62 @@
+import unittest
+from collection import CollectionView, LazyCollection
+
+class TestCollectionView(unittest.TestCase):
+
+    def test_filter(self):
+        objs = range(10)
+        calls = []
+        def even(obj):
+            calls.append(obj)
+            return obj%2 == 0
+        evens = CollectionView(objs, func=even)
+        # lazy evaluation
+        self.assertEqual( calls, [] )
+        large_evens = evens.filter(lambda obj: obj>3)
+        self.assertEqual( list(large_evens), [4, 6, 8] )
+        self.assertEqual( len(calls), 10 )
+        # views of views refer to the base collection
+        self.assertTrue( large_evens.base is objs )
+        self.assertEqual( list(large_evens.indices), [4, 6, 8] )
+        self.assertEqual( len(evens), 5 )
+        self.assertEqual( len(calls), 10 )
+
+    def test_access(self):
+        objs = ['a', 'b', 'c', 'd']
+        view = CollectionView(objs, mask=[True, False, True, True])
+        self.assertEqual( view[0], 'a' )
+        self.assertEqual( view[-1], 'd' )
+        self.assertEqual( list(view[1:]), ['c', 'd'] )
+        self.assertEqual( list(view.select([False, True, False])), ['c'] )
+        self.assertEqual( list(CollectionView(objs, indices=[3, 1])), ['d', 'b'] )
+        self.assertTrue( 'c' in view )
+        self.assertFalse( 'b' in view )
+        self.assertFalse( CollectionView([]) )
+        self.assertEqual( view.tolist(), ['a', 'c', 'd'] )
+
+
+class TestLazyCollection(unittest.TestCase):
+
+    def test_lazy(self):
+        calls = []
+        def build():
+            calls.append(1)
+            return [3, 1, 2]
+        objs = LazyCollection(build)
+        self.assertFalse( objs.converted() )
+        self.assertEqual( calls, [] )
+        objs.sort()
+        self.assertTrue( objs.converted() )
+        self.assertEqual( list(objs), [1, 2, 3] )
+        self.assertEqual( len(objs), 3 )
+        self.assertEqual( objs[-1], 3 )
+        self.assertEqual( objs + [4], [1, 2, 3, 4] )
+        self.assertTrue( 2 in objs )
+        self.assertEqual( objs, [1, 2, 3] )
+        # built only once
+        self.assertEqual( len(calls), 1 )
+        self.assertFalse( LazyCollection(list) )
+
+        
+if __name__ == '__main__':
+    unittest.main()
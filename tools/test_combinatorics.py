@@ -0,0 +1,68 @@
+import unittest
+import math
+import itertools
+import numpy as np
+from combinatorics import leg_combinations, combination_masses, \
+    select_combinations
+
+def p4(px, py, pz, m):
+    return [px, py, pz, math.sqrt(px**2 + py**2 + pz**2 + m**2)]
+
+class TestCombinatorics(unittest.TestCase):
+
+    def test_leg_combinations(self):
+        for nlegs, n in [(5, 2), (5, 3), (4, 4), (1, 2), (3, 4)]:
+            expected = list(itertools.combinations(range(nlegs), n))
+            combinations = leg_combinations(nlegs, n)
+            self.assertEqual( combinations.shape, (len(expected), n) )
+            self.assertEqual( map(tuple, combinations), expected )
+
+    def test_combination_masses(self):
+        p4s = np.array([p4(10., 0., 0., 0.), p4(-10., 0., 0., 0.),
+                        p4(0., 3., 4., 1.)])
+        combinations = leg_combinations(3, 2)
+        mass = combination_masses(p4s, combinations)
+        self.assertAlmostEqual( mass[0], 20. )
+        for (i, j), m in zip(combinations, mass):
+            total = p4s[i] + p4s[j]
+            self.assertAlmostEqual(
+                m, math.sqrt(total[3]**2 - np.sum(total[:3]**2))
+            )
+        # negative mass squares give negative masses
+        bad = np.array([[0., 0., 10., 1.], [0., 0., 0., 0.]])
+        self.assertAlmostEqual( combination_masses(bad, leg_combinations(2, 2))[0],
+                                -math.sqrt(99.) )
+
+    def test_select_combinations(self):
+        combinations = leg_combinations(4, 2)
+        # (0,1) (0,2) (0,3) (1,2) (1,3) (2,3)
+        mass = np.array([90., 80., 95., 91., 150., 60.])
+        charges = np.array([1, -1, 1, -1])
+        self.assertEqual( list(select_combinations(combinations, mass, 91.)),
+                          [3, 0, 2, 1, 5, 4] )
+        # opposite charges: (0,1) (0,3) (1,2) (2,3)
+        self.assertEqual(
+            list(select_combinations(combinations, mass, 91., charges, 0)),
+            [3, 0, 2, 5]
+        )
+        self.assertEqual(
+            list(select_combinations(combinations, mass, 91., charges, 2)),
+            [1]
+        )
+        self.assertEqual(
+            list(select_combinations(combinations, mass, 91.,
+                                     mass_window=(85., 100.))),
+            [3, 0, 2]
+        )
+        self.assertEqual(
+            list(select_combinations(combinations, mass, 91., charges, 0,
+                                     mass_window=(50., 100.), top_k=2)),
+            [3, 0]
+        )
+        self.assertEqual(
+            list(select_combinations(combinations, mass, 91., top_k=0)), []
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
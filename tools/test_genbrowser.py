@@ -3,10 +3,12 @@ from genbrowser import GenBrowser
 
 class Particle(object):
 
-    def __init__(self, id, start, end):
+    def __init__(self, id, start, end, pdgid=0, status=1):
         self.id = id
         self.start = start
         self.end = end
+        self._pdgid = pdgid
+        self._status = status
         # self.mothers = []
         # self.daughters = []
 
@@ -16,6 +18,12 @@ class Particle(object):
     def end_vertex(self):
         return self.end
 
+    def pdgid(self):
+        return self._pdgid
+
+    def status(self):
+        return self._status
+
     def __str__(self):
         return 'particle {i}: \tstart {s}, \tend {e}'.format(
             i=self.id,
@@ -71,6 +79,35 @@ class TestGenBrowser(unittest.TestCase):
         self.assertItemsEqual( ps[4].mothers, [ps[2]] )
         self.assertItemsEqual( browser.ancestors(ps[4]), [ps[2], ps[0], ps[5]]) 
         self.assertItemsEqual( browser.descendants(ps[0]), ps[1:5]) 
+        # the empty lists are not shared
+        ps[0].mothers.append(ps[5])
+        self.assertEqual( ps[1].daughters, [] )
+
+    def test_queries(self):
+        # a chain of 2000 generations, starting with a b quark
+        # from the hard process
+        nptcs = 2000
+        vs = map(Vertex, range(nptcs))
+        ps = [Particle(0, None, vs[0], pdgid=-5, status=22)]
+        for i in range(1, nptcs):
+            end = vs[i] if i<nptcs-1 else None
+            ps.append( Particle(i, vs[i-1], end, pdgid=21, status=2) )
+        ps[-1]._status = 1
+        browser = GenBrowser(ps, vs)
+        last = ps[-1]
+        self.assertEqual( len(browser.ancestors(last)), nptcs-1 )
+        self.assertEqual( len(browser.descendants(ps[0])), nptcs-1 )
+        bfs = list(browser.traverse(last, depth_first=False))
+        self.assertEqual( bfs[0], ps[-2] )
+        self.assertEqual( len(browser.ancestor_indices(last)), nptcs-1 )
+        self.assertTrue( browser.is_ancestor(ps[10], last) )
+        self.assertFalse( browser.is_ancestor(last, ps[10]) )
+        self.assertTrue( browser.is_descendant_of_pdgid(last, 5) )
+        self.assertFalse( browser.is_descendant_of_pdgid(last, 15) )
+        self.assertFalse( browser.is_descendant_of_pdgid(ps[0], 5) )
+        self.assertEqual( browser.first_ancestor_with_status(last, 22), ps[0] )
+        self.assertEqual( browser.first_ancestor_with_status(last, 2), ps[-2] )
+        self.assertIsNone( browser.first_ancestor_with_status(ps[0], 22) )
 
 
 
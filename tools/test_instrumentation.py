@@ -0,0 +1,75 @@
+import unittest
+import os
+import pickle
+import shutil
+import tempfile
+from instrumentation import LatencyCounters, instrument
+
+class Analyzer(object):
+    def __init__(self, cfg_ana, dirName):
+        self.name = cfg_ana.name
+        self.dirName = dirName
+        self.ended = False
+    def process(self, event):
+        return event > 0
+    def endLoop(self, setup):
+        self.ended = True
+
+class CfgAnalyzer(object):
+    def __init__(self, class_object, name):
+        self.class_object = class_object
+        self.name = name
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_counters(self):
+        counters = LatencyCounters('ana')
+        for wall in [0.001] * 90 + [0.1] * 10:
+            counters.fill(wall, wall, 0)
+        self.assertEqual( counters.calls, 100 )
+        self.assertAlmostEqual( counters.wall, 1.09 )
+        self.assertEqual( sum(counters.counts), 100 )
+        self.assertTrue( 0.001 <= counters.quantile(0.5) < 0.0013 )
+        self.assertTrue( 0.1 <= counters.quantile(0.99) < 0.13 )
+        counters.fill(1000., 0., 0)
+        self.assertEqual( counters.quantile(1.), 1000. )
+
+    def test_instrument(self):
+        sequence = [CfgAnalyzer(Analyzer, 'ana_1'), CfgAnalyzer(Analyzer, 'ana_2')]
+        self.assertTrue( instrument(sequence, enabled=False)[0].class_object
+                         is Analyzer )
+        instrument(sequence)
+        factory = sequence[0].class_object
+        self.assertTrue( factory.analyzer_class is Analyzer )
+        self.assertEqual( factory.__name__, 'Analyzer' )
+        # no double instrumentation
+        instrument(sequence)
+        self.assertTrue( sequence[0].class_object is factory )
+        ana = factory(sequence[0], self.tmpdir)
+        self.assertTrue( type(ana) is Analyzer )
+        self.assertTrue( ana.process(1) )
+        self.assertFalse( ana.process(-1) )
+        self.assertEqual( ana.latency.calls, 2 )
+        ana.endLoop(None)
+        self.assertTrue( ana.ended )
+        with open(os.path.join(self.tmpdir, 'instrumentation.txt')) as out:
+            self.assertTrue( out.readline().startswith('ana_1: 2 calls') )
+
+    def test_pickle(self):
+        # heppy_batch pickles the configuration
+        sequence = instrument([CfgAnalyzer(Analyzer, 'ana_1')])
+        sequence = pickle.loads(pickle.dumps(sequence))
+        cfg_ana = sequence[0]
+        ana = cfg_ana.class_object(cfg_ana, self.tmpdir)
+        ana.process(1)
+        self.assertEqual( ana.latency.calls, 1 )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import math
+import numpy as np
+from jetclusterizer import JetClusterizer
+
+def p4(e, theta, phi):
+    return [e*math.sin(theta)*math.cos(phi),
+            e*math.sin(theta)*math.sin(phi),
+            e*math.cos(theta),
+            e]
+
+class TestJetClusterizer(unittest.TestCase):
+
+    def setUp(self):
+        # two groups of massless particles, back to back,
+        # and a soft isolated particle
+        self.p4s = np.array([p4(10., 1., 0.), p4(5., 1.1, 0.1), p4(2., 0.95, -0.05),
+                             p4(20., math.pi-1., math.pi), p4(1., math.pi-1.1, math.pi+0.1),
+                             p4(0.5, math.pi/2., math.pi/2.)])
+
+    def test_antikt(self):
+        clusterizer = JetClusterizer(algorithm='antikt', R=0.4)
+        jets, jet_index = clusterizer.clusterize(*self.p4s.T)
+        self.assertEqual( len(jets), 3 )
+        self.assertEqual( list(jet_index), [1, 1, 1, 0, 0, 2] )
+        self.assertTrue( np.allclose(jets[1], self.p4s[:3].sum(axis=0)) )
+
+    def test_min_e(self):
+        clusterizer = JetClusterizer(1., algorithm='kt', R=0.4)
+        jets, jet_index = clusterizer.clusterize(*self.p4s.T)
+        self.assertEqual( len(jets), 2 )
+        self.assertEqual( jet_index[-1], -1 )
+
+    def test_exclusive(self):
+        for algorithm, kwargs in [('ee_kt', dict()),
+                                  ('ee_genkt', dict(p=1.)),
+                                  ('cambridge', dict())]:
+            clusterizer = JetClusterizer(algorithm=algorithm, njets=2, **kwargs)
+            jets, jet_index = clusterizer.clusterize(*self.p4s.T)
+            self.assertEqual( len(jets), 2 )
+            self.assertAlmostEqual( jets[:, 3].sum(), self.p4s[:, 3].sum() )
+
+    def test_empty(self):
+        jets, jet_index = JetClusterizer().clusterize([], [], [], [])
+        self.assertEqual( len(jets), 0 )
+
+    def test_bad_config(self):
+        self.assertRaises(ValueError, JetClusterizer, algorithm='foo')
+        self.assertRaises(ValueError, JetClusterizer, algorithm='ee_kt')
+        
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import math
+from matching import match_indices, match_collection
+
+class Object(object):
+
+    def __init__(self, eta, phi):
+        self._eta = eta
+        self._phi = phi
+
+    def eta(self):
+        return self._eta
+
+    def phi(self):
+        return self._phi
+
+
+class TestMatching(unittest.TestCase):
+
+    def test_nearest(self):
+        indices, dr2 = match_indices([0., 1., 3.], [0., 3.1, 0.],
+                                     [1.05, 0.1, 0.2], [-3.1, 0., 0.],
+                                     0.3**2)
+        # second object matched across phi = pi
+        self.assertEqual( list(indices), [1, 0, -1] )
+        self.assertAlmostEqual( dr2[0], 0.01 )
+
+    def test_one_to_one(self):
+        etas = [0., 0.15]
+        match_etas = [0.1, 0.4]
+        # both objects closest to the first one
+        indices, dr2 = match_indices(etas, [0., 0.], match_etas, [0., 0.], 0.3**2)
+        self.assertEqual( list(indices), [0, 0] )
+        # one to one: the second object takes the second match
+        indices, dr2 = match_indices(etas, [0., 0.], match_etas, [0., 0.], 0.3**2,
+                                     one_to_one=True)
+        self.assertEqual( list(indices), [0, 1] )
+
+    def test_collection(self):
+        objs = [Object(0., 0.), Object(2., 2.)]
+        match_objs = [Object(0.1, 0.)]
+        pairs = match_collection(objs, match_objs, 0.3**2)
+        self.assertTrue( pairs[objs[0]] is match_objs[0] )
+        self.assertTrue( pairs[objs[1]] is None )
+        pairs = match_collection(objs, [], 0.3**2)
+        self.assertTrue( pairs[objs[0]] is None )
+
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from profiling import Attribution, Sampler, write_folded, attribution_report
+
+class Clock(object):
+    def __init__(self):
+        self.time = 0.
+    def __call__(self):
+        return self.time
+
+clock = Clock()
+
+def floodfill():
+    clock.time += 1.
+
+def links(n):
+    clock.time += 2.
+    if n:
+        # recursion accounted in the outermost call
+        links(n-1)
+    floodfill()
+
+class Analyzer(object):
+    def __init__(self, name):
+        self.name = name
+    def process(self, event):
+        clock.time += 0.5
+        links(1)
+        return event
+
+original_process = Analyzer.__dict__['process']
+
+class TestAttribution(unittest.TestCase):
+
+    def setUp(self):
+        clock.time = 0.
+        self.attribution = Attribution(clock)
+        module = sys.modules[__name__]
+        self.attribution.instrument(module, 'links', 'links')
+        self.attribution.instrument(module, 'floodfill', 'floodfill')
+        self.attribution.instrument(
+            Analyzer, 'process', lambda ana: '.'.join([ana.name, 'process'])
+        )
+
+    def tearDown(self):
+        self.attribution.restore()
+
+    def test_attribution(self):
+        ana = Analyzer('papas')
+        self.assertEqual( ana.process(1), 1 )
+        self.assertEqual( ana.process(2), 2 )
+        attribution = self.attribution
+        self.assertEqual( attribution.calls['papas.process'], 2 )
+        self.assertEqual( attribution.calls['links'], 2 )
+        self.assertEqual( attribution.calls['floodfill'], 4 )
+        self.assertAlmostEqual( attribution.inclusive['papas.process'], 13. )
+        self.assertAlmostEqual( attribution.exclusive['papas.process'], 1. )
+        self.assertAlmostEqual( attribution.inclusive['links'], 12. )
+        self.assertAlmostEqual( attribution.exclusive['links'], 8. )
+        self.assertAlmostEqual( attribution.folded['papas.process;links;floodfill'], 4. )
+        report = attribution_report(attribution, 13.)
+        self.assertEqual( report.splitlines()[1].split()[0], 'papas.process' )
+
+    def test_restore(self):
+        self.attribution.restore()
+        ana = Analyzer('papas')
+        ana.process(1)
+        self.assertEqual( len(self.attribution.calls), 0 )
+        self.assertTrue( Analyzer.__dict__['process'] is original_process )
+
+
+class TestSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_sampler(self):
+        sampler = Sampler(0.001)
+        sampler.enable()
+        try:
+            total = 0
+            for i in range(2000000):
+                total += i
+        finally:
+            sampler.disable()
+        self.assertTrue( sum(sampler.counts.values()) > 0 )
+        func, count = sampler.self_counts().most_common(1)[0]
+        self.assertTrue( func.startswith('test_sampler') )
+        fname = os.path.join(self.tmpdir, 'samples.folded')
+        write_folded(fname, sampler.counts)
+        with open(fname) as folded:
+            for line in folded:
+                stack, count = line.rsplit(' ', 1)
+                self.assertTrue( int(count) > 0 )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from genbrowser import GenBrowser
+from truthtagging import truth_flags, tag, truth_mask, flag
+
+class Particle(object):
+
+    def __init__(self, pdgid, status, start, end):
+        self._pdgid = pdgid
+        self._status = status
+        self.start = start
+        self.end = end
+
+    def pdgid(self):
+        return self._pdgid
+
+    def status(self):
+        return self._status
+
+    def start_vertex(self):
+        return self.start
+
+    def end_vertex(self):
+        return self.end
+
+
+class Vertex(object):
+    pass
+
+
+class TestTruthTagging(unittest.TestCase):
+
+    def test_decay_chain(self):
+        # Z (hard process) -> b bbar, b -> B0s -> Ds tau nu, Ds -> pi, tau -> pi
+        vs = [Vertex() for i in range(5)]
+        ps = [
+            Particle(23, 22, None, vs[0]),
+            Particle(5, 23, vs[0], vs[1]),
+            Particle(-5, 23, vs[0], None),
+            Particle(531, 2, vs[1], vs[2]),
+            Particle(-431, 2, vs[2], vs[3]),
+            Particle(15, 2, vs[2], vs[4]),
+            Particle(-16, 1, vs[2], None),
+            Particle(211, 1, vs[3], None),
+            Particle(-211, 1, vs[4], None),
+            Particle(22, 1, None, None),
+        ]
+        # shuffling the vertices to check the propagation order
+        browser = GenBrowser(ps, [vs[i] for i in [3, 1, 4, 0, 2]])
+        tag(browser)
+        self.assertFalse( ps[0].from_hard_process )
+        self.assertTrue( ps[1].from_hard_process )
+        self.assertFalse( ps[1].from_b )
+        self.assertTrue( ps[3].from_b )
+        self.assertFalse( ps[3].from_ds )
+        pi_ds, pi_tau = ps[7], ps[8]
+        self.assertTrue( pi_ds.from_b and pi_ds.from_ds and
+                         pi_ds.from_hard_process )
+        self.assertFalse( pi_ds.from_tau )
+        self.assertTrue( pi_tau.from_tau and pi_tau.from_b )
+        self.assertFalse( pi_tau.from_ds )
+        self.assertEqual( ps[9].truth_flags, 0 )
+        self.assertEqual( list(truth_mask(ps, 'from_tau')),
+                          [False] * 8 + [True, False] )
+        self.assertEqual( pi_tau.truth_flags & flag('from_b'), flag('from_b') )
+        self.assertRaises( ValueError, flag, 'from_top' )
+
+    def test_deep(self):
+        nptcs = 5000
+        vs = [Vertex() for i in range(nptcs)]
+        ps = [Particle(15, 2, None, vs[0])]
+        for i in range(1, nptcs):
+            ps.append( Particle(21, 2, vs[i-1], vs[i]) )
+        browser = GenBrowser(ps, vs)
+        flags = truth_flags(browser)
+        self.assertEqual( flags[0], 0 )
+        self.assertTrue( all(flags[1:] == flag('from_tau')) )
+
+
+if __name__ == '__main__':
+    unittest.main()
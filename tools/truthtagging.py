@@ -0,0 +1,105 @@
+import numpy as np
+
+def is_b(pdgid, status):
+    '''b quarks and b hadrons'''
+    apdgid = np.abs(pdgid)
+    return (apdgid==5) | ((apdgid//100)%10==5) | ((apdgid//1000)%10==5)
+
+def is_tau(pdgid, status):
+    return np.abs(pdgid)==15
+
+def is_ds(pdgid, status):
+    return np.abs(pdgid)==431
+
+def is_hard_process(pdgid, status):
+    '''pythia 8 status codes of the hard process particles'''
+    return (status>=21) & (status<=29)
+
+# categories of ancestors, in the order of the bits
+categories = [
+    ('from_b', is_b),
+    ('from_tau', is_tau),
+    ('from_ds', is_ds),
+    ('from_hard_process', is_hard_process),
+]
+
+def flag(name, categories=categories):
+    '''Returns the bit of the category name.'''
+    for bit, (cat_name, func) in enumerate(categories):
+        if cat_name == name:
+            return 1 << bit
+    raise ValueError('unknown truth category ' + name)
+
+
+def gather(ptr, indices, rows):
+    '''Concatenation of the rows of a CSR array.'''
+    starts, ends = ptr[rows], ptr[rows+1]
+    lengths = ends - starts
+    if lengths.sum() == 0:
+        return indices[:0]
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[offsets + np.arange(lengths.sum())]
+
+
+def truth_flags(browser, categories=categories):
+    '''Returns the array of the truth flags of the particles of a GenBrowser.
+
+    Bit i of the flags of a particle is set if one of its ancestors
+    belongs to category i. The flags are propagated from the vertices
+    without incoming particles down to the last vertices,
+    one generation of vertices at a time.
+    '''
+    particles = browser.particles
+    nptcs = len(particles)
+    pdgid = browser.pdgids()
+    status = np.array([ptc.status() for ptc in particles], dtype=int)
+    own = np.zeros(nptcs, dtype=np.int64)
+    for bit, (name, func) in enumerate(categories):
+        own[func(pdgid, status)] |= 1 << bit
+    flags = np.zeros(nptcs, dtype=np.int64)
+    start, end = browser.start, browser.end
+    nvertices = len(browser.vertices)
+    vflags = np.zeros(nvertices, dtype=np.int64)
+    # a vertex is ready when all its incoming particles have a start vertex
+    # that has already been processed.
+    pending = np.bincount(end[(start>=0) & (end>=0)], minlength=nvertices)
+    done = np.zeros(nvertices, dtype=bool)
+    frontier = np.nonzero(pending==0)[0]
+    while True:
+        while len(frontier):
+            done[frontier] = True
+            incoming = gather(browser.in_ptr, browser.in_particles, frontier)
+            np.bitwise_or.at(vflags, end[incoming], flags[incoming] | own[incoming])
+            outgoing = gather(browser.out_ptr, browser.out_particles, frontier)
+            flags[outgoing] = vflags[start[outgoing]]
+            ended = end[outgoing]
+            ended = ended[ended>=0]
+            np.subtract.at(pending, ended, 1)
+            ended = np.unique(ended)
+            frontier = ended[(pending[ended]==0) & ~done[ended]]
+        # vertices left in a cycle: breaking it at the first one
+        left = np.nonzero(~done)[0]
+        if not len(left):
+            break
+        frontier = left[:1]
+    return flags
+
+
+def tag(browser, categories=categories):
+    '''Sets the truth_flags attribute of the particles of a GenBrowser,
+    and an attribute per category, e.g. ptc.from_b.
+    Returns the array of the flags.'''
+    flags = truth_flags(browser, categories)
+    for ptc, ptc_flags in zip(browser.particles, flags):
+        ptc.truth_flags = int(ptc_flags)
+        for bit, (name, func) in enumerate(categories):
+            setattr(ptc, name, bool(ptc_flags & (1 << bit)))
+    return flags
+
+
+def truth_mask(particles, name, categories=categories):
+    '''Boolean array selecting the particles tagged with category name.
+    The particles must have been tagged.'''
+    bit = flag(name, categories)
+    flags = np.array([ptc.truth_flags for ptc in particles], dtype=np.int64)
+    return (flags & bit) != 0